@@ -9,6 +9,7 @@ if project_root not in sys.path:
 # Import logging and the setup function first
 import logging
 from utilities.confluence_logging_config import setup_app_logging # For standalone execution
+from utilities.confluence_log_utils import LazyJson
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -53,7 +54,8 @@ def get_atlassian_mcp_config() -> MCPConfigDict_class:
     """
     logger.debug("Loading Atlassian MCP server configuration from configs/confluence_config.py...")
     # The configuration is now directly imported
-    logger.debug(f"MCP config for mcp-use: {json.dumps(ATLASSIAN_MCP_SERVER_CONFIG)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("MCP config for mcp-use: %s", LazyJson(ATLASSIAN_MCP_SERVER_CONFIG))
     return ATLASSIAN_MCP_SERVER_CONFIG # type: ignore
 
 async def initialize_agent_and_client(
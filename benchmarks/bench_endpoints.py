@@ -0,0 +1,238 @@
+"""
+Throughput benchmark of the content endpoints against the offline MCP stand-in
+(tests/fake_mcp_server.py), so it runs in CI or on an air-gapped machine.
+
+For each endpoint a fresh API server is started in a subprocess (working directory in a temp dir,
+so output, state and logs start empty), pointed at the fake MCP server, and waited on until
+GET /ready answers 200. Then --requests requests are sent with --concurrency in flight, and the
+script reports pages saved per second, p50/p99 request latency and the API process's peak RSS.
+
+Run from the project root, e.g.:
+    python benchmarks/bench_endpoints.py --spaces 2 --pages-per-space 200 --page-kb 20 --latency-ms 50
+    python benchmarks/bench_endpoints.py --endpoints space --set PAGE_OUTPUT_FORMAT='"markdown"' --set RATE_LIMIT_ENABLED=False --json results.json
+
+Endpoints: page (/page/content, one random page per request), page_tree (/page/content with
+recursive=True from a space's root page), space (/space/content, spaces in turn) and all (/all/content).
+--set NAME=VALUE overrides a config value (a Python literal) in the API module before startup.
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+FAKE_SERVER_PATH = os.path.join(project_root, "tests", "fake_mcp_server.py")
+FAKE_SERVER_OPTIONS = ("spaces", "pages_per_space", "fanout", "page_kb", "latency_ms", "latency_jitter_ms", "error_rate", "throttle_rate", "seed")
+ENDPOINTS = ("page", "page_tree", "space", "all")
+PAGE_ID_BASE = 1_000_000 # Same id scheme as tests/fake_mcp_server.py
+
+def _fake_server_args(args: argparse.Namespace) -> List[str]:
+    fake_args = []
+    for option in FAKE_SERVER_OPTIONS:
+        fake_args += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    return fake_args
+
+def _parse_overrides(overrides: List[str]) -> Dict[str, Any]:
+    parsed = {}
+    for override in overrides:
+        name, _, value = override.partition("=")
+        parsed[name.strip()] = ast.literal_eval(value)
+    return parsed
+
+# --- Server subprocess (--serve) ---
+def serve(args: argparse.Namespace) -> None:
+    import uvicorn
+    import services.confluence_mcp_api as api
+
+    api.ATLASSIAN_MCP_SERVER_CONFIG = {"mcpServers": {"atlassian": {"command": sys.executable, "args": [FAKE_SERVER_PATH] + _fake_server_args(args)}}}
+    for name, value in _parse_overrides(args.set).items():
+        if not hasattr(api, name):
+            raise SystemExit(f"Unknown config value for --set: {name}")
+        setattr(api, name, value)
+    uvicorn.run(api.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+# --- Load generation ---
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _peak_rss_mb(pid: int) -> Optional[float]:
+    """The process's peak resident set size (VmHWM), or None where /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered) + 0.5) - 1))]
+
+def _count_saved_pages(value: Any) -> int:
+    """Counts the per-page result dicts with saved=True anywhere in a response body."""
+    if isinstance(value, dict):
+        return int(value.get("saved") is True) + sum(_count_saved_pages(item) for item in value.values())
+    if isinstance(value, list):
+        return sum(_count_saved_pages(item) for item in value)
+    return 0
+
+def _request_bodies(endpoint: str, args: argparse.Namespace, count: int) -> List[Dict[str, Any]]:
+    rng = random.Random(args.seed)
+    bodies = []
+    for n in range(count):
+        space_number = n % args.spaces + 1
+        if endpoint == "page":
+            bodies.append({"page_id": str(rng.randint(1, args.spaces) * PAGE_ID_BASE + rng.randrange(args.pages_per_space))})
+        elif endpoint == "page_tree":
+            bodies.append({"page_id": str(space_number * PAGE_ID_BASE), "recursive": True})
+        elif endpoint == "space":
+            bodies.append({"space_name": f"Space {space_number}"})
+        else:
+            bodies.append({})
+    return bodies
+
+async def _wait_until_ready(client, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode} during startup.")
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API server not ready after {timeout}s.")
+
+async def _run_load(client, endpoint: str, bodies: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    path = {"page": "/page/content", "page_tree": "/page/content", "space": "/space/content", "all": "/all/content"}[endpoint]
+    latencies: List[float] = []
+    outcome = {"errors": 0, "pages_saved": 0}
+    queue: asyncio.Queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+
+    async def worker() -> None:
+        while not queue.empty():
+            body = queue.get_nowait()
+            started_at = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                ok = response.status_code == 200
+                if ok:
+                    outcome["pages_saved"] += _count_saved_pages(response.json())
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started_at)
+            if not ok:
+                outcome["errors"] += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    wall_seconds = time.perf_counter() - started_at
+    return {
+        "requests": len(bodies),
+        "errors": outcome["errors"],
+        "pages_saved": outcome["pages_saved"],
+        "wall_seconds": round(wall_seconds, 3),
+        "pages_per_second": round(outcome["pages_saved"] / wall_seconds, 2) if wall_seconds else None,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1) if latencies else None,
+    }
+
+async def bench_endpoint(endpoint: str, args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix=f"bench_{endpoint}_")
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)] + _fake_server_args(args)
+    for override in args.set:
+        command += ["--set", override]
+    with open(os.path.join(workdir, "server.log"), "w") as server_log:
+        process = subprocess.Popen(command, cwd=workdir, stdout=server_log, stderr=subprocess.STDOUT)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.request_timeout) as client:
+            await _wait_until_ready(client, process, args.startup_timeout)
+            if args.warmup_requests:
+                await _run_load(client, endpoint, _request_bodies(endpoint, args, args.warmup_requests), 1)
+            result = await _run_load(client, endpoint, _request_bodies(endpoint, args, args.requests), args.concurrency)
+        result["peak_rss_mb"] = _peak_rss_mb(process.pid)
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    result.update({"endpoint": endpoint, "workdir": workdir})
+    return result
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {', '.join(ENDPOINTS)}.")
+    parser.add_argument("--requests", type=int, default=20, help="Measured requests per endpoint.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once.")
+    parser.add_argument("--warmup-requests", type=int, default=1, help="Unmeasured requests sent first.")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--request-timeout", type=float, default=600.0)
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Override an API config value, e.g. PAGE_FETCH_CONCURRENCY=16.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    # Fake MCP server settings (see tests/fake_mcp_server.py).
+    parser.add_argument("--spaces", type=int, default=2)
+    parser.add_argument("--pages-per-space", type=int, default=100)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--page-kb", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.serve:
+        serve(args)
+        return
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"Unknown endpoint(s): {', '.join(sorted(unknown))}")
+    results = []
+    for endpoint in endpoints:
+        print(f"Benchmarking {endpoint}...", file=sys.stderr)
+        results.append(asyncio.run(bench_endpoint(endpoint, args)))
+
+    print(f"{args.spaces} spaces x {args.pages_per_space} pages, {args.page_kb} KB bodies, {args.latency_ms}+{args.latency_jitter_ms} ms latency, "
+          f"error rate {args.error_rate}, throttle rate {args.throttle_rate}; {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'endpoint':<10} {'requests':>8} {'errors':>6} {'pages':>7} {'pages/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12}")
+    for result in results:
+        rss = f"{result['peak_rss_mb']:.1f}" if result["peak_rss_mb"] is not None else "n/a"
+        print(f"{result['endpoint']:<10} {result['requests']:>8} {result['errors']:>6} {result['pages_saved']:>7} "
+              f"{result['pages_per_second']:>9} {result['p50_ms']:>9} {result['p99_ms']:>9} {rss:>12}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": {key: value for key, value in vars(args).items() if key not in ("serve", "port", "json")}, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
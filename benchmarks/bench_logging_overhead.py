@@ -0,0 +1,95 @@
+"""
+Microbenchmark of the logging done per crawled page, before and after the hot-path logging
+changes (%-style arguments, DEBUG-only truncated payload dumps, sampled per-page logger).
+
+Run from the project root:
+    python benchmarks/bench_logging_overhead.py [--pages 2000] [--body-kb 50]
+
+Each variant runs the log statements of one page fetch + save (fetch_one, _fetch_and_save_page_content,
+save_content_to_file) against a root logger at INFO writing the text format to os.devnull, and
+reports the time per page.
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from configs.confluence_config import LOG_SAMPLING_RATES
+from utilities.confluence_logging_config import TEXT_LOG_FORMAT, LogSamplingFilter
+from utilities.confluence_log_utils import Truncated
+
+logger = logging.getLogger("services.confluence_mcp_api")
+page_logger = logging.getLogger("services.confluence_mcp_api.pages")
+
+def make_tool_response(page_id: str, body_kb: int) -> dict:
+    return {
+        "id": page_id,
+        "title": f"Page {page_id}",
+        "version": {"number": 7, "when": "2026-01-01T00:00:00Z"},
+        "body": {"storage": {"value": "<p>" + "lorem ipsum " * (body_kb * 1024 // 12) + "</p>", "representation": "storage"}},
+        "_links": {"webui": f"/spaces/S/pages/{page_id}"},
+    }
+
+def log_page_before(page_id: str, tool_response: dict) -> None:
+    """The per-page statements as they were: f-strings at INFO, full response dumped."""
+    server_name, tool_name, space_label = "atlassian", "getConfluencePage", "Space 1"
+    tool_params = {"cloudId": "cloud-1", "pageId": page_id}
+    page_title = tool_response["title"]
+    file_path = f"output_content/spaces_direct_tool/Space_1/page_{page_id}.html"
+    logger.info(f"Fetching full content for page '{page_title}' (ID: {page_id}) in space '{space_label}'")
+    logger.info(f"Fetching content for page ID: {page_id} via executor (server: {server_name}, tool: '{tool_name}', params: {tool_params})")
+    logger.info(f"For page_id {page_id}, PARSED tool_response from {tool_name}: {tool_response}")
+    logger.info(f"For page_id {page_id}, tool_response keys: {list(tool_response.keys())}")
+    logger.debug(f"Page {page_id}: body via 'body.storage', {len(tool_response['body']['storage']['value'])} bytes as html")
+    logger.info(f"Successfully saved cleaned content to {file_path} (written)")
+
+def log_page_after(page_id: str, tool_response: dict) -> None:
+    """The per-page statements as they are now."""
+    server_name, tool_name, space_label = "atlassian", "getConfluencePage", "Space 1"
+    tool_params = {"cloudId": "cloud-1", "pageId": page_id}
+    page_title = tool_response["title"]
+    file_path = f"output_content/spaces_direct_tool/Space_1/page_{page_id}.html"
+    page_logger.info("Fetching full content for page '%s' (ID: %s) in space '%s'", page_title, page_id, space_label)
+    page_logger.info("Fetching content for page ID: %s via executor (server: %s, tool: '%s', params: %s)", page_id, server_name, tool_name, tool_params)
+    if page_logger.isEnabledFor(logging.DEBUG):
+        page_logger.debug("For page_id %s, %s response keys: %s, parsed response: %s", page_id, tool_name, list(tool_response.keys()), Truncated(tool_response))
+    page_logger.debug("Page %s: body via '%s', %d bytes as %s", page_id, "body.storage", len(tool_response["body"]["storage"]["value"]), "html")
+    page_logger.info("Successfully saved cleaned content to %s (%s)", file_path, "written")
+
+def run(variant, pages: int, body_kb: int) -> float:
+    responses = [make_tool_response(str(10000 + n), body_kb) for n in range(pages)]
+    seconds = timeit.timeit(lambda: [variant(response["id"], response) for response in responses], number=1)
+    return seconds / pages * 1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--body-kb", type=int, default=50)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers.clear()
+    devnull = open(os.devnull, "w")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter(TEXT_LOG_FORMAT))
+    root.addHandler(handler)
+
+    results = [("before (f-strings, full response at INFO)", run(log_page_before, args.pages, args.body_kb))]
+    results.append(("after, no sampling", run(log_page_after, args.pages, args.body_kb)))
+    handler.addFilter(LogSamplingFilter(LOG_SAMPLING_RATES))
+    results.append((f"after, sampling {LOG_SAMPLING_RATES}", run(log_page_after, args.pages, args.body_kb)))
+
+    print(f"Per-page logging cost, {args.pages} pages with {args.body_kb} KB bodies, root logger at INFO:")
+    baseline = results[0][1]
+    for label, micros in results:
+        print(f"  {label:<70} {micros:9.1f} us/page  ({baseline / micros:5.1f}x)")
+    devnull.close()
+
+if __name__ == "__main__":
+    main()
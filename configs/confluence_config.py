@@ -23,11 +23,152 @@ ATLASSIAN_MCP_SERVER_CONFIG = {
     }
 }
 
+# Format saved pages are written in: "html" (the page body as returned, with conversational
+# prefixes stripped), "markdown" or "text". File names are the same for every format.
+# Markdown/text conversion runs in CONVERSION_PROCESS_POOL_SIZE worker processes so large pages
+# do not stall the API's event loop (0 converts in a worker thread instead).
+PAGE_OUTPUT_FORMAT = "html"
+CONVERSION_PROCESS_POOL_SIZE = 2
+
+# Content-addressed output store. Saved page content is kept once per distinct content under
+# CONTENT_STORE_DIR, and the files under OUTPUT_DIR are hardlinks to it (copies where the
+# filesystem has no hardlinks). Identical content is never rewritten. Disable to write plain files.
+CONTENT_STORE_ENABLED = True
+CONTENT_STORE_DIR = f"{OUTPUT_DIR}/.content_store"
+# POST /content-store/prune leaves blobs and temp files younger than this alone, so it cannot
+# remove one that a save (possibly in another API worker) is about to link to.
+CONTENT_STORE_PRUNE_GRACE_SECONDS = 600
+
+# Batched file writer. Page saves are queued (at most FILE_WRITER_QUEUE_SIZE waiting) and
+# written by FILE_WRITER_WORKERS writer tasks, up to FILE_WRITER_BATCH_SIZE files per worker-thread
+# hop, each via a temp file and an atomic rename. FILE_WRITER_FSYNC makes writes durable
+# (fsync of files and directories, once per batch; with the content store, of the batch's new
+# blobs and their directories) at some cost in throughput.
+FILE_WRITER_ENABLED = True
+FILE_WRITER_WORKERS = 2
+FILE_WRITER_QUEUE_SIZE = 256
+FILE_WRITER_BATCH_SIZE = 32
+FILE_WRITER_FSYNC = True
+
+# Maximum number of getConfluencePage calls kept in flight at once by the
+# bulk endpoints (/space/content and /all/content).
+PAGE_FETCH_CONCURRENCY = 8
+
+# Page size ('limit') requested from the paginated listing tools (getPagesInConfluenceSpace,
+# getConfluenceSpaces). Every cursor page is followed until the listing is exhausted.
+# Set to None to omit the parameter and use the server's default page size.
+LISTING_PAGE_SIZE = 250
+
+# Flow control for MCP tool calls. All calls share a token bucket (RATE_LIMIT_REQUESTS_PER_SECOND
+# on average, bursts up to RATE_LIMIT_BURST; None disables the bucket) and an adaptive concurrency
+# limit that grows by one per window of successful calls and halves on 429/503, within
+# ADAPTIVE_CONCURRENCY_MIN..ADAPTIVE_CONCURRENCY_MAX. A Retry-After from upstream pauses all calls.
+# Throttled and transient failures are retried up to TOOL_CALL_MAX_ATTEMPTS attempts in total,
+# with jittered exponential backoff, or after Retry-After (capped at TOOL_CALL_RETRY_AFTER_MAX_SECONDS).
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_REQUESTS_PER_SECOND = 10
+RATE_LIMIT_BURST = 20
+ADAPTIVE_CONCURRENCY_INITIAL = 8
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 32
+TOOL_CALL_MAX_ATTEMPTS = 4
+TOOL_CALL_RETRY_BASE_DELAY_SECONDS = 0.5
+TOOL_CALL_RETRY_MAX_DELAY_SECONDS = 30
+TOOL_CALL_RETRY_AFTER_MAX_SECONDS = 120
+
+# Circuit breaker on MCP tool calls. After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive
+# connectivity/auth failures (bridge down, session dead, token expired) tool calls and content
+# requests fail immediately with 503 for CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS. Then one probe
+# call is let through; it closes the circuit if it succeeds and reopens it if it fails.
+# A tool call attempt with no answer after TOOL_CALL_TIMEOUT_SECONDS is abandoned and counts as a
+# failure, so a hung bridge trips the breaker too (None waits forever).
+CIRCUIT_BREAKER_ENABLED = True
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS = 30
+TOOL_CALL_TIMEOUT_SECONDS = 120
+
+# Request coalescing. While a tool call is in flight, identical calls (same tool and parameters)
+# wait for it and share its result instead of calling the bridge again, e.g. when many clients ask
+# for the same page at once or two crawls of one space overlap. Saves of the same content to the
+# same file are coalesced the same way. Nothing is cached after the call completes.
+REQUEST_COALESCING_ENABLED = True
+
+# Request tracing. Each API request and background job is recorded as a tree of spans (cloud ID
+# lookup, space/page listing, page fetches, file saves, tool calls). The TRACE_BUFFER_SIZE most
+# recent traces are kept in memory for GET /debug/traces; traces with more than
+# TRACE_MAX_SPANS_PER_TRACE spans keep the first ones and count the rest as dropped.
+# Finished traces can also be appended to a JSON-lines file (TRACE_EXPORT_JSON_PATH) and/or
+# POSTed as OTLP/JSON to a collector (TRACE_EXPORT_OTLP_ENDPOINT, e.g. http://localhost:4318/v1/traces).
+TRACING_ENABLED = True
+TRACE_BUFFER_SIZE = 200
+TRACE_MAX_SPANS_PER_TRACE = 2000
+TRACE_EXPORT_JSON_PATH = None
+TRACE_EXPORT_OTLP_ENDPOINT = None
+
+# Time-to-live (seconds) for the caches of the Atlassian cloud ID and the Confluence space
+# directory. With several API workers they are also shared through SHARED_STATE_PATH.
+# POST /cache/invalidate clears both immediately, in every worker.
+CLOUD_ID_CACHE_TTL_SECONDS = 3600
+SPACE_DIRECTORY_CACHE_TTL_SECONDS = 900
+
+# Warm start. If a local mcp-remote binary is found (MCP_REMOTE_BINARY_PATH, then
+# ./node_modules/.bin/mcp-remote, then PATH) it is run directly instead of `npx -y mcp-remote`,
+# so startup does not resolve the package again. Install a pinned version with e.g.
+# `npm install --save-exact mcp-remote@<version>` in the project root.
+# With MCP_WARM_START the sessions are connected, and the tool list and Cloud ID fetched,
+# right after startup; GET /ready returns 200 only once that has finished.
+MCP_REMOTE_BINARY_PATH = None
+MCP_WARM_START = True
+MCP_WARM_START_TIMEOUT_SECONDS = 180
+
+# MCP session pool. Each session is a separate MCPClient with its own `npx mcp-remote` process;
+# tool calls go to the least busy healthy session. Sessions that keep failing with transport
+# errors, or that stop answering the periodic ping, are closed and replaced.
+MCP_SESSION_POOL_SIZE = 2
+MCP_SESSION_MAX_CONSECUTIVE_FAILURES = 2
+MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS = 60 # 0 disables the periodic health check
+
+# Background crawl jobs (POST /jobs). Jobs and their completed-page checkpoints are kept in
+# a local SQLite database so an interrupted job resumes instead of refetching everything.
+JOB_STORE_PATH = "state/confluence_jobs.sqlite3"
+JOB_WORKER_COUNT = 1
+JOB_CHECKPOINT_BATCH_SIZE = 50 # Saved page ids are checkpointed in batches of this size
+
 # API Server Configuration
 API_HOST = "localhost"
 API_PORT = 8000
 
+# Multi-worker deployment. run_confluence_service.py starts API_WORKERS uvicorn worker processes.
+# Each worker has its own MCP session pool, rate limiter (RATE_LIMIT_REQUESTS_PER_SECOND is split
+# evenly between the workers) and job workers. The workers share the cloud ID / space directory
+# cache and per-space crawl leases through a local SQLite database, so two workers never crawl the
+# same space at once: a lease is held while a space is crawled and renewed every third of
+# SPACE_LEASE_TTL_SECONDS; a crashed worker's leases lapse after that TTL.
+# /space/content answers 409 for a space another worker is crawling; /all/content crawls such
+# spaces last, waiting up to SPACE_LEASE_WAIT_SECONDS for each. Jobs are split by space, and every
+# worker checks the job store each JOB_POLL_INTERVAL_SECONDS for job spaces it can take over.
+API_WORKERS = 1
+SHARED_STATE_PATH = "state/confluence_shared.sqlite3"
+SPACE_LEASE_TTL_SECONDS = 60
+SPACE_LEASE_WAIT_SECONDS = 600
+JOB_POLL_INTERVAL_SECONDS = 5
+
 # Logging Configuration
 LOG_LEVEL = "INFO"  # Recommended levels: DEBUG, INFO, WARNING, ERROR, CRITICAL
 LOG_OUTPUT_DIR = "logs"
-LOG_FILE_NAME = "confluence_mcp_app.log" 
\ No newline at end of file
+LOG_FILE_NAME = "confluence_mcp_app.log"
+# Longest rendering of a payload (tool response, parameters) in a log message; see utilities/confluence_log_utils.py.
+LOG_PAYLOAD_MAX_CHARS = 2000
+LOG_FORMAT = "text" # "text", or "json" for one JSON object per line (with trace ids and `extra=` fields)
+# Log files roll over at LOG_FILE_MAX_BYTES, keeping LOG_FILE_BACKUP_COUNT old files (0 bytes = never roll over).
+# With API_WORKERS > 1 each process writes its own file, LOG_FILE_NAME with its pid added.
+LOG_FILE_MAX_BYTES = 50 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+# Queued logging: loggers only put records on a queue of LOG_QUEUE_SIZE records and a background
+# thread formats and writes them, so logging does no disk or console I/O on the event loop.
+# Records are dropped (not waited for) if the queue is full.
+LOG_QUEUE_ENABLED = True
+LOG_QUEUE_SIZE = 10000
+# Fraction of DEBUG/INFO records kept per logger (and its children); warnings and errors are always kept.
+# "services.confluence_mcp_api.pages" carries the per-page messages of the crawls.
+LOG_SAMPLING_RATES = {"services.confluence_mcp_api.pages": 0.1} 
\ No newline at end of file
@@ -14,7 +14,7 @@ if project_root not in sys.path:
 # Now that sys.path is adjusted, we can import our modules
 try:
     from services.confluence_mcp_api import app
-    from configs.confluence_config import API_HOST, API_PORT
+    from configs.confluence_config import API_HOST, API_PORT, API_WORKERS
     from utilities.confluence_logging_config import setup_app_logging
 except ImportError as e:
     print(f"Error importing necessary modules. Ensure your PYTHONPATH is set up correctly or run this script from the project root. Error: {e}", file=sys.stderr)
@@ -27,7 +27,7 @@ if __name__ == "__main__":
     # Initialize logging as the first step
     setup_app_logging() 
 
-    logger.info(f"Starting Confluence MCP API service on http://{API_HOST}:{API_PORT}")
+    logger.info(f"Starting Confluence MCP API service on http://{API_HOST}:{API_PORT} with {API_WORKERS} worker(s)")
     logger.info("Logging is configured. Check console and log file in the configured log directory.")
     
     # More Uvicorn options can be configured here if needed,
@@ -38,4 +38,9 @@ if __name__ == "__main__":
     # adequately covers console logging. For now, we'll let Uvicorn use its defaults
     # which might lead to some overlap on console but ensures Uvicorn's own operational logs appear.
     
-    uvicorn.run(app, host=API_HOST, port=API_PORT) 
\ No newline at end of file
+    if API_WORKERS > 1:
+        # uvicorn needs an import string to start worker processes. Each worker imports the app
+        # and runs its lifespan: its own MCP sessions, rate limiter share and job workers.
+        uvicorn.run("services.confluence_mcp_api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
+    else:
+        uvicorn.run(app, host=API_HOST, port=API_PORT) 
\ No newline at end of file
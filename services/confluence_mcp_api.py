@@ -7,9 +7,16 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 import asyncio
+import hashlib
 import json
-import re # Import regular expressions for stripping prefixes
-from typing import Dict, Any, Optional, List # Added List
+import socket
+import time
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional, List, AsyncIterator, Set, Tuple, Literal, Union
+from urllib.parse import urlparse, parse_qs
 import aiofiles # For async file operations
 import aiofiles.os as aios # For async os operations like makedirs
 import logging # Standard logging
@@ -18,148 +25,438 @@ import logging # Standard logging
 from utilities.confluence_logging_config import setup_app_logging
 
 # from dotenv import load_dotenv # No longer needed if OpenAI keys are not handled here
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response # Added for favicon dummy handler
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 import uvicorn
 
 # MCPClient and MCPSession are key
 from mcp_use import MCPClient, MCPSession
-# Attempt to import ServerManager, assuming its location
-try:
-    from mcp_use.managers import ServerManager
-except ImportError:
-    try:
-        from mcp_use.managers.server_manager import ServerManager
-    except ImportError:
-        ServerManager = None # Placeholder if import fails
-        logging.getLogger(__name__).error("Failed to import ServerManager. Check mcp_use.managers path.")
-from mcp_use.managers.tools.use_tool import UseToolFromServerTool # Corrected import path
-from configs.confluence_config import OUTPUT_DIR, API_HOST, API_PORT, ATLASSIAN_MCP_SERVER_CONFIG
+from configs.confluence_config import (
+    OUTPUT_DIR, API_HOST, API_PORT, ATLASSIAN_MCP_SERVER_CONFIG, PAGE_FETCH_CONCURRENCY, LISTING_PAGE_SIZE,
+    CLOUD_ID_CACHE_TTL_SECONDS, SPACE_DIRECTORY_CACHE_TTL_SECONDS,
+    JOB_STORE_PATH, JOB_WORKER_COUNT, JOB_CHECKPOINT_BATCH_SIZE, JOB_POLL_INTERVAL_SECONDS,
+    API_WORKERS, SHARED_STATE_PATH, SPACE_LEASE_TTL_SECONDS, SPACE_LEASE_WAIT_SECONDS,
+    MCP_SESSION_POOL_SIZE, MCP_SESSION_MAX_CONSECUTIVE_FAILURES, MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS,
+    MCP_REMOTE_BINARY_PATH, MCP_WARM_START, MCP_WARM_START_TIMEOUT_SECONDS,
+    CONTENT_STORE_ENABLED, CONTENT_STORE_DIR, CONTENT_STORE_PRUNE_GRACE_SECONDS, PAGE_OUTPUT_FORMAT, CONVERSION_PROCESS_POOL_SIZE,
+    RATE_LIMIT_ENABLED, RATE_LIMIT_REQUESTS_PER_SECOND, RATE_LIMIT_BURST,
+    ADAPTIVE_CONCURRENCY_INITIAL, ADAPTIVE_CONCURRENCY_MIN, ADAPTIVE_CONCURRENCY_MAX,
+    TOOL_CALL_MAX_ATTEMPTS, TOOL_CALL_RETRY_BASE_DELAY_SECONDS, TOOL_CALL_RETRY_MAX_DELAY_SECONDS, TOOL_CALL_RETRY_AFTER_MAX_SECONDS,
+    CIRCUIT_BREAKER_ENABLED, CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS, TOOL_CALL_TIMEOUT_SECONDS, REQUEST_COALESCING_ENABLED,
+    TRACING_ENABLED, TRACE_BUFFER_SIZE, TRACE_MAX_SPANS_PER_TRACE, TRACE_EXPORT_JSON_PATH, TRACE_EXPORT_OTLP_ENDPOINT,
+    FILE_WRITER_ENABLED, FILE_WRITER_WORKERS, FILE_WRITER_QUEUE_SIZE, FILE_WRITER_BATCH_SIZE, FILE_WRITER_FSYNC
+)
+from utilities.confluence_cache import ConfluenceDirectoryCache
+from utilities.confluence_session_pool import MCPSessionPool, PooledSession
+from utilities.confluence_tool_client import MCPToolError
+from utilities.confluence_rate_limiter import AdaptiveRateLimiter, call_with_retries, classify_tool_error, ERROR_CLASS_THROTTLED
+from utilities.confluence_metrics import MetricsRegistry, CollectedMetric
+from utilities.confluence_circuit_breaker import CircuitBreaker, CircuitOpenError
+from utilities.confluence_log_utils import Truncated
+from utilities.confluence_tracing import Tracer, JsonFileTraceExporter, OTLPHttpTraceExporter, build_span_tree
+from utilities.confluence_session_pool import is_transport_error
+from utilities.confluence_blob_store import ContentBlobStore, SAVE_UNCHANGED
+from utilities.confluence_file_writer import BatchedFileWriter
+from utilities.confluence_export_archive import ExportArchiveWriter, is_export_format_available
+from utilities.confluence_content_normalizer import extract_page_body, normalize_page_body, strip_known_prefixes
+from utilities.confluence_mcp_launcher import find_local_mcp_remote, resolve_mcp_server_config
+from utilities.confluence_job_store import JobStore, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_FAILED, JOB_SPACE_STATUS_PENDING
+from utilities.confluence_shared_state import SharedStateStore, WorkerLeases
+from utilities.confluence_single_flight import SingleFlight
+from utilities.confluence_sync_manifest import SpaceSyncManifest, get_summary_version, get_summary_last_modified
+from utilities.confluence_mcp_api_tools import DateWindow, parse_date_window, is_page_in_date_window
 # DEFAULT_OPENAI_MODEL is no longer needed from configs.confluence_config
 
-# Import the concrete LangChainAdapter
-AdapterClass = None # Placeholder for the specific adapter class
-try:
-    from mcp_use.adapters.langchain_adapter import LangChainAdapter
-    AdapterClass = LangChainAdapter
-except ImportError as e_adapter_import:
-    logger.error(f"Failed to import LangChainAdapter from mcp_use.adapters.langchain_adapter: {e_adapter_import}. Ensure this is the correct path.")
-    # Fallback attempts removed as we now have the specific adapter path
-
 # Get a logger for this module
 logger = logging.getLogger(__name__)
+# Per-page messages of the crawls (high volume). A fixed name, so LOG_SAMPLING_RATES applies however the module is run.
+page_logger = logging.getLogger("services.confluence_mcp_api.pages")
 
 # --- Global placeholders for application components ---
-mcp_client_instance_api: Optional[MCPClient] = None
-adapter_instance_api: Optional[LangChainAdapter] = None # Typed for clarity
-server_manager_instance_api: Optional[ServerManager] = None # Typed for clarity
-use_tool_executor_instance: Optional[UseToolFromServerTool] = None
+# Pool of MCP sessions. Tool calls go through its call_tool() (see _call_tool).
+use_tool_executor_instance: Optional[MCPSessionPool] = None
+job_store: Optional[JobStore] = None
+job_queue: Optional[asyncio.Queue] = None
+job_worker_tasks: List[asyncio.Task] = []
+# Ids of the jobs queued or running in this worker process (see _enqueue_job).
+local_job_ids: Set[str] = set()
+# Identifies this worker process in the shared state store (set at startup).
+worker_id: str = ""
+# State shared with the other API workers: directory cache entries and per-space crawl leases.
+shared_state: Optional[SharedStateStore] = None
+worker_leases: Optional[WorkerLeases] = None
+# Server config actually used to launch the bridge (npx replaced by a local mcp-remote when one is found).
+mcp_server_config: Dict[str, Any] = ATLASSIAN_MCP_SERVER_CONFIG
+warm_up_task: Optional[asyncio.Task] = None
+content_store: Optional[ContentBlobStore] = None
+file_writer: Optional[BatchedFileWriter] = None
+# Worker processes for HTML -> markdown/text conversion (only when PAGE_OUTPUT_FORMAT is not "html").
+conversion_executor: Optional[ProcessPoolExecutor] = None
+# Shared token bucket + adaptive concurrency limit in front of every tool call (see _call_tool).
+rate_limiter: Optional[AdaptiveRateLimiter] = None
+# Fails tool calls fast while the MCP bridge is down or its auth has expired (see _call_tool_once).
+circuit_breaker: Optional[CircuitBreaker] = CircuitBreaker(
+    name="MCP bridge",
+    failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout_seconds=CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS
+) if CIRCUIT_BREAKER_ENABLED else None
+# Identical concurrent tool calls and file saves share one in-flight call (REQUEST_COALESCING_ENABLED).
+tool_call_flights = SingleFlight("tool_call")
+file_save_flights = SingleFlight("file_save")
+readiness_state: Dict[str, Any] = {"ready": False, "stage": "starting", "error": None}
+directory_cache = ConfluenceDirectoryCache(
+    cloud_id_ttl_seconds=CLOUD_ID_CACHE_TTL_SECONDS,
+    spaces_ttl_seconds=SPACE_DIRECTORY_CACHE_TTL_SECONDS
+)
+
+# --- Metrics (exposed by GET /metrics) ---
+metrics = MetricsRegistry()
+tool_call_duration = metrics.histogram("confluence_mcp_tool_call_duration_seconds", "Duration of MCP tool call attempts.", ["tool", "outcome"])
+tool_calls_in_flight = metrics.gauge("confluence_mcp_tool_calls_in_flight", "MCP tool calls currently waiting for the bridge.", ["tool"])
+file_save_duration = metrics.histogram("confluence_file_save_duration_seconds", "Duration of saving one page to disk.", ["outcome"])
+bytes_saved_total = metrics.counter("confluence_bytes_saved_total", "Bytes of page content written to disk (unchanged files excluded).", ["target"])
+http_request_duration = metrics.histogram("confluence_http_request_duration_seconds", "Duration of API requests (until the response starts, for streams).", ["method", "route", "status"])
+http_requests_in_flight = metrics.gauge("confluence_http_requests_in_flight", "API requests currently being handled.")
+errors_total = metrics.counter("confluence_errors_total", "Errors by component and class.", ["component", "error_class"])
+
+def _collect_component_metrics() -> List[CollectedMetric]:
+    """Scrape-time samples from components that keep their own counters."""
+    collected: List[CollectedMetric] = []
+    lookups = directory_cache.hits + directory_cache.misses
+    collected.append(("confluence_directory_cache_lookups_total", "counter", "Cloud ID and space directory cache lookups.",
+                      [({"result": "hit"}, directory_cache.hits), ({"result": "miss"}, directory_cache.misses)]))
+    collected.append(("confluence_directory_cache_hit_ratio", "gauge", "Share of directory cache lookups served from the cache.",
+                      [({}, directory_cache.hits / lookups if lookups else 0)]))
+    if isinstance(use_tool_executor_instance, MCPSessionPool):
+        members = use_tool_executor_instance.stats()["members"]
+        collected.append(("confluence_mcp_sessions", "gauge", "MCP session pool members by health.",
+                          [({"healthy": "true"}, sum(1 for m in members if m["healthy"])), ({"healthy": "false"}, sum(1 for m in members if not m["healthy"]))]))
+        collected.append(("confluence_mcp_session_in_flight", "gauge", "Tool calls in flight per pool member.",
+                          [({"member": str(m["member_id"])}, m["in_flight"]) for m in members]))
+    if rate_limiter:
+        limiter_state = rate_limiter.describe()
+        collected.append(("confluence_rate_limiter_concurrency_limit", "gauge", "Current adaptive limit on tool calls in flight.", [({}, limiter_state["concurrency_limit"])]))
+        collected.append(("confluence_rate_limiter_throttled_total", "counter", "Tool calls answered with 429/503.", [({}, limiter_state["throttled"])]))
+    if circuit_breaker:
+        breaker_state = circuit_breaker.describe()
+        collected.append(("confluence_circuit_breaker_open", "gauge", "1 while the MCP circuit breaker is not closed.", [({"state": breaker_state["state"]}, 0 if breaker_state["state"] == "closed" else 1)]))
+        collected.append(("confluence_circuit_breaker_rejected_total", "counter", "Tool calls rejected by the open circuit breaker.", [({}, breaker_state["rejected"])]))
+    if content_store:
+        collected.append(("confluence_content_store_operations_total", "counter", "Content store blob and view operations.",
+                          [({"operation": key}, value) for key, value in content_store.stats.items()]))
+    collected.append(("confluence_coalesced_calls_total", "counter", "Tool calls and file saves that joined an identical one already in flight.",
+                      [({"kind": flights.name}, flights.stats["coalesced"]) for flights in (tool_call_flights, file_save_flights)]))
+    if file_writer:
+        collected.append(("confluence_file_writer_operations_total", "counter", "Batched file writer counters.",
+                          [({"operation": key}, value) for key, value in file_writer.stats.items()]))
+    return collected
+
+metrics.register_collector(_collect_component_metrics)
+
+# --- Tracing (GET /debug/traces, optional JSON file / OTLP export) ---
+tracer = Tracer(enabled=TRACING_ENABLED, buffer_size=TRACE_BUFFER_SIZE, max_spans_per_trace=TRACE_MAX_SPANS_PER_TRACE)
+# Requests that are not worth a trace of their own.
+UNTRACED_PATHS = {"/metrics", "/ready", "/debug/traces", "/favicon.ico"}
+
+async def _create_mcp_client() -> MCPClient:
+    """
+    Builds one MCPClient from mcp_server_config. Used as the member factory of the MCP session pool;
+    every member gets its own client and bridge process.
+    """
+    client = MCPClient.from_dict(mcp_server_config)
+    if not client:
+        raise RuntimeError("Failed to initialize MCPClient.")
+    return client
+
+async def _warm_up_pool_member(member: PooledSession) -> None:
+    """Connects and initializes a pool member's session (which also lists its tools) so the first tool call does not pay for it."""
+    server_name = list(mcp_server_config["mcpServers"].keys())[0]
+    try:
+        session = member.client.get_session(server_name)
+    except ValueError:
+        session = await member.client.create_session(server_name)
+    tools = session.connector.tools
+    logger.info(f"MCP session pool member {member.member_id} connected with {len(tools)} tools.")
+
+async def _warm_up() -> None:
+    """
+    Background warm-up started from lifespan: connects every pool session, prefetches the tool list
+    and the Cloud ID, then marks the service ready (see GET /ready).
+    """
+    global readiness_state
+    started_at = asyncio.get_running_loop().time()
+    try:
+        readiness_state = {"ready": False, "stage": "connecting_sessions", "error": None}
+        warmed_members = await asyncio.wait_for(use_tool_executor_instance.warm_up(), timeout=MCP_WARM_START_TIMEOUT_SECONDS)
+        if not warmed_members:
+            raise RuntimeError("No MCP session could be connected.")
+
+        readiness_state = {"ready": False, "stage": "prefetching_cloud_id", "error": None}
+        cloud_id = await asyncio.wait_for(_get_cloud_id(), timeout=MCP_WARM_START_TIMEOUT_SECONDS)
+        if not cloud_id:
+            raise RuntimeError("Failed to retrieve Cloud ID during warm-up.")
+
+        elapsed = asyncio.get_running_loop().time() - started_at
+        readiness_state = {"ready": True, "stage": "ready", "error": None, "warm_up_seconds": round(elapsed, 2), "sessions_connected": warmed_members}
+        logger.info(f"Warm-up finished in {elapsed:.2f}s: {warmed_members} session(s) connected, Cloud ID {cloud_id} cached.")
+    except asyncio.TimeoutError:
+        readiness_state = {"ready": False, "stage": "failed", "error": f"Warm-up timed out after {MCP_WARM_START_TIMEOUT_SECONDS}s."}
+        logger.error(readiness_state["error"])
+    except Exception as e:
+        readiness_state = {"ready": False, "stage": "failed", "error": str(e)}
+        logger.error(f"Warm-up failed: {e}", exc_info=True)
 
 # --- FastAPI Lifespan Management ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global mcp_client_instance_api, adapter_instance_api, server_manager_instance_api, use_tool_executor_instance
+    global use_tool_executor_instance, mcp_server_config, warm_up_task, readiness_state, content_store, file_writer
+    global conversion_executor, rate_limiter, job_store, job_queue, job_worker_tasks, worker_id, shared_state, worker_leases
     
     setup_app_logging()
-    logger.info("FastAPI app starting up...")
+    # The random suffix keeps a restarted worker that reuses a pid from inheriting its predecessor's leases.
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    logger.info(f"FastAPI app starting up (worker {worker_id}, {API_WORKERS} worker(s))...")
+    if API_WORKERS > 1:
+        # Each scrape is answered by whichever worker gets the connection; label its series.
+        metrics.set_constant_labels(worker=worker_id)
 
     try:
-        logger.info("Initializing MCPClient for API...")
-        mcp_client_instance_api = MCPClient.from_dict(ATLASSIAN_MCP_SERVER_CONFIG)
-        if mcp_client_instance_api:
-            logger.info("MCPClient initialized.")
-            
-            if AdapterClass: # Check if LangChainAdapter class was successfully imported
-                try:
-                    logger.info(f"Initializing {AdapterClass.__name__}...")
-                    adapter_instance_api = AdapterClass() # LangChainAdapter()
-                    logger.info(f"{AdapterClass.__name__} initialized.")
-                    
-                    if ServerManager:
-                        try:
-                            logger.info("Initializing ServerManager with client and adapter...")
-                            server_manager_instance_api = ServerManager(client=mcp_client_instance_api, adapter=adapter_instance_api)
-                            logger.info("ServerManager initialized.")
-                            
-                            try:
-                                logger.info("Initializing UseToolFromServerTool with ServerManager...")
-                                use_tool_executor_instance = UseToolFromServerTool(server_manager=server_manager_instance_api)
-                                logger.info("UseToolFromServerTool initialized and ready for API.")
-                            except Exception as e_tool_init:
-                                logger.error(f"ERROR: Failed to initialize UseToolFromServerTool: {e_tool_init}", exc_info=True)
-                                use_tool_executor_instance = None
-                        except Exception as e_sm_init:
-                            logger.error(f"ERROR: Failed to initialize ServerManager: {e_sm_init}", exc_info=True)
-                            server_manager_instance_api = None
-                            use_tool_executor_instance = None
-                    else:
-                        logger.error("ServerManager class not imported. Cannot initialize UseToolFromServerTool correctly.")
-                        use_tool_executor_instance = None
-                except Exception as e_adapter_init:
-                    logger.error(f"ERROR: Failed to initialize {AdapterClass.__name__ if AdapterClass else 'Adapter'}: {e_adapter_init}", exc_info=True)
-                    adapter_instance_api = None
-                    server_manager_instance_api = None
-                    use_tool_executor_instance = None
-            else:
-                logger.error("LangChainAdapter class not imported. Cannot initialize ServerManager or UseToolFromServerTool.")
-                server_manager_instance_api = None
-                use_tool_executor_instance = None
-        else:
-            logger.error("ERROR: Failed to initialize MCPClient. API will not function correctly.")
-            adapter_instance_api = None
-            server_manager_instance_api = None
-            use_tool_executor_instance = None
+        shared_state = SharedStateStore(SHARED_STATE_PATH)
+        worker_leases = WorkerLeases(shared_state, worker_id, SPACE_LEASE_TTL_SECONDS)
+        worker_leases.start()
+        if API_WORKERS > 1:
+            directory_cache.attach_shared_store(shared_state)
+    except Exception as e_shared:
+        logger.error(f"ERROR: Failed to open shared state store, space crawls are not coordinated between workers: {e_shared}", exc_info=True)
+        shared_state = None
+        worker_leases = None
+
+    if TRACING_ENABLED:
+        try:
+            if TRACE_EXPORT_JSON_PATH:
+                tracer.exporters.append(JsonFileTraceExporter(TRACE_EXPORT_JSON_PATH))
+            if TRACE_EXPORT_OTLP_ENDPOINT:
+                tracer.exporters.append(OTLPHttpTraceExporter(TRACE_EXPORT_OTLP_ENDPOINT))
+        except Exception as e_trace:
+            logger.error(f"ERROR: Failed to set up trace export, traces are kept in memory only: {e_trace}", exc_info=True)
+
+    if RATE_LIMIT_ENABLED:
+        # The budget is for the whole deployment; each worker process gets an equal share.
+        worker_count = max(1, API_WORKERS)
+        rate_limiter = AdaptiveRateLimiter(
+            rate_per_second=RATE_LIMIT_REQUESTS_PER_SECOND / worker_count,
+            burst=max(1, RATE_LIMIT_BURST // worker_count),
+            initial_concurrency=ADAPTIVE_CONCURRENCY_INITIAL,
+            min_concurrency=ADAPTIVE_CONCURRENCY_MIN,
+            max_concurrency=ADAPTIVE_CONCURRENCY_MAX
+        )
 
+    try:
+        mcp_remote_binary = find_local_mcp_remote(MCP_REMOTE_BINARY_PATH, project_root)
+        if mcp_remote_binary:
+            mcp_server_config = resolve_mcp_server_config(ATLASSIAN_MCP_SERVER_CONFIG, mcp_remote_binary)
+        else:
+            logger.warning("No local mcp-remote binary found; the MCP bridge will be started through npx (slower cold start).")
+            mcp_server_config = ATLASSIAN_MCP_SERVER_CONFIG
+
+        server_name_for_pool = None
+        if ATLASSIAN_MCP_SERVER_CONFIG.get("mcpServers"):
+            server_name_for_pool = list(ATLASSIAN_MCP_SERVER_CONFIG["mcpServers"].keys())[0]
+        if not server_name_for_pool:
+            logger.error("ERROR: No MCP server defined in ATLASSIAN_MCP_SERVER_CONFIG. API will not function correctly.")
+        else:
+            logger.info(f"Initializing MCP session pool with {MCP_SESSION_POOL_SIZE} session(s) to '{server_name_for_pool}'...")
+            pool = MCPSessionPool(
+                member_factory=_create_mcp_client,
+                server_name=server_name_for_pool,
+                size=MCP_SESSION_POOL_SIZE,
+                max_consecutive_failures=MCP_SESSION_MAX_CONSECUTIVE_FAILURES,
+                health_check_interval_seconds=MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS,
+                member_warmup=_warm_up_pool_member
+            )
+            await pool.start()
+            use_tool_executor_instance = pool
+            logger.info("MCP session pool initialized.")
+            if MCP_WARM_START:
+                warm_up_task = asyncio.create_task(_warm_up())
+            else:
+                readiness_state = {"ready": True, "stage": "ready", "error": None}
     except Exception as e:
         logger.critical(f"CRITICAL ERROR during API startup: {e}", exc_info=True)
-        mcp_client_instance_api = None
-        adapter_instance_api = None
-        server_manager_instance_api = None
         use_tool_executor_instance = None
+        readiness_state = {"ready": False, "stage": "failed", "error": str(e)}
+
+    if CONTENT_STORE_ENABLED:
+        try:
+            content_store = ContentBlobStore(CONTENT_STORE_DIR, fsync=FILE_WRITER_FSYNC)
+            logger.info(f"Content-addressed store enabled at {CONTENT_STORE_DIR}.")
+        except Exception as e_store:
+            logger.error(f"ERROR: Failed to initialize content store, falling back to plain file writes: {e_store}", exc_info=True)
+            content_store = None
+
+    if FILE_WRITER_ENABLED:
+        try:
+            file_writer = BatchedFileWriter(
+                worker_count=FILE_WRITER_WORKERS,
+                queue_size=FILE_WRITER_QUEUE_SIZE,
+                batch_size=FILE_WRITER_BATCH_SIZE,
+                fsync=FILE_WRITER_FSYNC,
+                content_store=content_store
+            )
+            await file_writer.start()
+        except Exception as e_writer:
+            logger.error(f"ERROR: Failed to start file writer, falling back to direct writes: {e_writer}", exc_info=True)
+            file_writer = None
+
+    if PAGE_OUTPUT_FORMAT != "html" and CONVERSION_PROCESS_POOL_SIZE > 0:
+        conversion_executor = _create_conversion_executor()
+
+    try:
+        logger.info(f"Initializing job store at {JOB_STORE_PATH}...")
+        job_store = JobStore(JOB_STORE_PATH)
+        job_queue = asyncio.Queue()
+        if use_tool_executor_instance:
+            resumable_job_ids = await asyncio.to_thread(job_store.list_resumable_job_ids)
+            for job_id in resumable_job_ids:
+                _enqueue_job(job_id)
+            if resumable_job_ids:
+                logger.info(f"Re-queued {len(resumable_job_ids)} unfinished job(s) from the job store.")
+            job_worker_tasks = [asyncio.create_task(_job_worker(n)) for n in range(max(1, JOB_WORKER_COUNT))]
+            job_worker_tasks.append(asyncio.create_task(_job_poller()))
+        else:
+            logger.warning("Tool executor not initialized; job workers not started. Queued jobs will run after a successful restart.")
+    except Exception as e_jobs:
+        logger.error(f"ERROR: Failed to initialize job subsystem: {e_jobs}", exc_info=True)
+        job_store = None
+        job_queue = None
 
     yield
 
     logger.info("FastAPI app shutting down...")
-    if mcp_client_instance_api:
-        logger.info("Closing all MCP sessions via API's client instance...")
+    if warm_up_task and not warm_up_task.done():
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+    if job_worker_tasks:
+        logger.info("Stopping job workers; running jobs will resume from their checkpoints on next startup...")
+        for task in job_worker_tasks:
+            task.cancel()
+        await asyncio.gather(*job_worker_tasks, return_exceptions=True)
+        job_worker_tasks = []
+    if file_writer:
+        logger.info("Flushing pending file writes...")
+        await file_writer.close()
+        file_writer = None
+    if conversion_executor:
+        conversion_executor.shutdown(wait=False, cancel_futures=True)
+        conversion_executor = None
+    if job_store:
+        job_store.close()
+    if worker_leases:
+        await worker_leases.close()
+    if shared_state:
+        directory_cache.attach_shared_store(None)
+        shared_state.close()
+    tracer.shutdown()
+    if isinstance(use_tool_executor_instance, MCPSessionPool):
+        logger.info("Closing all MCP sessions in the session pool...")
         try:
-            if hasattr(mcp_client_instance_api, 'close_all_sessions') and asyncio.iscoroutinefunction(mcp_client_instance_api.close_all_sessions):
-                await mcp_client_instance_api.close_all_sessions()
-            elif hasattr(mcp_client_instance_api, 'close_all_sessions'):
-                 logger.warning("MCPClient.close_all_sessions is not an async function, calling synchronously.")
-                 mcp_client_instance_api.close_all_sessions() 
-            logger.info("MCP sessions closed via API.")
+            await use_tool_executor_instance.close()
         except Exception as e_close:
             logger.error(f"Error closing MCP sessions during API shutdown: {e_close}", exc_info=True)
     else:
-        logger.info("No active MCP client instance to close.")
+        logger.info("No active MCP session pool to close.")
 
 
 app = FastAPI(lifespan=lifespan, title="Confluence Content MCP API")
 
+async def _iter_traced_body(body_iterator: AsyncIterator[bytes], request_span: Any) -> AsyncIterator[bytes]:
+    """Passes the response body through and ends the request's span once it has been sent."""
+    body_error: Optional[BaseException] = None
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    except Exception as e:
+        body_error = e
+        raise
+    finally:
+        tracer.end_span(request_span, error=body_error)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started_at = time.perf_counter()
+    status = "500"
+    http_requests_in_flight.inc()
+    # Root span of the request's trace. The endpoint (and a streamed body) runs in a copy of this
+    # context, so its spans nest below it; the span ends once the whole body has been sent.
+    request_span = None if request.url.path in UNTRACED_PATHS else tracer.start_span(f"{request.method} {request.url.path}", parent=None)
+    request_error: Optional[BaseException] = None
+    response = None
+    try:
+        with tracer.activate(request_span):
+            response = await call_next(request)
+        status = str(response.status_code)
+        if status.startswith("5"):
+            errors_total.inc(component="endpoint", error_class=f"http_{status}")
+        return response
+    except Exception as e:
+        request_error = e
+        errors_total.inc(component="endpoint", error_class=type(e).__name__)
+        raise
+    finally:
+        http_requests_in_flight.dec()
+        # The route template (e.g. /jobs/{job_id}) keeps the label set small.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_request_duration.observe(time.perf_counter() - started_at, method=request.method, route=route, status=status)
+        if request_span is not None:
+            request_span.set_attributes(route=route, status=int(status))
+            if response is not None:
+                response.body_iterator = _iter_traced_body(response.body_iterator, request_span)
+            else:
+                tracer.end_span(request_span, error=request_error)
+
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     return Response(status_code=204)
 
-# --- Helper Function for Stripping Prefixes and Saving Content ---
-COMMON_PREFIXES_REGEX = [
-    re.compile(r"^Here is the HTML content for the page with ID '[\w\d-]+':\s*", re.IGNORECASE),
-    re.compile(r"^Here's the HTML content for the page titled '[^']+'(?: in space '[^']+')?:\s*", re.IGNORECASE),
-    re.compile(r"^The HTML content for page ID '[\w\d-]+' is:\s*", re.IGNORECASE),
-    re.compile(r"^Okay, here is the content:\s*", re.IGNORECASE),
-    re.compile(r"^Sure, here's the HTML:\s*", re.IGNORECASE)
-]
-
-def strip_known_prefixes(content: str) -> str:
-    """Strips known conversational prefixes from the content string."""
-    for pattern in COMMON_PREFIXES_REGEX:
-        content = pattern.sub("", content, count=1) # Remove only the first match at the beginning
-    return content.lstrip() # Remove any leading whitespace after stripping
-
-async def save_content_to_file(content: str, file_path: str, raw_page_title: Optional[str] = None, page_id: Optional[str] = None):
-    """Asynchronously saves content to a specified file path, creating directories if needed."""
+# --- Page conversion (PAGE_OUTPUT_FORMAT) ---
+def _create_conversion_executor() -> ProcessPoolExecutor:
+    # "spawn" rather than fork: the API process runs an event loop and several threads.
+    logger.info(f"Starting {CONVERSION_PROCESS_POOL_SIZE} conversion worker process(es) for {PAGE_OUTPUT_FORMAT} output.")
+    return ProcessPoolExecutor(max_workers=CONVERSION_PROCESS_POOL_SIZE, mp_context=multiprocessing.get_context("spawn"))
+
+async def _normalize_page_content(html_content: str) -> str:
+    """
+    Normalizes a page body to PAGE_OUTPUT_FORMAT. Conversions to markdown/text are CPU-bound and run
+    in the conversion worker processes (or a worker thread if there are none), never on the event loop.
+    """
+    global conversion_executor
+    if PAGE_OUTPUT_FORMAT == "html":
+        return normalize_page_body(html_content, PAGE_OUTPUT_FORMAT)
+    executor = conversion_executor
+    if executor:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, normalize_page_body, html_content, PAGE_OUTPUT_FORMAT)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool once and convert this page in a thread.
+            if conversion_executor is executor:
+                logger.error("Conversion worker process pool is broken; restarting it.")
+                conversion_executor = _create_conversion_executor()
+                executor.shutdown(wait=False, cancel_futures=True)
+    return await asyncio.to_thread(normalize_page_body, html_content, PAGE_OUTPUT_FORMAT)
+
+# --- Helper Function for Saving Content ---
+@tracer.traced("save_content_to_file", "page_id", result_attributes=lambda path: {"saved": path is not None})
+async def save_content_to_file(content: Union[str, bytes], file_path: str, raw_page_title: Optional[str] = None, page_id: Optional[str] = None) -> Optional[str]:
+    """
+    Asynchronously saves content to a specified file path, creating directories if needed.
+    str content has known prefixes stripped first; bytes are taken as already normalized
+    (see utilities/confluence_content_normalizer.py) and written as-is.
+    With the content store enabled the file is a hardlink to a content-addressed blob and is left
+    untouched if it already holds the same content.
+    Returns the path actually written, or None if saving failed.
+    """
     try:
         # Sanitize title and ID for filename components
         safe_page_title = "".join(c if c.isalnum() else '_' for c in (raw_page_title or "untitled"))
@@ -174,19 +471,48 @@ async def save_content_to_file(content: str, file_path: str, raw_page_title: Opt
         else:
             actual_file_path = file_path # Use the provided file_path for other cases (space, all)
         
-        dir_name = os.path.dirname(actual_file_path)
-        if dir_name:
-            await aios.makedirs(dir_name, exist_ok=True)
-        
-        cleaned_content = strip_known_prefixes(content)
-        
-        async with aiofiles.open(actual_file_path, mode='w', encoding='utf-8') as f:
-            await f.write(cleaned_content)
-        logger.info(f"Successfully saved cleaned content to {actual_file_path}")
+        cleaned_data = content if isinstance(content, bytes) else strip_known_prefixes(content).encode("utf-8")
+        if REQUEST_COALESCING_ENABLED:
+            # A save of the same bytes to the same file already in flight is joined, not repeated.
+            key = (actual_file_path, cleaned_data)
+            if file_save_flights.in_flight(key):
+                tracer.set_attributes(coalesced=True)
+            await file_save_flights.do(key, lambda: _write_content_file(actual_file_path, cleaned_data))
+        else:
+            await _write_content_file(actual_file_path, cleaned_data)
+        return actual_file_path
     except Exception as e:
+        errors_total.inc(component="file_save", error_class=type(e).__name__)
         # Use actual_file_path if available, otherwise fallback to file_path for logging
         log_path = actual_file_path if 'actual_file_path' in locals() else file_path
         logger.error(f"Error saving content to {log_path}: {e}", exc_info=True)
+        return None
+
+async def _write_content_file(actual_file_path: str, cleaned_data: bytes) -> str:
+    """Writes cleaned_data to actual_file_path (through the file writer or content store when enabled); returns the save outcome."""
+    started_at = time.perf_counter()
+
+    if file_writer:
+        outcome = await file_writer.write(actual_file_path, cleaned_data)
+    else:
+        dir_name = os.path.dirname(actual_file_path)
+        if dir_name:
+            await aios.makedirs(dir_name, exist_ok=True)
+
+        if content_store:
+            outcome = await asyncio.to_thread(content_store.save, cleaned_data, actual_file_path)
+        else:
+            async with aiofiles.open(actual_file_path, mode='wb') as f:
+                await f.write(cleaned_data)
+            outcome = "written"
+
+    file_save_duration.observe(time.perf_counter() - started_at, outcome=outcome)
+    if outcome == SAVE_UNCHANGED:
+        page_logger.info("Content unchanged, not rewriting %s", actual_file_path)
+    else:
+        bytes_saved_total.inc(len(cleaned_data), target="file")
+        page_logger.info("Successfully saved cleaned content to %s (%s)", actual_file_path, outcome)
+    return outcome
 
 # --- API Request and Response Models ---
 # GeneralQueryRequest and GeneralQueryResponse are being removed as the endpoint using them is removed
@@ -201,6 +527,11 @@ class SpaceContentRequest(BaseModel):
     space_name: str
     start_date: Optional[str] = None
     end_date: Optional[str] = None
+    incremental: bool = False
+    # Opt-in streaming: "ndjson" or "sse" emits one record per page as it is saved, then a summary.
+    stream: Optional[Literal["ndjson", "sse"]] = None
+    # Opt-in single-file export instead of one file per page (see utilities/confluence_export_archive.py).
+    export_format: Optional[Literal["jsonl.gz", "tar.gz", "tar.zst"]] = None
 
 class PageContentRequest(BaseModel):
     page_id: Optional[str] = None
@@ -209,10 +540,23 @@ class PageContentRequest(BaseModel):
     start_date: Optional[str] = None
     end_date: Optional[str] = None
     recursive: bool = False
+    max_depth: Optional[int] = None # Only with recursive=True; 1 = direct children only, None = unlimited
+    max_pages: Optional[int] = None # Only with recursive=True; cap on descendant pages visited, None = unlimited
 
 class AllContentRequest(BaseModel):
     start_date: Optional[str] = None
     end_date: Optional[str] = None
+    incremental: bool = False
+    # Opt-in streaming: "ndjson" or "sse" emits one record per page as it is saved, then a summary.
+    stream: Optional[Literal["ndjson", "sse"]] = None
+    # Opt-in single-file export instead of one file per page (see utilities/confluence_export_archive.py).
+    export_format: Optional[Literal["jsonl.gz", "tar.gz", "tar.zst"]] = None
+
+class JobRequest(BaseModel):
+    space_name: Optional[str] = None # None crawls all accessible spaces
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    incremental: bool = False
 
 class ContentResponse(BaseModel):
     data: Optional[Any] = None
@@ -220,26 +564,150 @@ class ContentResponse(BaseModel):
     error: Optional[str] = None
 
 # --- Helper function to check for MCP authentication errors ---
-def is_mcp_auth_error(e: Exception) -> bool:
+MCP_AUTH_ERROR_KEYWORDS = ["401", "unauthorized", "authentication failed", "token", "credential"]
+MCP_CONNECTIVITY_ERROR_KEYWORDS = ["connection refused", "service unavailable", "503", "proxy error", "mcpclient error", "failed to connect"]
+
+def _mcp_failure_kind(e: BaseException) -> Optional[str]:
+    """'auth' or 'connectivity' if e means the MCP bridge is unusable, else None. Does not log."""
     error_str = str(e).lower()
-    auth_keywords = ["401", "unauthorized", "authentication failed", "token", "credential"]
-    connectivity_keywords = ["connection refused", "service unavailable", "503", "proxy error", "mcpclient error", "failed to connect"]
-
-    for keyword in auth_keywords:
-        if keyword in error_str:
-            return True
-    for keyword in connectivity_keywords: 
-        if keyword in error_str:
-            logger.warning(f"Potential MCP connectivity issue detected: {e}", exc_info=True) 
-            return True
-    return False
-
-# --- Helper Function to get Atlassian Cloud ID (Uses UseToolFromServerTool) ---
+    if any(keyword in error_str for keyword in MCP_AUTH_ERROR_KEYWORDS):
+        return "auth"
+    if any(keyword in error_str for keyword in MCP_CONNECTIVITY_ERROR_KEYWORDS):
+        return "connectivity"
+    return None
+
+def is_mcp_auth_error(e: Exception) -> bool:
+    if isinstance(e, CircuitOpenError):
+        return True
+    failure_kind = _mcp_failure_kind(e)
+    if failure_kind == "connectivity":
+        logger.warning(f"Potential MCP connectivity issue detected: {e}", exc_info=True)
+    return failure_kind is not None
+
+def _error_class(e: BaseException) -> str:
+    """Coarse error class for metrics and the circuit breaker."""
+    if isinstance(e, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(e, asyncio.TimeoutError):
+        return "timeout"
+    # 429/503 throttling means upstream answered; it is backed off from (see call_with_retries),
+    # not counted as the bridge being down, even though "503" also reads as a connectivity keyword.
+    throttle_class, _ = classify_tool_error(e)
+    if throttle_class == ERROR_CLASS_THROTTLED:
+        return throttle_class
+    failure_kind = _mcp_failure_kind(e)
+    if failure_kind:
+        return failure_kind
+    if is_transport_error(str(e)):
+        return "transport"
+    if throttle_class:
+        return throttle_class
+    if isinstance(e, MCPToolError):
+        return "tool_error"
+    return type(e).__name__
+
+def _raise_if_circuit_open() -> None:
+    """Rejects a request with 503 right away while the MCP circuit breaker is open."""
+    if circuit_breaker and circuit_breaker.is_open():
+        retry_in = circuit_breaker.retry_in_seconds()
+        raise HTTPException(
+            status_code=503,
+            detail=f"MCP bridge unavailable (circuit breaker open after repeated connectivity/auth failures). Retry in {retry_in:.0f}s.",
+            headers={"Retry-After": str(max(1, int(retry_in + 0.999)))}
+        )
+
+# --- Helpers for the start_date/end_date request window ---
+def _resolve_date_window(start_date: Optional[str], end_date: Optional[str]) -> Optional[DateWindow]:
+    """Parses the request's date window, raising HTTPException(400) for invalid dates."""
+    try:
+        return parse_date_window(start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid start_date/end_date: {e}")
+
+# --- Direct MCP tool calls ---
+async def _call_tool(server_name: str, tool_name: str, tool_input: Dict[str, Any]) -> Any:
+    """
+    Calls an MCP tool on a pooled session and returns its decoded (JSON) result. Calls pass through the shared rate
+    limiter, and throttled (429/503) or transient failures are retried with backoff. Raises
+    MCPToolError when the server reports the call as failed; connection and auth failures
+    propagate unchanged, so callers can still classify them with is_mcp_auth_error.
+    """
+    global use_tool_executor_instance
+    if not use_tool_executor_instance:
+        raise RuntimeError("MCPClient error: tool executor not initialized.")
+    call = lambda: call_with_retries(
+        lambda: _call_tool_once(server_name, tool_name, tool_input),
+        rate_limiter,
+        description=f"Tool call {tool_name}",
+        max_attempts=TOOL_CALL_MAX_ATTEMPTS,
+        base_delay=TOOL_CALL_RETRY_BASE_DELAY_SECONDS,
+        max_delay=TOOL_CALL_RETRY_MAX_DELAY_SECONDS,
+        max_retry_after=TOOL_CALL_RETRY_AFTER_MAX_SECONDS
+    )
+    if not REQUEST_COALESCING_ENABLED:
+        return await call()
+    # Identical calls already in flight (same tool and parameters) are joined instead of repeated.
+    key = (server_name, tool_name, json.dumps(tool_input, sort_keys=True, default=str))
+    if tool_call_flights.in_flight(key):
+        tracer.set_attributes(coalesced=True)
+    return await tool_call_flights.do(key, call)
+
+@tracer.traced("mcp_tool_call", "tool_name")
+async def _call_tool_once(server_name: str, tool_name: str, tool_input: Dict[str, Any]) -> Any:
+    """
+    One attempt of a tool call, guarded by the circuit breaker: raises CircuitOpenError without
+    calling the bridge while the circuit is open. Connectivity/auth failures, timeouts (no answer
+    within TOOL_CALL_TIMEOUT_SECONDS) and dead sessions count against the breaker; any answer from
+    the server, including a tool error, resets it.
+    """
+    if circuit_breaker:
+        try:
+            circuit_breaker.before_call()
+        except CircuitOpenError as e:
+            errors_total.inc(component="tool_call", error_class=_error_class(e))
+            raise
+    started_at = time.perf_counter()
+    tool_calls_in_flight.inc(tool=tool_name)
+    try:
+        result = await asyncio.wait_for(use_tool_executor_instance.call_tool(server_name, tool_name, tool_input), TOOL_CALL_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        tool_call_duration.observe(time.perf_counter() - started_at, tool=tool_name, outcome="cancelled")
+        if circuit_breaker:
+            circuit_breaker.record_cancelled()
+        raise
+    except Exception as e:
+        tool_call_duration.observe(time.perf_counter() - started_at, tool=tool_name, outcome="error")
+        error_class = _error_class(e)
+        errors_total.inc(component="tool_call", error_class=error_class)
+        if circuit_breaker:
+            if error_class in ("timeout", "transport", "auth", "connectivity"):
+                circuit_breaker.record_failure(e)
+            else:
+                circuit_breaker.record_success()
+        raise
+    finally:
+        tool_calls_in_flight.dec(tool=tool_name)
+    tool_call_duration.observe(time.perf_counter() - started_at, tool=tool_name, outcome="ok")
+    if circuit_breaker:
+        circuit_breaker.record_success()
+    return result
+
+# --- Helper Function to get Atlassian Cloud ID ---
+@tracer.traced("get_cloud_id", result_attributes=lambda cloud_id: {"found": cloud_id is not None})
 async def _get_cloud_id() -> Optional[str]:
-    """Fetches the Atlassian Cloud ID using the getAccessibleAtlassianResources tool via executor."""
+    """
+    Fetches the Atlassian Cloud ID using the getAccessibleAtlassianResources tool via executor.
+    The result is cached in directory_cache for CLOUD_ID_CACHE_TTL_SECONDS.
+    """
     global use_tool_executor_instance
+    cached_cloud_id = await directory_cache.get_cloud_id()
+    tracer.set_attributes(cached=bool(cached_cloud_id))
+    if cached_cloud_id:
+        logger.debug("Using cached Cloud ID: %s", cached_cloud_id)
+        return cached_cloud_id
+
     if not use_tool_executor_instance:
-        logger.error("UseToolFromServerTool executor not initialized. Cannot fetch Cloud ID.")
+        logger.error("MCP session pool not initialized. Cannot fetch Cloud ID.")
         return None
 
     tool_name = "getAccessibleAtlassianResources"
@@ -252,30 +720,15 @@ async def _get_cloud_id() -> Optional[str]:
         return None
 
     try:
-        logger.info(f"Fetching accessible Atlassian resources to get Cloud ID via UseToolFromServerTool (server: {server_name}, tool: {tool_name})")
-        
-        response_str = await use_tool_executor_instance._arun(
-            server_name=server_name,
-            tool_name=tool_name,
-            tool_input={} # This tool takes no parameters
-        )
-        
-        # UseToolFromServerTool._arun returns a string. We need to parse it if it's JSON.
-        # It might also return an error message string.
-        try:
-            resources_response = json.loads(response_str)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response from {tool_name}: {response_str[:200]}")
-            # Check if the response_str itself is an error message from UseToolFromServerTool
-            if "not found" in response_str.lower() or "error" in response_str.lower():
-                 logger.error(f"Error message from UseToolFromServerTool: {response_str}")
-            return None
+        logger.info(f"Fetching accessible Atlassian resources to get Cloud ID (server: {server_name}, tool: {tool_name})")
+        resources_response = await _call_tool(server_name, tool_name, {}) # This tool takes no parameters
 
         if isinstance(resources_response, list) and resources_response:
             first_resource = resources_response[0]
             if isinstance(first_resource, dict) and "id" in first_resource:
                 cloud_id = first_resource["id"]
                 logger.info(f"Found Cloud ID (from 'id' key): {cloud_id}")
+                await directory_cache.set_cloud_id(cloud_id)
                 return cloud_id
             else:
                 logger.error(f"Cloud ID (expected in 'id' key) not found in the first resource. Resource structure: {str(first_resource)[:200]}")
@@ -284,97 +737,1001 @@ async def _get_cloud_id() -> Optional[str]:
             logger.error(f"Unexpected response format or empty list from {tool_name} after JSON parsing. Parsed Response: {str(resources_response)[:200]}")
             return None
             
+    except MCPToolError as e:
+        logger.error(f"Error returned by {tool_name}: {e}")
+        return None
     except Exception as e:
-        # This might catch errors from _arun itself or other issues.
-        logger.error(f"Error executing {tool_name} via UseToolFromServerTool: {e}", exc_info=True)
+        logger.error(f"Error executing {tool_name}: {e}", exc_info=True)
         return None
 
+# --- Helpers for paginated listing tools ---
+class ToolResponseError(Exception):
+    """Raised when an MCP tool reports an error or its response does not have the expected structure."""
+
+def _next_cursor(response: Dict[str, Any]) -> Optional[str]:
+    """Returns the cursor for the next page of a listing response, from a cursor field or _links.next."""
+    for key in ("cursor", "nextCursor", "next_cursor"):
+        if isinstance(response.get(key), str) and response[key]:
+            return response[key]
+    links = response.get("_links")
+    if isinstance(links, dict) and isinstance(links.get("next"), str):
+        cursor_values = parse_qs(urlparse(links["next"]).query).get("cursor")
+        if cursor_values:
+            return cursor_values[0]
+    return None
+
+async def _iter_tool_results(server_name: str, tool_name: str, tool_input: Dict[str, Any], request_label: str) -> AsyncIterator[Any]:
+    """
+    Walks every cursor page of a paginated listing tool (getPagesInConfluenceSpace, getConfluenceSpaces)
+    and yields the items of each page's 'results' list as soon as that page arrives, so callers can
+    start work before the listing is complete and never hold the whole listing in memory.
+    A bare list response is treated as a single, complete page.
+    Raises ToolResponseError if the tool reports an error or a page has an unexpected structure.
+    """
+    cursor = None
+    seen_cursors: Set[str] = set()
+    listing_page_number = 0
+
+    while True:
+        params = dict(tool_input)
+        if LISTING_PAGE_SIZE:
+            params.setdefault("limit", LISTING_PAGE_SIZE)
+        if cursor:
+            params["cursor"] = cursor
+
+        try:
+            response = await _call_tool(server_name, tool_name, params)
+        except MCPToolError as e:
+            logger.error(f"{tool_name} returned an error ({request_label}, listing page {listing_page_number + 1}): {e.message[:200]}")
+            raise ToolResponseError(f"{tool_name} returned an error: {e.message[:200]}")
+
+        if isinstance(response, list):
+            logger.info("%s returned %d items (unpaginated) for %s.", tool_name, len(response), request_label)
+            for item in response:
+                yield item
+            return
+        if not (isinstance(response, dict) and 'results' in response and isinstance(response['results'], list)):
+            logger.error(f"Unexpected response structure from {tool_name} ({request_label}) after parsing. Expected dict with 'results' list. Got: {str(response)[:200]}")
+            raise ToolResponseError(f"Unexpected {tool_name} response (unexpected structure).")
+
+        listing_page_number += 1
+        logger.info("%s listing page %d returned %d items for %s.", tool_name, listing_page_number, len(response['results']), request_label)
+        for item in response['results']:
+            yield item
+
+        cursor = _next_cursor(response)
+        if not cursor:
+            return
+        if cursor in seen_cursors:
+            logger.warning(f"{tool_name} returned a repeated cursor for {request_label}; stopping pagination.")
+            return
+        seen_cursors.add(cursor)
+
+# --- Helper Function to get the Confluence space directory ---
+@tracer.traced("list_spaces", result_attributes=lambda spaces: {"spaces": len(spaces)})
+async def _get_confluence_spaces(server_name: str, cloud_id: str, request_label: str, force_refresh: bool = False) -> List[Dict[str, Any]]:
+    """
+    Returns the list of Confluence spaces for cloud_id via the getConfluenceSpaces tool.
+    The list (and its name/key index) is cached in directory_cache for SPACE_DIRECTORY_CACHE_TTL_SECONDS.
+    Raises HTTPException if the tool response cannot be parsed.
+    """
+    if not force_refresh:
+        cached_spaces = await directory_cache.get_spaces(cloud_id)
+        if cached_spaces is not None:
+            tracer.set_attributes(cached=True)
+            logger.debug("Using cached space list (%d spaces) for %s", len(cached_spaces), request_label)
+            return cached_spaces
+
+    spaces_tool_name = "getConfluenceSpaces"
+    logger.info(f"Fetching all spaces for cloudId: {cloud_id} via executor (server: {server_name}, tool: {spaces_tool_name}) for {request_label}")
+
+    try:
+        spaces_list = [space async for space in _iter_tool_results(server_name, spaces_tool_name, {"cloudId": cloud_id}, request_label)]
+    except ToolResponseError as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving space list for {request_label}: {e}")
+
+    await directory_cache.set_spaces(cloud_id, spaces_list)
+    return spaces_list
+
+async def _resolve_space(server_name: str, cloud_id: str, space_name: str) -> Dict[str, Any]:
+    """Resolves a space name or key to its space object via directory_cache. Raises HTTPException(404) if unknown."""
+    space_obj = await directory_cache.find_space(cloud_id, space_name)
+    if not space_obj:
+        # Cold cache, expired entry, or a space created since the list was cached: refresh once.
+        list_was_cached = await directory_cache.has_spaces(cloud_id)
+        spaces_list = await _get_confluence_spaces(server_name, cloud_id, f"space '{space_name}'", force_refresh=list_was_cached)
+        space_obj = await directory_cache.find_space(cloud_id, space_name)
+        if not space_obj:
+            logger.warning(f"Could not find spaceId for space name: '{space_name}'. Available spaces checked: {len(spaces_list)}")
+            raise HTTPException(status_code=404, detail=f"Space '{space_name}' not found or ID could not be resolved.")
+    logger.info(f"Found spaceId: {space_obj['id']} for spaceName: {space_name}")
+    return space_obj
+
+def _page_result_attributes(page_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not page_result:
+        return {"saved": False}
+    attributes = {"saved": bool(page_result.get("saved"))}
+    if page_result.get("error"):
+        attributes["error"] = str(page_result["error"])[:200]
+    return attributes
+
+@tracer.traced("fetch_and_save_page", "page_id", result_attributes=_page_result_attributes)
 async def _fetch_and_save_page_content(
     server_name: str, 
     cloud_id: str, 
     page_id: str, 
     page_name_hint: Optional[str], 
     base_save_dir: str,
-    parent_page_id_for_path: Optional[str] = None
+    parent_page_id_for_path: Optional[str] = None,
+    archive: Optional[ExportArchiveWriter] = None,
+    space_name: Optional[str] = None
 ) -> Optional[Dict[str, Any]]:
-    """Helper function to fetch, parse, and save content for a single page using UseToolFromServerTool."""
+    """
+    Helper function to fetch, parse, and save content for a single page.
+    With an export archive the page is appended to it instead of being saved as its own file.
+    """
     global use_tool_executor_instance
     if not use_tool_executor_instance:
-        logger.error(f"UseToolFromServerTool executor not initialized. Cannot fetch page {page_id}.")
+        logger.error(f"MCP session pool not initialized. Cannot fetch page {page_id}.")
         return {"id": page_id, "title": page_name_hint, "saved": False, "error": "Tool executor not initialized"}
 
     tool_name = "getConfluencePage"
     tool_params = {"cloudId": cloud_id, "pageId": page_id}
-    logger.info(f"Fetching content for page ID: {page_id} via executor (server: {server_name}, tool: '{tool_name}', params: {tool_params})")
+    page_logger.info("Fetching content for page ID: %s via executor (server: %s, tool: '%s', params: %s)", page_id, server_name, tool_name, tool_params)
     
     try:
-        response_str = await use_tool_executor_instance._arun(
-            server_name=server_name,
-            tool_name=tool_name,
-            tool_input=tool_params
-        )
-
-        try:
-            tool_response = json.loads(response_str)
-            logger.info(f"For page_id {page_id}, PARSED tool_response from {tool_name}: {tool_response}")
-            if isinstance(tool_response, dict):
-                logger.info(f"For page_id {page_id}, tool_response keys: {list(tool_response.keys())}")
-            html_content = None
-            page_title_from_response = tool_response.get("title", page_name_hint or f"page_{page_id}")
-            page_id_from_response = tool_response.get("id", page_id)
-
-            if "html" in tool_response and isinstance(tool_response["html"], str):
-                html_content = tool_response["html"]
-            elif "body" in tool_response:
-                if isinstance(tool_response["body"], str):
-                    html_content = tool_response["body"]
-                elif isinstance(tool_response["body"], dict):
-                    if "view" in tool_response["body"] and isinstance(tool_response["body"]["view"], dict) and \
-                       "value" in tool_response["body"]["view"] and isinstance(tool_response["body"]["view"]["value"], str):
-                        html_content = tool_response["body"]["view"]["value"]
-                    elif "storage" in tool_response["body"] and isinstance(tool_response["body"]["storage"], dict) and \
-                         "value" in tool_response["body"]["storage"] and isinstance(tool_response["body"]["storage"]["value"], str):
-                        html_content = tool_response["body"]["storage"]["value"]
-                    elif "raw" in tool_response["body"] and isinstance(tool_response["body"]["raw"], str):
-                         html_content = tool_response["body"]["raw"]
+        tool_response = await _call_tool(server_name, tool_name, tool_params)
+        if not isinstance(tool_response, dict):
+            logger.error(f"Unexpected response from {tool_name} for page {page_id}: {str(tool_response)[:200]}")
+            return {"id": page_id, "title": page_name_hint, "saved": False, "error": f"Unexpected response structure from {tool_name}"}
+        # The full response can be megabytes: dumped (truncated) at DEBUG only.
+        if page_logger.isEnabledFor(logging.DEBUG):
+            page_logger.debug("For page_id %s, %s response keys: %s, parsed response: %s", page_id, tool_name, list(tool_response.keys()), Truncated(tool_response))
+        page_title_from_response = tool_response.get("title", page_name_hint or f"page_{page_id}")
+        page_id_from_response = tool_response.get("id", page_id)
+
+        # The body is sliced (prefix strip) or converted once; the bytes written and hashed are encoded once.
+        page_content = None
+        html_content, body_extractor = extract_page_body(tool_response)
+        if html_content is not None:
+            page_content = await _normalize_page_content(html_content)
+            page_content_data = page_content.encode("utf-8")
+            content_hash = hashlib.sha256(page_content_data).hexdigest()
+            page_logger.debug("Page %s: body via '%s', %d bytes as %s", page_id_from_response, body_extractor, len(page_content_data), PAGE_OUTPUT_FORMAT)
+
+        if page_content is not None and archive:
+            page_version = get_summary_version(tool_response)
+            archive_entry = await archive.add_page(page_id_from_response, page_title_from_response, space_name, page_version, page_content)
+            bytes_saved_total.inc(archive_entry["length"], target="archive")
+            return {
+                "id": page_id_from_response,
+                "title": page_title_from_response,
+                "saved": True,
+                "archive_path": archive.archive_path,
+                "archive_offset": archive_entry["offset"],
+                "version": page_version,
+                "content_hash": content_hash
+            }
+        if page_content is not None:
+            current_page_save_dir = base_save_dir
+            if parent_page_id_for_path:
+                current_page_save_dir = os.path.join(base_save_dir, f"page_{parent_page_id_for_path}_descendants")
             
-            if html_content is not None:
-                current_page_save_dir = base_save_dir
-                if parent_page_id_for_path:
-                    current_page_save_dir = os.path.join(base_save_dir, f"page_{parent_page_id_for_path}_descendants")
-                
-                await save_content_to_file(
-                    content=html_content,
-                    file_path=os.path.join(current_page_save_dir, f"page_{page_id_from_response}.html"),
-                    raw_page_title=page_title_from_response,
-                    page_id=page_id_from_response
-                )
-                return {"id": page_id_from_response, "title": page_title_from_response, "saved": True, "path_segment": f"page_{parent_page_id_for_path}_descendants" if parent_page_id_for_path else ""}
-            else:
-                logger.warning(f"Could not extract HTML content from tool response for page {page_id_from_response}. Response keys: {list(tool_response.keys())}")
-                return {"id": page_id_from_response, "title": page_title_from_response, "saved": False, "error": "No HTML content found"}
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response from {tool_name} for page {page_id}: {response_str[:200]}")
-            if "not found" in response_str.lower() or "error" in response_str.lower():
-                logger.error(f"Error message from UseToolFromServerTool execution of {tool_name} for page {page_id}: {response_str}")
-            return {"id": page_id, "title": page_name_hint, "saved": False, "error": f"Failed to parse response for {tool_name}"}
-        except Exception as e_fetch:
-            logger.error(f"Error executing/saving page ID {page_id} via executor: {e_fetch}", exc_info=True)
-            return {"id": page_id, "title": page_name_hint, "saved": False, "error": str(e_fetch)}
+            saved_file_path = await save_content_to_file(
+                content=page_content_data,
+                file_path=os.path.join(current_page_save_dir, f"page_{page_id_from_response}.html"),
+                raw_page_title=page_title_from_response,
+                page_id=page_id_from_response
+            )
+            if not saved_file_path:
+                return {"id": page_id_from_response, "title": page_title_from_response, "saved": False, "error": "Failed to write content to disk"}
+            return {
+                "id": page_id_from_response,
+                "title": page_title_from_response,
+                "saved": True,
+                "path_segment": f"page_{parent_page_id_for_path}_descendants" if parent_page_id_for_path else "",
+                "file_path": saved_file_path,
+                "version": get_summary_version(tool_response),
+                "content_hash": content_hash
+            }
+        else:
+            logger.warning(f"Could not extract HTML content from tool response for page {page_id_from_response}. Response keys: {list(tool_response.keys())}")
+            return {"id": page_id_from_response, "title": page_title_from_response, "saved": False, "error": "No HTML content found"}
+    except MCPToolError as e_tool:
+        logger.error(f"{tool_name} returned an error for page {page_id}: {e_tool.message[:200]}")
+        return {"id": page_id, "title": page_name_hint, "saved": False, "error": f"{tool_name} returned an error: {e_tool.message[:200]}"}
     except Exception as e_fetch:
         logger.error(f"Error executing/saving page ID {page_id} via executor: {e_fetch}", exc_info=True)
         return {"id": page_id, "title": page_name_hint, "saved": False, "error": str(e_fetch)}
 
+async def _iter_page_fetch_results(
+    server_name: str,
+    cloud_id: str,
+    page_summaries: AsyncIterator[Any],
+    base_save_dir: str,
+    space_label: str,
+    listing_stats: Dict[str, Any],
+    manifest: Optional[SpaceSyncManifest] = None,
+    incremental: bool = False,
+    date_window: Optional[DateWindow] = None,
+    skip_page_ids: Optional[Set[str]] = None,
+    archive: Optional[ExportArchiveWriter] = None,
+    trace_parent: Optional[Any] = None
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Fetches and saves every page yielded by page_summaries with at most PAGE_FETCH_CONCURRENCY
+    getConfluencePage calls in flight, yielding (listing_index, result) as each page completes.
+    Fetching starts as soon as the first summary arrives, and the listing only advances when a
+    fetch slot is free and the consumer has taken finished results, so neither summaries nor
+    results pile up in memory. A failure on one page is recorded in its result without
+    cancelling the others.
+
+    Pages outside date_window are dropped before fetching. Saved pages are recorded in manifest
+    (if given). With incremental=True, pages whose summary version is not newer than the manifest
+    entry are skipped without calling getConfluencePage. Pages in skip_page_ids (a resumed job's
+    checkpoint) are skipped as well. With an export archive, pages are appended to it instead of
+    being saved as individual files.
+
+    listing_stats is filled in with 'pages_listed', 'pages_outside_date_window' and, if the
+    listing failed part-way, 'listing_error'.
+
+    Listing and page fetches are traced below trace_parent (default: the consumer's current span).
+    """
+    fetch_concurrency = max(1, PAGE_FETCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(fetch_concurrency)
+    completed: asyncio.Queue = asyncio.Queue(maxsize=fetch_concurrency * 2)
+    pending: Set[asyncio.Task] = set()
+    listing_done = object()
+    listing_stats.update({"pages_listed": 0, "pages_outside_date_window": 0})
+
+    def result_without_fetch(page_summary: Any) -> Optional[Dict[str, Any]]:
+        """Returns the result for a summary that needs no getConfluencePage call, or None if it must be fetched."""
+        if not isinstance(page_summary, dict):
+            logger.warning(f"Unexpected item type in page summary list for space '{space_label}': {type(page_summary)}")
+            return {"id": None, "title": "Unknown (invalid summary)", "saved": False, "error": "Invalid page summary"}
+
+        page_id = page_summary.get("id")
+        if not page_id:
+            logger.warning(f"Skipping page in space '{space_label}' due to missing ID in summary. Page summary: {str(page_summary)[:100]}")
+            return {"id": None, "title": "Unknown (missing ID)", "saved": False, "error": "Missing ID in page summary"}
+
+        if skip_page_ids and str(page_id) in skip_page_ids:
+            return {"id": page_id, "title": page_summary.get("title", f"page_{page_id}"), "saved": False, "skipped": True, "skip_reason": "checkpointed"}
+
+        if incremental and manifest and not manifest.needs_fetch(page_summary):
+            page_logger.debug("Skipping unchanged page '%s' (ID: %s) in space '%s'", page_summary.get('title'), page_id, space_label)
+            return {"id": page_id, "title": page_summary.get("title", f"page_{page_id}"), "saved": False, "skipped": True, "skip_reason": "unchanged", "version": get_summary_version(page_summary)}
+        return None
+
+    async def fetch_one(index: int, page_summary: Dict[str, Any]) -> None:
+        page_id = page_summary["id"]
+        page_title = page_summary.get("title", f"page_{page_id}")
+        try:
+            try:
+                page_logger.info("Fetching full content for page '%s' (ID: %s) in space '%s'", page_title, page_id, space_label)
+                page_content_details = await _fetch_and_save_page_content(
+                    server_name=server_name,
+                    cloud_id=cloud_id,
+                    page_id=page_id,
+                    page_name_hint=page_title,
+                    base_save_dir=base_save_dir,
+                    archive=archive,
+                    space_name=space_label
+                )
+                if not page_content_details:
+                    logger.error(f"_fetch_and_save_page_content returned None for page ID {page_id}")
+                    page_content_details = {"id": page_id, "title": page_title, "saved": False, "error": "Helper function returned None"}
+                elif not page_content_details.get("saved"):
+                    logger.warning(f"Could not fetch or save content for page ID {page_id} in space '{space_label}'. Details: {page_content_details}")
+                elif manifest:
+                    # Record the summary's version so the next incremental run compares like with like.
+                    manifest.record(
+                        page_id=page_id,
+                        version=get_summary_version(page_summary) or page_content_details.get("version"),
+                        last_modified=get_summary_last_modified(page_summary),
+                        content_hash=page_content_details.get("content_hash"),
+                        file_path=page_content_details.get("file_path")
+                    )
+            except Exception as e_unhandled:
+                logger.error(f"Unhandled error fetching page ID {page_id} in space '{space_label}': {e_unhandled}", exc_info=True)
+                page_content_details = {"id": page_id, "title": page_title, "saved": False, "error": str(e_unhandled)}
+            await completed.put((index, page_content_details))
+        finally:
+            # Released only once the result is queued, so a slow consumer also slows fetching.
+            semaphore.release()
+
+    async def produce() -> None:
+        index = 0
+        # Only the listing's own tool calls run under the listing span; page fetches are its siblings.
+        listing_span = tracer.start_span("list_pages", space=space_label)
+        listing_error: Optional[BaseException] = None
+        try:
+            while True:
+                with tracer.activate(listing_span):
+                    try:
+                        page_summary = await anext(page_summaries)
+                    except StopAsyncIteration:
+                        break
+                listing_stats["pages_listed"] += 1
+                if isinstance(page_summary, dict) and not is_page_in_date_window(page_summary, date_window):
+                    listing_stats["pages_outside_date_window"] += 1
+                    continue
+
+                index += 1
+                immediate_result = result_without_fetch(page_summary)
+                if immediate_result is not None:
+                    await completed.put((index, immediate_result))
+                    continue
+
+                # Backpressure: do not pull more summaries until a fetch slot is free.
+                await semaphore.acquire()
+                task = asyncio.create_task(fetch_one(index, page_summary))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except Exception as e_listing:
+            # ToolResponseError has already been logged in detail by _iter_tool_results.
+            logger.error(f"Page listing for space '{space_label}' failed after {listing_stats['pages_listed']} summaries: {e_listing}", exc_info=not isinstance(e_listing, ToolResponseError))
+            listing_stats["listing_error"] = str(e_listing)
+            listing_error = e_listing
+        finally:
+            tracer.end_span(listing_span, error=listing_error, pages_listed=listing_stats["pages_listed"])
+
+        if pending:
+            await asyncio.gather(*pending)
+        if date_window:
+            logger.info(f"Date window excluded {listing_stats['pages_outside_date_window']} of {listing_stats['pages_listed']} pages in space '{space_label}'.")
+        await completed.put(listing_done)
+
+    with tracer.activate(trace_parent):
+        producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await completed.get()
+            if item is listing_done:
+                break
+            yield item
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            for task in list(pending):
+                task.cancel()
+
+# --- Space leases (one worker crawls a given space at a time) ---
+class SpaceBusyError(Exception):
+    """Raised when another API worker holds the lease of a space this worker wants to crawl."""
+
+    def __init__(self, space_name: str, owner: Optional[str]):
+        super().__init__(f"Space '{space_name}' is being crawled by another worker ({owner or 'unknown'}); retry later.")
+        self.space_name = space_name
+        self.owner = owner
+
+def _space_lease_name(space_id: str) -> str:
+    return f"space:{space_id}"
+
+async def _space_lease_holder(space_id: str) -> Optional[str]:
+    """The id of the other worker crawling space_id, or None if no other worker is."""
+    if not worker_leases:
+        return None
+    lease = await worker_leases.held_elsewhere(_space_lease_name(space_id))
+    return lease["owner"] if lease else None
+
+async def _acquire_space_lease(space_id: str, space_name: str, wait_seconds: float = 0.0) -> None:
+    """Takes (or joins this worker's hold on) the space's lease. Raises SpaceBusyError if another worker keeps it."""
+    if not worker_leases:
+        return
+    if not await worker_leases.acquire(_space_lease_name(space_id), wait_seconds):
+        raise SpaceBusyError(space_name, await _space_lease_holder(space_id))
+
+async def _release_space_lease(space_id: str) -> None:
+    if worker_leases:
+        await worker_leases.release(_space_lease_name(space_id))
+
+async def _iter_space_crawl_records(
+    server_name: str,
+    cloud_id: str,
+    space_id: str,
+    space_name: str,
+    space_key: Optional[str],
+    base_save_path: str,
+    incremental: bool,
+    date_window: Optional[DateWindow],
+    skip_page_ids: Optional[Set[str]] = None,
+    archive: Optional[ExportArchiveWriter] = None,
+    lease_wait_seconds: float = 0.0
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Crawls one space and yields a {"type": "page"} record as each page completes, followed by a
+    single {"type": "space"} record with the space's counters. The space's sync manifest is
+    loaded before the crawl and saved after it, even if the crawl is interrupted. Exports to an
+    archive leave the manifest alone, since it tracks the loose files under base_save_path.
+    The space's lease is held for the whole crawl; raises SpaceBusyError (before yielding
+    anything) if another worker still holds it after lease_wait_seconds.
+    """
+    await _acquire_space_lease(space_id, space_name, lease_wait_seconds)
+    try:
+        pages_tool_name = "getPagesInConfluenceSpace"
+        pages_tool_params = {"cloudId": cloud_id, "spaceId": space_id}
+        logger.info(f"Fetching pages for space: '{space_name}' (ID: {space_id}, Key: {space_key}) via executor (server: {server_name}, tool: {pages_tool_name})")
+
+        # Not made current: this generator yields while the span is open (see utilities/confluence_tracing.py).
+        space_span = tracer.start_span("crawl_space", space=space_name, space_id=space_id)
+        manifest = await asyncio.to_thread(SpaceSyncManifest.load, base_save_path)
+        listing_stats: Dict[str, Any] = {}
+        page_counts = {"pages_saved": 0, "pages_failed": 0, "pages_skipped_unchanged": 0, "pages_skipped_checkpointed": 0}
+        page_results = _iter_page_fetch_results(
+            server_name=server_name,
+            cloud_id=cloud_id,
+            page_summaries=_iter_tool_results(server_name, pages_tool_name, pages_tool_params, f"space {space_id}"),
+            base_save_dir=base_save_path,
+            space_label=space_name,
+            listing_stats=listing_stats,
+            manifest=None if archive else manifest,
+            incremental=incremental,
+            date_window=date_window,
+            skip_page_ids=skip_page_ids,
+            archive=archive,
+            trace_parent=space_span
+        )
+        try:
+            async for index, page_result in page_results:
+                if page_result.get("skip_reason") == "checkpointed":
+                    page_counts["pages_skipped_checkpointed"] += 1
+                elif page_result.get("skipped"):
+                    page_counts["pages_skipped_unchanged"] += 1
+                elif page_result.get("saved"):
+                    page_counts["pages_saved"] += 1
+                else:
+                    page_counts["pages_failed"] += 1
+                yield {"type": "page", "space_id": space_id, "index": index, "page": page_result}
+        except BaseException as e:
+            # Stop in-flight fetches and keep the manifest entries for pages already saved.
+            # The save runs off the event loop and is shielded, so a second cancellation cannot interrupt it.
+            await page_results.aclose()
+            try:
+                await asyncio.shield(asyncio.to_thread(manifest.save))
+            finally:
+                tracer.end_span(space_span, error=e, **page_counts)
+            raise
+        await asyncio.shield(asyncio.to_thread(manifest.save))
+        tracer.end_span(space_span, **page_counts)
+        logger.info(f"Found {listing_stats['pages_listed']} page summaries in space '{space_name}'.")
+
+        space_record = {
+            "type": "space",
+            "space_id": space_id,
+            "space_name": space_name,
+            "space_key": space_key,
+            "pages_found_in_summary": listing_stats["pages_listed"],
+            "pages_outside_date_window": listing_stats["pages_outside_date_window"],
+            **page_counts
+        }
+        if listing_stats.get("listing_error"):
+            space_record["error"] = f"Failed to list pages for space {space_id}: {listing_stats['listing_error']}"
+        yield space_record
+    finally:
+        await _release_space_lease(space_id)
+
+async def _collect_space_crawl(space_records: AsyncIterator[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Drains _iter_space_crawl_records, returning (space_record, page results in listing order)."""
+    page_results: Dict[int, Dict[str, Any]] = {}
+    space_record: Dict[str, Any] = {}
+    async for record in space_records:
+        if record["type"] == "page":
+            page_results[record["index"]] = record["page"]
+        elif record["type"] == "space":
+            space_record = record
+    return space_record, [page_results[index] for index in sorted(page_results)]
+
+def _format_stream_record(record: Dict[str, Any], stream_format: str) -> str:
+    """Serializes one streaming record as an NDJSON line or a server-sent event."""
+    payload = json.dumps(record, default=str)
+    if stream_format == "sse":
+        return f"event: {record.get('type', 'message')}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+def _streaming_records_response(records: AsyncIterator[Dict[str, Any]], stream_format: str, request_label: str) -> StreamingResponse:
+    """
+    Wraps an async iterator of records in a StreamingResponse. Errors raised after streaming has
+    started are reported as a final {"type": "error"} record, since the status code is already sent.
+    """
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for record in records:
+                yield _format_stream_record(record, stream_format)
+        except Exception as e:
+            logger.error(f"Error while streaming {request_label}: {e}", exc_info=True)
+            detail = "MCP authentication/connectivity error. Administrator action may be required." if is_mcp_auth_error(e) else str(e)
+            yield _format_stream_record({"type": "error", "detail": detail}, stream_format)
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+async def _iter_all_content_records(
+    server_name: str,
+    cloud_id: str,
+    spaces_list: List[Any],
+    incremental: bool,
+    date_window: Optional[DateWindow],
+    skip_page_ids: Optional[Set[str]] = None,
+    archive: Optional[ExportArchiveWriter] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Crawls every space in spaces_list one after another, yielding the page and space records of
+    _iter_space_crawl_records, and finishes with a {"type": "summary"} record of overall totals.
+    Spaces another worker is crawling are put off until the others are done, then waited for
+    (up to SPACE_LEASE_WAIT_SECONDS each).
+    """
+    totals = {"spaces_attempted": 0, "pages_saved": 0, "pages_failed": 0, "pages_skipped_unchanged": 0, "pages_skipped_checkpointed": 0}
+    logger.info(f"Found {len(spaces_list)} spaces. Processing each...")
+    busy_spaces: List[Dict[str, Any]] = []
+    crawl_queue = [(space_data, False) for space_data in spaces_list]
+
+    while crawl_queue or busy_spaces:
+        if not crawl_queue:
+            crawl_queue = [(space_data, True) for space_data in busy_spaces]
+            busy_spaces = []
+        space_data, waited_for_lease = crawl_queue.pop(0)
+        if not isinstance(space_data, dict):
+            logger.warning(f"Skipping non-dict item in spaces_response: {str(space_data)[:100]}")
+            continue
+
+        current_space_id = space_data.get("id")
+        current_space_name = space_data.get("name", f"space_{current_space_id}")
+        current_space_key = space_data.get("key")
+        if not waited_for_lease:
+            totals["spaces_attempted"] += 1
+
+        if not current_space_id:
+            logger.warning(f"Skipping space due to missing ID. Space data: {str(space_data)[:200]}")
+            yield {"type": "space", "space_id": None, "space_name": current_space_name, "error": "Missing space ID"}
+            continue
+
+        safe_space_name_for_path = "".join(c if c.isalnum() else '_' for c in current_space_name)
+        base_save_path = os.path.join(OUTPUT_DIR, "all_spaces_direct_tool", safe_space_name_for_path)
+        try:
+            async for record in _iter_space_crawl_records(
+                server_name=server_name,
+                cloud_id=cloud_id,
+                space_id=current_space_id,
+                space_name=current_space_name,
+                space_key=current_space_key,
+                base_save_path=base_save_path,
+                incremental=incremental,
+                date_window=date_window,
+                skip_page_ids=skip_page_ids,
+                archive=archive,
+                lease_wait_seconds=SPACE_LEASE_WAIT_SECONDS if waited_for_lease else 0.0
+            ):
+                if record["type"] == "space":
+                    for counter in ("pages_saved", "pages_failed", "pages_skipped_unchanged", "pages_skipped_checkpointed"):
+                        totals[counter] += record[counter]
+                yield record
+        except SpaceBusyError as e_busy:
+            if not waited_for_lease:
+                logger.info(f"Space '{current_space_name}' is being crawled by worker {e_busy.owner}; crawling it after the other spaces.")
+                busy_spaces.append(space_data)
+            else:
+                logger.warning(f"Gave up waiting for space '{current_space_name}': {e_busy}")
+                yield {
+                    "type": "space",
+                    "space_id": current_space_id,
+                    "space_name": current_space_name,
+                    "space_key": current_space_key,
+                    "pages_found_in_summary": 0,
+                    "error": str(e_busy)
+                }
+        except Exception as e_page_fetch_loop:
+            logger.error(f"Error in page fetching loop for space ID {current_space_id} ('{current_space_name}'): {e_page_fetch_loop}", exc_info=True)
+            yield {
+                "type": "space",
+                "space_id": current_space_id,
+                "space_name": current_space_name,
+                "space_key": current_space_key,
+                "pages_found_in_summary": 0,
+                "error": str(e_page_fetch_loop)
+            }
+
+    yield {"type": "summary", "total_spaces_scanned": len(spaces_list), **totals}
+
+# --- Single-file exports (export_format on the bulk endpoints) ---
+def _open_export_archive(export_format: Optional[str], incremental: bool, label: str) -> Optional[ExportArchiveWriter]:
+    """
+    Opens OUTPUT_DIR/exports/<label>_<timestamp>.<format> for an export request, or returns None if no
+    export was requested. Raises HTTPException(400) for unsupported combinations.
+    """
+    if not export_format:
+        return None
+    if incremental:
+        raise HTTPException(status_code=400, detail="incremental is not supported together with export_format; an export always contains every page.")
+    if not is_export_format_available(export_format):
+        raise HTTPException(status_code=400, detail=f"Export format '{export_format}' is not available (tar.zst requires the 'zstandard' package).")
+    safe_label = "".join(c if c.isalnum() else '_' for c in label)
+    archive_path = os.path.join(OUTPUT_DIR, "exports", f"{safe_label}_{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:6]}.{export_format}")
+    logger.info(f"Exporting {label} to {archive_path}")
+    return ExportArchiveWriter(archive_path, export_format)
+
+async def _iter_records_with_export(records: AsyncIterator[Dict[str, Any]], archive: ExportArchiveWriter) -> AsyncIterator[Dict[str, Any]]:
+    """Passes records through, then closes the archive and yields a final {"type": "export"} record."""
+    try:
+        async for record in records:
+            yield record
+    except BaseException:
+        await asyncio.shield(archive.close(complete=False))
+        raise
+    yield {"type": "export", **await archive.close()}
+
+# --- Recursive descendant crawl (used by /page/content with recursive=True) ---
+async def _list_child_pages(server_name: str, cloud_id: str, page_id: str) -> List[Dict[str, Any]]:
+    """
+    Returns the direct children of page_id via getConfluencePageDescendants (depth=1, all cursor pages).
+    Items that carry a parentId of a different page are dropped, in case the server ignores depth.
+    """
+    request_label = f"children of page {page_id}"
+    children = []
+    async for item in _iter_tool_results(server_name, "getConfluencePageDescendants", {"cloudId": cloud_id, "pageId": page_id, "depth": 1}, request_label):
+        if not isinstance(item, dict) or "id" not in item:
+            logger.warning(f"Skipping descendant summary due to missing ID or invalid format: {str(item)[:100]}")
+            continue
+        if item.get("parentId") is not None and str(item["parentId"]) != str(page_id):
+            continue
+        children.append(item)
+    return children
+
+async def _crawl_page_tree(
+    server_name: str,
+    cloud_id: str,
+    root_page_id: str,
+    base_save_dir: str,
+    max_depth: Optional[int],
+    max_pages: Optional[int],
+    date_window: Optional[DateWindow]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Breadth-first crawl of the page tree below root_page_id (the root itself is not fetched here).
+    Each level's pages are fetched, and their children listed, concurrently with at most
+    PAGE_FETCH_CONCURRENCY tool calls in flight. A visited set keeps pages reachable through more
+    than one path from being fetched twice. Pages are saved in nested page_<id>_children folders so
+    the layout on disk mirrors the tree. max_depth (1 = direct children) and max_pages (descendants
+    visited) bound the crawl; None means unlimited. Pages outside date_window are not fetched, but
+    their children are still visited.
+    Returns (per-page results in BFS order, crawl stats).
+    """
+    semaphore = asyncio.Semaphore(max(1, PAGE_FETCH_CONCURRENCY))
+    visited: Set[str] = {str(root_page_id)}
+    stats = {
+        "max_depth_reached": 0,
+        "pages_visited": 0,
+        "pages_outside_date_window": 0,
+        "duplicates_skipped": 0,
+        "truncated_by_max_pages": False,
+        "child_listing_errors": [],
+    }
+    results: List[Dict[str, Any]] = []
+    if max_depth == 0 or max_pages == 0:
+        return results, stats
+
+    async def list_children(page_id: str) -> List[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return await _list_child_pages(server_name, cloud_id, page_id)
+            except Exception as e:
+                logger.error(f"Failed to list children of page {page_id}: {e}", exc_info=not isinstance(e, ToolResponseError))
+                stats["child_listing_errors"].append({"page_id": page_id, "error": str(e)})
+                return []
+
+    async def fetch_page(node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if date_window and not is_page_in_date_window(node["summary"], date_window):
+            stats["pages_outside_date_window"] += 1
+            return None
+        async with semaphore:
+            page_result = await _fetch_and_save_page_content(
+                server_name=server_name,
+                cloud_id=cloud_id,
+                page_id=node["id"],
+                page_name_hint=node["summary"].get("title"),
+                base_save_dir=node["save_dir"]
+            )
+        if page_result:
+            page_result.update({"parent_id": node["parent_id"], "depth": node["depth"]})
+        return page_result
+
+    # Each frontier entry is (page_id, depth, folder its children are saved into).
+    frontier: List[Tuple[str, int, str]] = [(str(root_page_id), 0, os.path.join(base_save_dir, f"page_{root_page_id}_children"))]
+    pending_children = [asyncio.ensure_future(list_children(str(root_page_id)))]
+    try:
+        while frontier:
+            child_lists = await asyncio.gather(*pending_children)
+            level: List[Dict[str, Any]] = []
+            for (parent_id, parent_depth, children_dir), children in zip(frontier, child_lists):
+                for child in children:
+                    child_id = str(child["id"])
+                    if child_id in visited:
+                        stats["duplicates_skipped"] += 1
+                        continue
+                    if max_pages is not None and stats["pages_visited"] >= max_pages:
+                        stats["truncated_by_max_pages"] = True
+                        break
+                    visited.add(child_id)
+                    stats["pages_visited"] += 1
+                    level.append({"id": child_id, "summary": child, "parent_id": parent_id, "depth": parent_depth + 1, "save_dir": children_dir})
+            if not level:
+                break
+
+            depth = level[0]["depth"]
+            stats["max_depth_reached"] = depth
+            expand = (max_depth is None or depth < max_depth) and not stats["truncated_by_max_pages"]
+            logger.info(f"Descendant crawl of page {root_page_id}: depth {depth} has {len(level)} new pages{'' if expand else ' (last level)'}.")
+            frontier = [(node["id"], depth, os.path.join(node["save_dir"], f"page_{node['id']}_children")) for node in level] if expand else []
+            # Children of this level are listed while its pages are being fetched.
+            pending_children = [asyncio.ensure_future(list_children(node_id)) for node_id, _, _ in frontier]
+            page_results = await asyncio.gather(*(fetch_page(node) for node in level))
+            results.extend(result for result in page_results if result)
+    finally:
+        for task in pending_children:
+            task.cancel()
+
+    return results, stats
+
+# --- Background crawl jobs ---
+def _enqueue_job(job_id: str) -> None:
+    """Queues job_id on this worker unless it is already queued or running here."""
+    if job_id not in local_job_ids:
+        local_job_ids.add(job_id)
+        job_queue.put_nowait(job_id)
+
+def _job_space_save_path(job: Dict[str, Any], space_name: str) -> str:
+    safe_space_name_for_path = "".join(c if c.isalnum() else '_' for c in space_name)
+    subdir = "spaces_direct_tool" if job["job_type"] == "space_content" else "all_spaces_direct_tool"
+    return os.path.join(OUTPUT_DIR, subdir, safe_space_name_for_path)
+
+async def _crawl_job_space(
+    job: Dict[str, Any],
+    job_space: Dict[str, Any],
+    server_name: str,
+    cloud_id: str,
+    date_window: Optional[DateWindow],
+    checkpointed_page_ids: Set[str]
+) -> None:
+    """
+    Crawls one pending space of a job (the caller holds the space's lease), checkpointing saved
+    page ids in batches, and marks the space done. Pages saved by an earlier attempt stay counted;
+    failures and skips are counted afresh. Errors fail a single-space job; in an all-spaces job
+    they are recorded on the space and the job moves on.
+    """
+    job_id, space_id = job["id"], job_space["space_id"]
+    counters = {"pages_saved": job_space["pages_saved"], "pages_failed": 0, "pages_skipped": 0}
+    pending_checkpoints: List[str] = []
+
+    async def flush_progress() -> None:
+        if pending_checkpoints:
+            await asyncio.to_thread(job_store.add_checkpoints, job_id, list(pending_checkpoints))
+            pending_checkpoints.clear()
+        await asyncio.to_thread(job_store.update_space_progress, job_id, space_id, **counters)
+
+    space_error = None
+    try:
+        async for record in _iter_space_crawl_records(
+            server_name=server_name,
+            cloud_id=cloud_id,
+            space_id=space_id,
+            space_name=job_space["space_name"],
+            space_key=job_space["space_key"],
+            base_save_path=_job_space_save_path(job, job_space["space_name"]),
+            incremental=job["params"].get("incremental", False),
+            date_window=date_window,
+            skip_page_ids=checkpointed_page_ids
+        ):
+            if record["type"] == "page":
+                page_result = record["page"]
+                if page_result.get("saved"):
+                    counters["pages_saved"] += 1
+                    pending_checkpoints.append(str(page_result.get("id")))
+                elif page_result.get("skip_reason") == "unchanged":
+                    counters["pages_skipped"] += 1
+                elif not page_result.get("skipped"):
+                    counters["pages_failed"] += 1
+                if len(pending_checkpoints) >= JOB_CHECKPOINT_BATCH_SIZE:
+                    await flush_progress()
+            elif record["type"] == "space":
+                space_error = record.get("error")
+    except asyncio.CancelledError:
+        await asyncio.shield(flush_progress())
+        raise
+    except Exception as e:
+        await flush_progress()
+        if job["job_type"] == "space_content":
+            raise
+        logger.error(f"Job {job_id}: error crawling space {space_id} ('{job_space['space_name']}'): {e}", exc_info=True)
+        space_error = str(e)
+    else:
+        await flush_progress()
+    await asyncio.to_thread(job_store.mark_space_done, job_id, space_id, space_error)
+
+async def _run_crawl_job(job_id: str) -> None:
+    """
+    Works on one crawl job: registers its spaces on first run, then crawls each pending space this
+    worker can lease, leaving spaces leased by other workers to them. Whichever worker finishes the
+    last space marks the job completed. Pages checkpointed by an earlier, interrupted attempt are
+    skipped. If the task is cancelled (e.g. at shutdown) the job stays 'running' and is resumed on
+    the next startup, or sooner by another worker (see _job_poller).
+    """
+    job = await asyncio.to_thread(job_store.get_job, job_id)
+    if not job:
+        logger.warning(f"Job {job_id} not found in job store; skipping.")
+        return
+    if job["status"] not in (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING):
+        logger.info(f"Job {job_id} is already {job['status']}; skipping.")
+        return
+
+    params = job["params"]
+    if not await asyncio.to_thread(job_store.mark_running, job_id):
+        return
+    try:
+        server_name_for_calls = None
+        if ATLASSIAN_MCP_SERVER_CONFIG.get("mcpServers"):
+            server_name_for_calls = list(ATLASSIAN_MCP_SERVER_CONFIG["mcpServers"].keys())[0]
+        if not server_name_for_calls:
+            raise RuntimeError("Server configuration error for tool execution.")
+
+        cloud_id = await _get_cloud_id()
+        if not cloud_id:
+            raise RuntimeError("Failed to retrieve necessary Cloud ID from Atlassian.")
+
+        job_spaces = await asyncio.to_thread(job_store.list_job_spaces, job_id)
+        if not job_spaces:
+            if params.get("space_name"):
+                space_obj = await _resolve_space(server_name_for_calls, cloud_id, params["space_name"])
+                spaces = [{"id": space_obj["id"], "name": params["space_name"], "key": space_obj.get("key")}]
+            else:
+                spaces_list = await _get_confluence_spaces(server_name_for_calls, cloud_id, f"job {job_id}")
+                spaces = [
+                    {"id": space_data["id"], "name": space_data.get("name", f"space_{space_data['id']}"), "key": space_data.get("key")}
+                    for space_data in spaces_list if isinstance(space_data, dict) and space_data.get("id")
+                ]
+            await asyncio.to_thread(job_store.add_job_spaces, job_id, spaces)
+            job_spaces = await asyncio.to_thread(job_store.list_job_spaces, job_id)
+
+        checkpointed_page_ids = await asyncio.to_thread(job_store.get_checkpointed_page_ids, job_id)
+        if checkpointed_page_ids:
+            logger.info(f"Resuming job {job_id}: {len(checkpointed_page_ids)} pages already checkpointed.")
+        date_window = parse_date_window(params.get("start_date"), params.get("end_date"))
+
+        for job_space in job_spaces:
+            if job_space["status"] != JOB_SPACE_STATUS_PENDING:
+                continue
+            space_id = job_space["space_id"]
+            try:
+                await _acquire_space_lease(space_id, job_space["space_name"])
+            except SpaceBusyError as e_busy:
+                logger.info(f"Job {job_id}: space '{job_space['space_name']}' is being crawled by worker {e_busy.owner}; leaving it to that worker.")
+                continue
+            try:
+                # Another worker may have finished the space, or failed the job, since the listing.
+                current_space = await asyncio.to_thread(job_store.get_job_space, job_id, space_id)
+                current_job = await asyncio.to_thread(job_store.get_job, job_id)
+                if current_job["status"] != JOB_STATUS_RUNNING:
+                    logger.info(f"Job {job_id} is now {current_job['status']}; stopping.")
+                    return
+                if current_space and current_space["status"] == JOB_SPACE_STATUS_PENDING:
+                    await _crawl_job_space(job, current_space, server_name_for_calls, cloud_id, date_window, checkpointed_page_ids)
+            finally:
+                await _release_space_lease(space_id)
+
+        if await asyncio.to_thread(job_store.complete_if_all_spaces_done, job_id):
+            job = await asyncio.to_thread(job_store.get_job, job_id)
+            totals = {name: job[name] for name in ("spaces_completed", "pages_saved", "pages_failed", "pages_skipped")}
+            logger.info(f"Job {job_id} completed: {totals}")
+        else:
+            logger.info(f"Job {job_id}: this worker has no more spaces to crawl; the rest are with other workers.")
+    except asyncio.CancelledError:
+        logger.info(f"Job {job_id} interrupted; it will resume from its checkpoint.")
+        raise
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+        await asyncio.to_thread(job_store.mark_finished, job_id, JOB_STATUS_FAILED, str(e))
+
+async def _job_worker(worker_number: int) -> None:
+    """Pulls job ids from job_queue and runs them one at a time."""
+    logger.info(f"Job worker {worker_number} started.")
+    while True:
+        job_id = await job_queue.get()
+        try:
+            with tracer.span("crawl_job", parent=None, job_id=job_id):
+                await _run_crawl_job(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job worker {worker_number} crashed on job {job_id}: {e}", exc_info=True)
+        finally:
+            local_job_ids.discard(job_id)
+            job_queue.task_done()
+
+def _claimable_job_ids() -> List[str]:
+    """Unfinished jobs that have not registered their spaces yet or have a pending space no worker holds a lease on."""
+    leased_space_ids = {lease["name"].partition(":")[2] for lease in shared_state.list_leases("space:")} if shared_state else set()
+    claimable = []
+    for job_id in job_store.list_resumable_job_ids():
+        job_spaces = job_store.list_job_spaces(job_id)
+        if not job_spaces or any(job_space["status"] == JOB_SPACE_STATUS_PENDING and job_space["space_id"] not in leased_space_ids for job_space in job_spaces):
+            claimable.append(job_id)
+    return claimable
+
+async def _job_poller() -> None:
+    """
+    Every JOB_POLL_INTERVAL_SECONDS, queues the unfinished jobs (from any worker) that have spaces
+    nobody is crawling, so the workers of a deployment share each job's spaces and take over the
+    spaces of a worker that has died once its leases expire.
+    """
+    while True:
+        await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+        try:
+            for job_id in await asyncio.to_thread(_claimable_job_ids):
+                _enqueue_job(job_id)
+        except Exception as e:
+            logger.error(f"Job poller failed to check the job store: {e}", exc_info=True)
+
 # --- API Endpoints ---
+@app.get("/ready", response_model=ContentResponse, tags=["Health"])
+async def ready_api():
+    """Readiness probe: 200 once warm-up has finished and at least one MCP session is healthy, 503 otherwise."""
+    state = dict(readiness_state)
+    state["worker_id"] = worker_id
+    if isinstance(use_tool_executor_instance, MCPSessionPool):
+        state["healthy_sessions"] = use_tool_executor_instance.healthy_member_count()
+    if rate_limiter:
+        state["rate_limiter"] = rate_limiter.describe()
+    if circuit_breaker:
+        state["circuit_breaker"] = circuit_breaker.describe()
+    if not state.get("ready") or not state.get("healthy_sessions"):
+        raise HTTPException(status_code=503, detail=state)
+    return ContentResponse(data=state, message="Service is ready.")
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics_api():
+    """Prometheus text exposition of request, tool call, file save, cache and error metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/traces", response_model=ContentResponse, tags=["Health"])
+async def debug_traces_api(limit: int = 10, name: Optional[str] = None):
+    """
+    The slowest of the recently finished traces (at most TRACE_BUFFER_SIZE are kept), slowest first,
+    each with its spans nested as a tree. name filters on the root span name, e.g. "/space/content".
+    Traces are kept per worker process: only those of the worker answering are returned.
+    """
+    if not tracer.enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled (TRACING_ENABLED).")
+    traces = tracer.recent_traces(limit=max(1, min(limit, 100)), name_contains=name)
+    return ContentResponse(
+        data=[{**{key: value for key, value in trace.items() if key != "spans"}, "worker_id": worker_id, "spans": build_span_tree(trace)} for trace in traces],
+        message=f"{len(traces)} slowest recent trace(s) of worker {worker_id}."
+    )
+
+@app.post("/cache/invalidate", response_model=ContentResponse, tags=["Cache"])
+async def invalidate_cache_api():
+    """Drops the cached Cloud ID and space directory so the next request refetches them."""
+    await directory_cache.invalidate()
+    return ContentResponse(message="Cloud ID and space directory cache invalidated.")
+
+@app.post("/content-store/prune", response_model=ContentResponse, tags=["Content Store"])
+async def prune_content_store_api():
+    """Deletes blobs that no saved output file links to any more (old page versions), except recent ones."""
+    if not content_store:
+        raise HTTPException(status_code=404, detail="Content store is not enabled.")
+    removed = await asyncio.to_thread(content_store.prune_unreferenced, CONTENT_STORE_PRUNE_GRACE_SECONDS)
+    return ContentResponse(data={"blobs_removed": removed, "stats": dict(content_store.stats)}, message=f"Pruned {removed} unreferenced blobs.")
+
 @app.post("/space/content", response_model=ContentResponse, tags=["Confluence Content"])
 async def get_space_content_api(request: SpaceContentRequest):
     global use_tool_executor_instance
     if not use_tool_executor_instance:
-        logger.error("UseToolFromServerTool executor not initialized. Cannot get space content.")
+        logger.error("MCP session pool not initialized. Cannot get space content.")
         raise HTTPException(status_code=503, detail="Tool executor not initialized.")
+    _raise_if_circuit_open()
 
     if not request.space_name:
         raise HTTPException(status_code=400, detail="space_name is required.")
+    date_window = _resolve_date_window(request.start_date, request.end_date)
 
     server_name_for_calls = None
     if ATLASSIAN_MCP_SERVER_CONFIG.get("mcpServers"):
@@ -392,104 +1749,58 @@ async def get_space_content_api(request: SpaceContentRequest):
             logger.error(f"Failed to retrieve Cloud ID for space content request (space_name: {request.space_name}).")
             raise HTTPException(status_code=503, detail="Failed to retrieve necessary Cloud ID from Atlassian.")
 
-        spaces_tool_name = "getConfluenceSpaces"
-        logger.info(f"Fetching all spaces to find ID for space name: '{request.space_name}' via executor (server: {server_name_for_calls}, tool: {spaces_tool_name})")
-        
-        spaces_response_str = await use_tool_executor_instance._arun(
+        space_obj = await _resolve_space(server_name_for_calls, cloud_id, request.space_name)
+        found_space_id = space_obj["id"]
+        # Checked here so a stream is refused up front rather than failing after its 200.
+        lease_holder = await _space_lease_holder(found_space_id)
+        if lease_holder:
+            raise SpaceBusyError(request.space_name, lease_holder)
+
+        safe_space_name_for_path = "".join(c if c.isalnum() else '_' for c in request.space_name)
+        base_save_path = os.path.join(OUTPUT_DIR, "spaces_direct_tool", safe_space_name_for_path)
+        archive = _open_export_archive(request.export_format, request.incremental, f"space_{request.space_name}")
+        space_records = _iter_space_crawl_records(
             server_name=server_name_for_calls,
-            tool_name=spaces_tool_name,
-            tool_input={"cloudId": cloud_id}
+            cloud_id=cloud_id,
+            space_id=found_space_id,
+            space_name=request.space_name,
+            space_key=space_obj.get("key"),
+            base_save_path=base_save_path,
+            incremental=request.incremental,
+            date_window=date_window,
+            archive=archive
         )
-        
-        try:
-            spaces_response = json.loads(spaces_response_str)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response from {spaces_tool_name}: {spaces_response_str[:200]}")
-            if "not found" in spaces_response_str.lower() or "error" in spaces_response_str.lower():
-                logger.error(f"Error message from UseToolFromServerTool execution of {spaces_tool_name}: {spaces_response_str}")
-            raise HTTPException(status_code=500, detail=f"Error retrieving space list (parsing failed) for {request.space_name}")
-        
-        if isinstance(spaces_response, dict) and 'results' in spaces_response and isinstance(spaces_response['results'], list):
-            spaces_list = spaces_response['results']
-            for space_obj in spaces_list:
-                if isinstance(space_obj, dict):
-                    s_name = space_obj.get("name")
-                    s_key = space_obj.get("key") 
-                    s_id = space_obj.get("id")
-                    if s_id and ((s_name and s_name.lower() == request.space_name.lower()) or \
-                                  (s_key and s_key.lower() == request.space_name.lower())):
-                        found_space_id = s_id
-                        logger.info(f"Found spaceId: {found_space_id} for spaceName: {request.space_name}")
-                        break
-            if not found_space_id:
-                logger.warning(f"Could not find spaceId for space name: '{request.space_name}'. Available spaces checked: {len(spaces_list)}")
-                raise HTTPException(status_code=404, detail=f"Space '{request.space_name}' not found or ID could not be resolved.")
-        else:
-            logger.error(f"Unexpected response structure from {spaces_tool_name} after parsing. Expected dict with 'results' list. Got: {str(spaces_response)[:200]}")
-            raise HTTPException(status_code=500, detail=f"Error retrieving space list for {request.space_name} (unexpected structure).")
+        if archive:
+            space_records = _iter_records_with_export(space_records, archive)
+        if request.stream:
+            return _streaming_records_response(space_records, request.stream, f"space '{request.space_name}'")
 
-        pages_tool_name = "getPagesInConfluenceSpace"
-        pages_tool_params = {"cloudId": cloud_id, "spaceId": found_space_id}
-        logger.info(f"Fetching pages for spaceId: {found_space_id} via executor (server: {server_name_for_calls}, tool: {pages_tool_name})")
-        
-        pages_response_str = await use_tool_executor_instance._arun(
-            server_name=server_name_for_calls,
-            tool_name=pages_tool_name,
-            tool_input=pages_tool_params
-        )
+        space_record, all_pages_data = await _collect_space_crawl(space_records)
+        if space_record.get("error") and not space_record["pages_found_in_summary"]:
+            _raise_if_circuit_open()
+            raise HTTPException(status_code=500, detail=f"Error retrieving pages for space ID {found_space_id}: {space_record['error']}")
 
-        try:
-            pages_response = json.loads(pages_response_str)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response from {pages_tool_name} for space {found_space_id}: {pages_response_str[:200]}")
-            if "not found" in pages_response_str.lower() or "error" in pages_response_str.lower():
-                logger.error(f"Error message from UseToolFromServerTool execution of {pages_tool_name} for space {found_space_id}: {pages_response_str}")
-            raise HTTPException(status_code=500, detail=f"Error retrieving pages for space ID {found_space_id} (parsing failed).")
-
-        if isinstance(pages_response, dict) and 'results' in pages_response and isinstance(pages_response['results'], list):
-            page_summaries_list = pages_response['results']
-            logger.info(f"Found {len(page_summaries_list)} page summaries in spaceId: {found_space_id}.")
-            
-            # TEMPORARY LOGGING: Add this to see the structure
-            if page_summaries_list:
-                logger.info(f"FIRST PAGE SUMMARY DETAILS: {str(page_summaries_list[0])}") 
-
-            safe_space_name_for_path = "".join(c if c.isalnum() else '_' for c in request.space_name)
-            base_save_path = os.path.join(OUTPUT_DIR, "spaces_direct_tool", safe_space_name_for_path)
-
-            for page_data in page_summaries_list:
-                if isinstance(page_data, dict):
-                    page_id = page_data.get("id")
-                    page_title = page_data.get("title", f"page_{page_id}")
-                    
-                    if page_id:
-                        # Fetch full page content for each page ID
-                        logger.info(f"Fetching full content for page '{page_title}' (ID: {page_id}) in space '{request.space_name}'")
-                        page_content_details = await _fetch_and_save_page_content(
-                            server_name=server_name_for_calls,
-                            cloud_id=cloud_id,
-                            page_id=page_id,
-                            page_name_hint=page_title,
-                            base_save_dir=base_save_path
-                        )
-                        if page_content_details and page_content_details.get("saved"):
-                            all_pages_data.append(page_content_details)
-                        else:
-                            logger.warning(f"Could not fetch or save content for page ID {page_id} in space '{request.space_name}'. Details: {page_content_details}")
-                            all_pages_data.append({"id": page_id, "title": page_title, "saved": False, "error": page_content_details.get("error") if page_content_details else "Unknown error fetching page"})
-                    else:
-                        logger.warning(f"Skipping page in space '{request.space_name}' due to missing ID. Page summary data: {str(page_data)[:200]}")
-            
-            return ContentResponse(
-                data={"space_id": found_space_id, "space_name": request.space_name, "pages_processed": len(all_pages_data), "page_details": all_pages_data},
-                message=f"Content for space '{request.space_name}' (ID: {found_space_id}) processed. {len(all_pages_data)} pages saved."
-            )
-        else:
-            logger.error(f"Unexpected response structure from {pages_tool_name} for spaceId {found_space_id} after parsing. Expected dict with 'results' list. Got: {str(pages_response)[:200]}")
-            raise HTTPException(status_code=500, detail=f"Error retrieving pages for space ID {found_space_id} (unexpected structure).")
+        pages_skipped = space_record["pages_skipped_unchanged"]
+        return ContentResponse(
+            data={
+                "space_id": found_space_id,
+                "space_name": request.space_name,
+                "pages_listed": space_record["pages_found_in_summary"],
+                "pages_processed": len(all_pages_data),
+                "pages_skipped_unchanged": pages_skipped,
+                "pages_outside_date_window": space_record["pages_outside_date_window"],
+                "listing_error": space_record.get("error"),
+                "export": archive.summary() if archive else None,
+                "page_details": all_pages_data
+            },
+            message=f"Content for space '{request.space_name}' (ID: {found_space_id}) processed. {space_record['pages_saved']} pages saved, {pages_skipped} unchanged pages skipped, {space_record['pages_failed']} failed."
+        )
 
     except HTTPException:
         raise
+    except SpaceBusyError as e:
+        logger.info(f"Refusing /space/content for '{request.space_name}': {e}")
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": str(SPACE_LEASE_TTL_SECONDS)})
     except Exception as e:
         logger.error(f"Error in /space/content for space_name '{request.space_name}': {e}", exc_info=True)
         if is_mcp_auth_error(e):
@@ -502,14 +1813,20 @@ async def get_space_content_api(request: SpaceContentRequest):
 async def get_page_content_api(request: PageContentRequest):
     global use_tool_executor_instance
     if not use_tool_executor_instance:
-        logger.error("UseToolFromServerTool executor not initialized. Cannot get page content.")
+        logger.error("MCP session pool not initialized. Cannot get page content.")
         raise HTTPException(status_code=503, detail="Tool executor not initialized.")
+    _raise_if_circuit_open()
 
     if not request.page_id and not request.page_name:
         raise HTTPException(status_code=400, detail="Either page_id or page_name must be provided.")
     
     if request.recursive and not request.page_id:
         raise HTTPException(status_code=400, detail="page_id is required for recursive fetching.")
+    for limit_name, limit_value in (("max_depth", request.max_depth), ("max_pages", request.max_pages)):
+        if limit_value is not None and limit_value < 0:
+            raise HTTPException(status_code=400, detail=f"{limit_name} must not be negative.")
+    # The explicitly requested page is always fetched; the window applies to its descendants.
+    date_window = _resolve_date_window(request.start_date, request.end_date)
 
     server_name_for_calls = None
     if ATLASSIAN_MCP_SERVER_CONFIG.get("mcpServers"):
@@ -547,51 +1864,27 @@ async def get_page_content_api(request: PageContentRequest):
             base_save_dir=base_save_dir_for_endpoint
         )
         if main_page_data:
+            if request.recursive:
+                main_page_data.update({"parent_id": None, "depth": 0})
             processed_pages_data.append(main_page_data)
 
+        crawl_stats = None
         if request.recursive and target_page_id: # Ensure target_page_id is available for recursive calls
-            logger.info(f"Recursive fetch requested for page ID: {target_page_id}. Fetching descendants.")
-            descendants_tool_name = "getConfluencePageDescendants"
-            descendants_params = {"cloudId": cloud_id, "pageId": target_page_id}
-            
-            descendants_response_str = await use_tool_executor_instance._arun(
+            logger.info(f"Recursive fetch requested for page ID: {target_page_id}. Crawling descendants (max_depth={request.max_depth}, max_pages={request.max_pages}).")
+            descendant_pages_data, crawl_stats = await _crawl_page_tree(
                 server_name=server_name_for_calls,
-                tool_name=descendants_tool_name,
-                tool_input=descendants_params
+                cloud_id=cloud_id,
+                root_page_id=target_page_id,
+                base_save_dir=base_save_dir_for_endpoint,
+                max_depth=request.max_depth,
+                max_pages=request.max_pages,
+                date_window=date_window
             )
+            processed_pages_data.extend(descendant_pages_data)
+            logger.info(f"Descendant crawl of page {target_page_id} finished: {crawl_stats}")
 
-            try:
-                descendants_response = json.loads(descendants_response_str)
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON response from {descendants_tool_name} for page {target_page_id}: {descendants_response_str[:200]}")
-                if "not found" in descendants_response_str.lower() or "error" in descendants_response_str.lower():
-                    logger.error(f"Error message from UseToolFromServerTool for {descendants_tool_name} on page {target_page_id}: {descendants_response_str}")
-                # Logged error, but continue to return data for main page if fetched
-            else:
-                if isinstance(descendants_response, list):
-                    logger.info(f"Found {len(descendants_response)} descendants for page ID: {target_page_id}.")
-                    for descendant_summary in descendants_response:
-                        if isinstance(descendant_summary, dict) and "id" in descendant_summary:
-                            descendant_id = descendant_summary["id"]
-                            descendant_title_hint = descendant_summary.get("title")
-                            logger.info(f"Fetching content for descendant page ID: {descendant_id}")
-                            descendant_page_data = await _fetch_and_save_page_content(
-                                server_name=server_name_for_calls,
-                                cloud_id=cloud_id, 
-                                page_id=descendant_id, 
-                                page_name_hint=descendant_title_hint, 
-                                base_save_dir=base_save_dir_for_endpoint, 
-                                parent_page_id_for_path=target_page_id 
-                            )
-                            if descendant_page_data:
-                                processed_pages_data.append(descendant_page_data)
-                        else:
-                            logger.warning(f"Skipping descendant summary due to missing ID or invalid format: {str(descendant_summary)[:100]}")
-                else:
-                    logger.warning(f"Unexpected response type from {descendants_tool_name} for page ID {target_page_id} after parsing: {type(descendants_response)}. Response: {str(descendants_response)[:200]}")
-        
         return ContentResponse(
-            data={"pages_processed_details": processed_pages_data, "recursive_request": request.recursive},
+            data={"pages_processed_details": processed_pages_data, "recursive_request": request.recursive, "descendant_crawl": crawl_stats},
             message=f"Page content retrieval complete. Processed {len(processed_pages_data)} page(s)."
         )
 
@@ -609,8 +1902,9 @@ async def get_page_content_api(request: PageContentRequest):
 async def get_all_spaces_content_api(request: AllContentRequest):
     global use_tool_executor_instance
     if not use_tool_executor_instance:
-        logger.error("UseToolFromServerTool executor not initialized. Cannot get all content.")
+        logger.error("MCP session pool not initialized. Cannot get all content.")
         raise HTTPException(status_code=503, detail="Tool executor not initialized.")
+    _raise_if_circuit_open()
 
     server_name_for_calls = None
     if ATLASSIAN_MCP_SERVER_CONFIG.get("mcpServers"):
@@ -620,6 +1914,7 @@ async def get_all_spaces_content_api(request: AllContentRequest):
         raise HTTPException(status_code=500, detail="Server configuration error for tool execution.")
 
     processed_spaces_summary = []
+    date_window = _resolve_date_window(request.start_date, request.end_date)
 
     try:
         cloud_id = await _get_cloud_id()
@@ -627,128 +1922,34 @@ async def get_all_spaces_content_api(request: AllContentRequest):
             logger.error("Failed to retrieve Cloud ID for all content request.")
             raise HTTPException(status_code=503, detail="Failed to retrieve necessary Cloud ID from Atlassian.")
 
-        spaces_tool_name = "getConfluenceSpaces"
-        logger.info(f"Fetching all spaces for cloudId: {cloud_id} via executor (server: {server_name_for_calls}, tool: {spaces_tool_name})")
-        
-        spaces_response_str = await use_tool_executor_instance._arun(
+        spaces_list = await _get_confluence_spaces(server_name_for_calls, cloud_id, "all content")
+        archive = _open_export_archive(request.export_format, request.incremental, "all_spaces")
+        content_records = _iter_all_content_records(
             server_name=server_name_for_calls,
-            tool_name=spaces_tool_name,
-            tool_input={"cloudId": cloud_id}
+            cloud_id=cloud_id,
+            spaces_list=spaces_list,
+            incremental=request.incremental,
+            date_window=date_window,
+            archive=archive
         )
+        if archive:
+            content_records = _iter_records_with_export(content_records, archive)
+        if request.stream:
+            return _streaming_records_response(content_records, request.stream, "all content")
+
+        page_results: Dict[int, Dict[str, Any]] = {}
+        async for record in content_records:
+            if record["type"] == "page":
+                page_results[record["index"]] = record["page"]
+            elif record["type"] == "space":
+                space_summary = {key: value for key, value in record.items() if key != "type"}
+                if space_summary.get("space_id"):
+                    space_summary["page_fetch_details"] = [page_results[index] for index in sorted(page_results)]
+                processed_spaces_summary.append(space_summary)
+                page_results = {}
 
-        try:
-            spaces_response = json.loads(spaces_response_str)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response from {spaces_tool_name} (all content): {spaces_response_str[:200]}")
-            if "not found" in spaces_response_str.lower() or "error" in spaces_response_str.lower():
-                logger.error(f"Error message from UseToolFromServerTool for {spaces_tool_name} (all content): {spaces_response_str}")
-            raise HTTPException(status_code=500, detail="Error retrieving space list for all content (parsing failed).")
-        
-        if not (isinstance(spaces_response, dict) and 'results' in spaces_response and isinstance(spaces_response['results'], list)):
-            logger.error(f"Unexpected response structure from {spaces_tool_name} when fetching all spaces (parsed). Expected dict with 'results' list. Got: {str(spaces_response)[:200]}")
-            raise HTTPException(status_code=500, detail="Error retrieving space list for all content (unexpected structure).")
-
-        spaces_list = spaces_response['results']
-        logger.info(f"Found {len(spaces_list)} spaces. Processing each...")
-
-        for space_data in spaces_list:
-            if not isinstance(space_data, dict):
-                logger.warning(f"Skipping non-dict item in spaces_response: {str(space_data)[:100]}")
-                continue
-            
-            current_space_id = space_data.get("id")
-            current_space_name = space_data.get("name", f"space_{current_space_id}")
-            current_space_key = space_data.get("key")
-            pages_in_current_space_count = 0 # Renamed to avoid conflict with pages_response list later
-            current_space_page_fetch_details = [] 
-            
-            if not current_space_id:
-                logger.warning(f"Skipping space due to missing ID. Space data: {str(space_data)[:200]}")
-                processed_spaces_summary.append({"space_id": None, "space_name": current_space_name, "error": "Missing space ID"})
-                continue
-
-            logger.info(f"Fetching pages for space: '{current_space_name}' (ID: {current_space_id}, Key: {current_space_key}) via executor")
-            
-            pages_tool_name = "getPagesInConfluenceSpace"
-            pages_tool_params = {"cloudId": cloud_id, "spaceId": current_space_id}
-            try:
-                pages_list_response_str = await use_tool_executor_instance._arun(
-                    server_name=server_name_for_calls,
-                    tool_name=pages_tool_name,
-                    tool_input=pages_tool_params
-                )
-
-                try:
-                    pages_list_response = json.loads(pages_list_response_str) # This is a list of page summaries
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to parse JSON from {pages_tool_name} for space {current_space_id}: {pages_list_response_str[:200]}")
-                    if "not found" in pages_list_response_str.lower() or "error" in pages_list_response_str.lower():
-                        logger.error(f"Error message from UseToolFromServerTool for {pages_tool_name}, space {current_space_id}: {pages_list_response_str}")
-                    processed_spaces_summary.append({
-                        "space_id": current_space_id, 
-                        "space_name": current_space_name, 
-                        "space_key": current_space_key,
-                        "pages_found_and_processed": 0,
-                        "error": f"Failed to parse pages list for space {current_space_id}"
-                    })
-                    continue 
-
-                if isinstance(pages_list_response, dict) and 'results' in pages_list_response and isinstance(pages_list_response['results'], list):
-                    page_summary_list_for_space = pages_list_response['results']
-                    pages_in_current_space_count = len(page_summary_list_for_space)
-                    logger.info(f"Found {pages_in_current_space_count} page summaries in space '{current_space_name}'. Fetching full content for each.")
-                    
-                    safe_space_name_for_path = "".join(c if c.isalnum() else '_' for c in current_space_name)
-                    base_save_path = os.path.join(OUTPUT_DIR, "all_spaces_direct_tool", safe_space_name_for_path)
-
-                    for page_summary_item in page_summary_list_for_space: 
-                        if isinstance(page_summary_item, dict):
-                            page_id = page_summary_item.get("id")
-                            page_title = page_summary_item.get("title", f"page_{page_id}")
-                            
-                            if page_id:
-                                logger.info(f"Fetching full content for page '{page_title}' (ID: {page_id}) in space '{current_space_name}' (all content endpoint)")
-                                page_content_details = await _fetch_and_save_page_content(
-                                    server_name=server_name_for_calls,
-                                    cloud_id=cloud_id,
-                                    page_id=page_id,
-                                    page_name_hint=page_title,
-                                    base_save_dir=base_save_path
-                                )
-                                if page_content_details:
-                                    current_space_page_fetch_details.append(page_content_details)
-                                else:
-                                    # This case should ideally be handled within _fetch_and_save_page_content which returns a dict
-                                    logger.error(f"_fetch_and_save_page_content returned None for page ID {page_id}")
-                                    current_space_page_fetch_details.append({"id": page_id, "title": page_title, "saved": False, "error": "Helper function returned None"})
-                            else:
-                                logger.warning(f"Skipping page in space '{current_space_name}' due to missing ID in summary. Page summary: {str(page_summary_item)[:100]}")
-                                current_space_page_fetch_details.append({"id": None, "title": "Unknown (missing ID)", "saved": False, "error": "Missing ID in page summary"})
-                        else:
-                            logger.warning(f"Unexpected item type in page summary list for space '{current_space_name}': {type(page_summary_item)}")
-                else:
-                    logger.error(f"Unexpected response from {pages_tool_name} for spaceId {current_space_id} after parsing: {str(pages_list_response)[:200]}")
-                
-                processed_spaces_summary.append({
-                    "space_id": current_space_id, 
-                    "space_name": current_space_name, 
-                    "space_key": current_space_key,
-                    "pages_found_in_summary": pages_in_current_space_count,
-                    "page_fetch_details": current_space_page_fetch_details 
-                })
-
-            except Exception as e_page_fetch_loop: 
-                logger.error(f"Error in page fetching loop for space ID {current_space_id} ('{current_space_name}'): {e_page_fetch_loop}", exc_info=True)
-                processed_spaces_summary.append({
-                    "space_id": current_space_id, 
-                    "space_name": current_space_name, 
-                    "space_key": current_space_key,
-                    "pages_found_in_summary": 0,
-                    "error": str(e_page_fetch_loop)
-                })
-        
         return ContentResponse(
-            data={"total_spaces_scanned": len(spaces_list), "spaces_summary": processed_spaces_summary},
+            data={"total_spaces_scanned": len(spaces_list), "export": archive.summary() if archive else None, "spaces_summary": processed_spaces_summary},
             message=f"Processed all accessible spaces. {len(processed_spaces_summary)} spaces attempted."
         )
 
@@ -762,6 +1963,35 @@ async def get_all_spaces_content_api(request: AllContentRequest):
             raise HTTPException(status_code=503, detail=admin_message)
         raise HTTPException(status_code=500, detail=f"Error processing all content request: {str(e)}")
 
+@app.post("/jobs", response_model=ContentResponse, status_code=202, tags=["Jobs"])
+async def create_job_api(request: JobRequest):
+    """Queues a background crawl of one space (space_name set) or of all spaces, and returns its job id."""
+    global use_tool_executor_instance
+    if not job_store or job_queue is None:
+        raise HTTPException(status_code=503, detail="Job subsystem not initialized.")
+    if not use_tool_executor_instance:
+        logger.error("MCP session pool not initialized. Cannot run jobs.")
+        raise HTTPException(status_code=503, detail="Tool executor not initialized.")
+    _resolve_date_window(request.start_date, request.end_date)
+
+    params = request.model_dump() if hasattr(request, "model_dump") else request.dict()
+    job_type = "space_content" if request.space_name else "all_content"
+    job_id = await asyncio.to_thread(job_store.create_job, job_type, params)
+    _enqueue_job(job_id)
+    logger.info(f"Queued {job_type} job {job_id} with params {params}")
+    return ContentResponse(data={"job_id": job_id, "job_type": job_type, "status": JOB_STATUS_QUEUED}, message=f"Job {job_id} queued.")
+
+@app.get("/jobs/{job_id}", response_model=ContentResponse, tags=["Jobs"])
+async def get_job_api(job_id: str):
+    """Reports the status and progress counters of a background crawl job, with the state of each of its spaces."""
+    if not job_store:
+        raise HTTPException(status_code=503, detail="Job subsystem not initialized.")
+    job = await asyncio.to_thread(job_store.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    job["spaces"] = await asyncio.to_thread(job_store.list_job_spaces, job_id)
+    return ContentResponse(data=job, message=f"Job {job_id} is {job['status']}.")
+
 # Ensure uvicorn uses the API_HOST and API_PORT from config when run directly
 if __name__ == "__main__":
     setup_app_logging() 
@@ -0,0 +1,204 @@
+"""
+Offline stand-in for the Atlassian MCP bridge, for tests and benchmarks without network access.
+
+Serves the five tools the API uses over stdio, with the same names, parameters and response
+shapes (v2-style listings with `results` and a `_links.next` cursor):
+getAccessibleAtlassianResources, getConfluenceSpaces, getPagesInConfluenceSpace,
+getConfluencePage and getConfluencePageDescendants.
+
+The content is generated deterministically: `--spaces` spaces named "Space 1".."Space N" (keys
+S1..SN), each with `--pages-per-space` pages arranged as a tree (`--fanout` children per page).
+Page bodies are storage-format HTML of about `--page-kb` KB with headings, paragraphs, a table and
+a code macro. Every call sleeps `--latency-ms` (plus up to `--latency-jitter-ms`). With
+`--error-rate`, that fraction of getConfluencePage calls fails with a tool error; with
+`--throttle-rate`, that fraction of all calls fails with "429 Too Many Requests" (Retry-After: 1).
+Random choices come from `--seed`, so a run is reproducible for a given call order.
+
+Point the API at it with a server config such as:
+    {"mcpServers": {"atlassian": {"command": sys.executable, "args": ["tests/fake_mcp_server.py", "--spaces", "3"]}}}
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+CLOUD_ID = "fake-cloud-0000"
+PAGE_ID_BASE = 1_000_000 # Page ids are space_number * PAGE_ID_BASE + page_index
+
+class FakeConfluence:
+    """The generated site and the tool implementations (usable without MCP, e.g. in tests)."""
+
+    def __init__(
+        self,
+        spaces: int = 3,
+        pages_per_space: int = 100,
+        fanout: int = 10,
+        page_kb: int = 10,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        default_limit: int = 25,
+        seed: int = 0,
+    ):
+        self.spaces = spaces
+        self.pages_per_space = pages_per_space
+        self.fanout = max(1, fanout)
+        self.page_kb = page_kb
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.default_limit = default_limit
+        self.random = random.Random(seed)
+        self.call_counts: Dict[str, int] = {}
+        self._body_template = self._build_body_template(page_kb)
+
+    # --- Generated content ---
+    @staticmethod
+    def _build_body_template(page_kb: int) -> str:
+        paragraph = "<p>Lorem ipsum dolor sit amet, <strong>consectetur</strong> adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. See <a href=\"https://example.com/docs\">the docs</a>.</p>"
+        table = "<table><tbody><tr><th>Key</th><th>Value</th></tr><tr><td>owner</td><td>team-a</td></tr><tr><td>status</td><td>active</td></tr></tbody></table>"
+        code = "<ac:structured-macro ac:name=\"code\"><ac:parameter ac:name=\"language\">python</ac:parameter><ac:plain-text-body><![CDATA[def handler(event):\n    return {\"ok\": True}]]></ac:plain-text-body></ac:structured-macro>"
+        parts = ["<h1>{title}</h1>", table, code]
+        size = sum(len(part) for part in parts)
+        section = 0
+        while size < page_kb * 1024:
+            if section % 8 == 0:
+                parts.append(f"<h2>Section {section // 8 + 1}</h2>")
+            parts.append(paragraph)
+            size += len(paragraph)
+            section += 1
+        return "".join(parts)
+
+    def _space(self, space_number: int) -> Dict[str, Any]:
+        return {"id": str(space_number), "key": f"S{space_number}", "name": f"Space {space_number}", "type": "global", "status": "current"}
+
+    def _page_summary(self, space_number: int, index: int) -> Dict[str, Any]:
+        page_id = space_number * PAGE_ID_BASE + index
+        parent_id = None if index == 0 else str(space_number * PAGE_ID_BASE + (index - 1) // self.fanout)
+        return {
+            "id": str(page_id),
+            "title": f"Page {index} of Space {space_number}",
+            "status": "current",
+            "spaceId": str(space_number),
+            "parentId": parent_id,
+            "version": {"number": 1 + index % 5, "createdAt": f"2026-01-{1 + index % 28:02d}T10:00:00.000Z"},
+        }
+
+    def _locate(self, page_id: str) -> Optional[tuple]:
+        try:
+            number = int(page_id)
+        except (TypeError, ValueError):
+            return None
+        space_number, index = divmod(number, PAGE_ID_BASE)
+        if 1 <= space_number <= self.spaces and 0 <= index < self.pages_per_space:
+            return space_number, index
+        return None
+
+    # --- Call behaviour ---
+    async def _before_call(self, tool_name: str) -> None:
+        self.call_counts[tool_name] = self.call_counts.get(tool_name, 0) + 1
+        delay_ms = self.latency_ms + (self.random.uniform(0, self.latency_jitter_ms) if self.latency_jitter_ms else 0)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if self.throttle_rate and self.random.random() < self.throttle_rate:
+            raise RuntimeError("429 Too Many Requests (Retry-After: 1)")
+
+    def _listing(self, items: List[Dict[str, Any]], path: str, limit: Optional[int], cursor: Optional[str]) -> str:
+        start = int(cursor) if cursor and cursor.isdigit() else 0
+        limit = limit or self.default_limit
+        response: Dict[str, Any] = {"results": items[start:start + limit], "_links": {}}
+        if start + limit < len(items):
+            response["_links"]["next"] = f"{path}?cursor={start + limit}&limit={limit}"
+        return json.dumps(response)
+
+    # --- Tools (return JSON text, like the bridge) ---
+    async def get_accessible_atlassian_resources(self) -> str:
+        await self._before_call("getAccessibleAtlassianResources")
+        return json.dumps([{"id": CLOUD_ID, "name": "fake-site", "url": "https://fake-site.atlassian.net", "scopes": ["read:confluence-content.all"]}])
+
+    async def get_confluence_spaces(self, cloudId: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> str:
+        await self._before_call("getConfluenceSpaces")
+        spaces = [self._space(number) for number in range(1, self.spaces + 1)]
+        return self._listing(spaces, "/wiki/api/v2/spaces", limit, cursor)
+
+    async def get_pages_in_confluence_space(self, cloudId: str, spaceId: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> str:
+        await self._before_call("getPagesInConfluenceSpace")
+        if not spaceId.isdigit() or not 1 <= int(spaceId) <= self.spaces:
+            raise ValueError(f"Space {spaceId} not found")
+        pages = [self._page_summary(int(spaceId), index) for index in range(self.pages_per_space)]
+        return self._listing(pages, f"/wiki/api/v2/spaces/{spaceId}/pages", limit, cursor)
+
+    async def get_confluence_page(self, cloudId: str, pageId: str) -> str:
+        await self._before_call("getConfluencePage")
+        location = self._locate(pageId)
+        if location is None:
+            raise ValueError(f"Page {pageId} not found")
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise RuntimeError(f"Simulated upstream failure for page {pageId}")
+        page = self._page_summary(*location)
+        page["body"] = {"storage": {"value": self._body_template.replace("{title}", page["title"]), "representation": "storage"}}
+        return json.dumps(page)
+
+    async def get_confluence_page_descendants(self, cloudId: str, pageId: str, depth: Optional[int] = None, limit: Optional[int] = None, cursor: Optional[str] = None) -> str:
+        await self._before_call("getConfluencePageDescendants")
+        location = self._locate(pageId)
+        if location is None:
+            raise ValueError(f"Page {pageId} not found")
+        space_number, index = location
+        descendants = []
+        level = [index]
+        current_depth = 0
+        while level and (depth is None or current_depth < depth):
+            children = [child for parent in level for child in range(parent * self.fanout + 1, parent * self.fanout + self.fanout + 1) if child < self.pages_per_space]
+            descendants.extend(self._page_summary(space_number, child) for child in children)
+            level = children
+            current_depth += 1
+        return self._listing(descendants, f"/wiki/api/v2/pages/{pageId}/descendants", limit, cursor)
+
+def build_server(fake: FakeConfluence):
+    """A FastMCP server exposing fake's tools under the Atlassian tool names."""
+    from mcp.server.fastmcp import FastMCP # Imported here so FakeConfluence works without the mcp package
+
+    server = FastMCP("fake-atlassian", log_level="WARNING")
+    server.add_tool(fake.get_accessible_atlassian_resources, name="getAccessibleAtlassianResources", description="List accessible Atlassian cloud sites.")
+    server.add_tool(fake.get_confluence_spaces, name="getConfluenceSpaces", description="List Confluence spaces.")
+    server.add_tool(fake.get_pages_in_confluence_space, name="getPagesInConfluenceSpace", description="List the pages of a space.")
+    server.add_tool(fake.get_confluence_page, name="getConfluencePage", description="Get a page with its body.")
+    server.add_tool(fake.get_confluence_page_descendants, name="getConfluencePageDescendants", description="List the descendants of a page.")
+    return server
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spaces", type=int, default=3)
+    parser.add_argument("--pages-per-space", type=int, default=100)
+    parser.add_argument("--fanout", type=int, default=10, help="Children per page in each space's page tree.")
+    parser.add_argument("--page-kb", type=int, default=10, help="Approximate size of each page body.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of getConfluencePage calls that fail.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of all calls answered with 429.")
+    parser.add_argument("--default-limit", type=int, default=25, help="Listing page size when the caller sends no limit.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    fake = FakeConfluence(
+        spaces=args.spaces,
+        pages_per_space=args.pages_per_space,
+        fanout=args.fanout,
+        page_kb=args.page_kb,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        default_limit=args.default_limit,
+        seed=args.seed,
+    )
+    build_server(fake).run("stdio")
+
+if __name__ == "__main__":
+    main()
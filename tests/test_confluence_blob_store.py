@@ -0,0 +1,56 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_blob_store import ContentBlobStore, SAVE_LINKED, SAVE_UNCHANGED
+
+def test_identical_content_is_stored_once_and_not_rewritten(tmp_path):
+    store = ContentBlobStore(str(tmp_path / "blobs"))
+    space_view = str(tmp_path / "spaces" / "page_1.md")
+    page_view = str(tmp_path / "pages" / "page_1.md")
+
+    assert store.save(b"<p>hello</p>", space_view) == SAVE_LINKED
+    mtime = os.stat(space_view).st_mtime_ns
+    assert store.save(b"<p>hello</p>", space_view) == SAVE_UNCHANGED
+    assert os.stat(space_view).st_mtime_ns == mtime
+    assert store.save(b"<p>hello</p>", page_view) == SAVE_LINKED
+
+    assert os.path.samefile(space_view, page_view)
+    assert store.stats["blobs_written"] == 1
+    assert Path(page_view).read_bytes() == b"<p>hello</p>"
+
+def test_changed_content_relinks_view_and_old_blob_can_be_pruned(tmp_path):
+    store = ContentBlobStore(str(tmp_path / "blobs"))
+    view = str(tmp_path / "spaces" / "page_1.md")
+    store.save(b"version 1", view)
+    assert store.save(b"version 2", view) == SAVE_LINKED
+    assert Path(view).read_bytes() == b"version 2"
+
+    assert store.prune_unreferenced() == 1
+    assert store.prune_unreferenced() == 0
+    assert store.save(b"version 2", view) == SAVE_UNCHANGED
+
+def test_prune_spares_recent_files_and_waits_for_saves_in_progress(tmp_path):
+    store = ContentBlobStore(str(tmp_path / "blobs"))
+    view = str(tmp_path / "spaces" / "page_1.md")
+    store.save(b"version 1", view)
+    store.save(b"version 2", view)
+    digest, tmp_file = store.stage_blob(b"being written")
+    assert store.prune_unreferenced(grace_seconds=60) == 0 # Old version and temp file are too recent
+
+    pruned = []
+    with store.saving():
+        pruner = threading.Thread(target=lambda: pruned.append(store.prune_unreferenced()))
+        pruner.start()
+        pruner.join(0.1)
+        assert pruner.is_alive() # Waits for the save to finish
+        store.commit_blob(digest, tmp_file)
+        assert store.link_view(digest, len(b"being written"), str(tmp_path / "pages" / "page_2.md")) == SAVE_LINKED
+    pruner.join(5)
+    assert pruned == [1] # Only the old version; the new blob was linked before prune ran
+    assert Path(view).read_bytes() == b"version 2"
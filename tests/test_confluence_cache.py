@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_cache import ConfluenceDirectoryCache
+from utilities.confluence_shared_state import SharedStateStore
+
+SPACES = [
+    {"id": "1", "key": "ENG", "name": "Engineering"},
+    {"id": "2", "key": "OPS", "name": "eng"},
+    {"id": "3", "name": "No Key Space"},
+    {"key": "BROKEN", "name": "Missing ID"},
+]
+
+def test_space_lookup_by_name_and_key():
+    async def scenario():
+        cache = ConfluenceDirectoryCache(cloud_id_ttl_seconds=60, spaces_ttl_seconds=60)
+        await cache.set_spaces("cloud-1", SPACES)
+
+        assert (await cache.find_space("cloud-1", "engineering"))["id"] == "1"
+        assert (await cache.find_space("cloud-1", "ops"))["id"] == "2"
+        # A space key wins over another space's name.
+        assert (await cache.find_space("cloud-1", "ENG"))["id"] == "1"
+        assert (await cache.find_space("cloud-1", "no key space"))["id"] == "3"
+        assert await cache.find_space("cloud-1", "broken") is None
+        assert await cache.find_space("cloud-2", "eng") is None
+
+    asyncio.run(scenario())
+
+def test_entries_expire_and_invalidate():
+    async def scenario():
+        cache = ConfluenceDirectoryCache(cloud_id_ttl_seconds=0.05, spaces_ttl_seconds=60)
+        await cache.set_cloud_id("cloud-1")
+        await cache.set_spaces("cloud-1", SPACES)
+        assert await cache.get_cloud_id() == "cloud-1"
+
+        time.sleep(0.06)
+        assert await cache.get_cloud_id() is None
+        assert await cache.has_spaces("cloud-1")
+
+        await cache.invalidate()
+        assert not await cache.has_spaces("cloud-1")
+        assert await cache.get_spaces("cloud-1") is None
+
+    asyncio.run(scenario())
+
+def test_workers_share_entries_and_invalidation_through_the_store(tmp_path):
+    async def scenario():
+        db_path = str(tmp_path / "shared.sqlite3")
+        worker_a = ConfluenceDirectoryCache(cloud_id_ttl_seconds=60, spaces_ttl_seconds=60, generation_check_interval_seconds=0.05)
+        worker_b = ConfluenceDirectoryCache(cloud_id_ttl_seconds=60, spaces_ttl_seconds=60, generation_check_interval_seconds=0.05)
+        worker_a.attach_shared_store(SharedStateStore(db_path))
+        worker_b.attach_shared_store(SharedStateStore(db_path))
+
+        await worker_a.set_cloud_id("cloud-1")
+        await worker_a.set_spaces("cloud-1", SPACES)
+        assert await worker_b.get_cloud_id() == "cloud-1"
+        assert await worker_b.has_spaces("cloud-1")
+        assert (await worker_b.find_space("cloud-1", "ops"))["id"] == "2"
+        assert (worker_b.hits, worker_b.misses) == (2, 0)
+
+        await worker_b.invalidate()
+        assert await worker_b.get_cloud_id() is None
+        # Other workers drop their local entries at their next generation check.
+        assert await worker_a.get_cloud_id() == "cloud-1"
+        await asyncio.sleep(0.06)
+        assert await worker_a.get_cloud_id() is None
+        assert await worker_a.find_space("cloud-1", "eng") is None
+
+    asyncio.run(scenario())
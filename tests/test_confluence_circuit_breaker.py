@@ -0,0 +1,48 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_circuit_breaker import CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+from utilities.confluence_rate_limiter import classify_tool_error
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_seconds=60)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure(ConnectionError("Connection refused"))
+    breaker.before_call()
+    breaker.record_success() # A tool-level answer resets the count
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure(ConnectionError("Connection refused"))
+
+    assert breaker.state == STATE_OPEN and breaker.is_open()
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_in_seconds > 50
+    assert classify_tool_error(excinfo.value) == (None, None)
+    assert breaker.stats["rejected"] == 1
+
+def test_half_open_admits_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0.05)
+    breaker.record_failure(ConnectionError("Connection refused"))
+    time.sleep(0.06)
+
+    breaker.before_call() # The probe
+    assert breaker.state == STATE_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure(TimeoutError("probe timed out"))
+    assert breaker.is_open()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    breaker.before_call()
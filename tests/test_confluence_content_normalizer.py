@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities import confluence_content_normalizer
+from utilities.confluence_content_normalizer import extract_page_body, normalize_page_body, register_body_extractor, strip_known_prefixes
+
+def test_strip_known_prefixes_in_one_pass():
+    assert strip_known_prefixes("Here is the HTML content for the page with ID '123':\n  <p>x</p>") == "<p>x</p>"
+    assert strip_known_prefixes("  Okay, here is the content: Sure, here's the HTML:\n<p>y</p>") == "<p>y</p>"
+    body = "<p>Here is the HTML content for the page with ID '1': not a prefix</p>"
+    assert strip_known_prefixes(body) is body
+
+def test_extractors_are_chosen_per_response_shape():
+    body = "<h1>Title</h1>" * 1000
+    assert extract_page_body({"body": {"storage": {"value": body}}}) == (body, "body.storage")
+    assert extract_page_body({"body": {"view": {"value": "v"}, "storage": {"value": "s"}}}) == ("v", "body.view")
+    assert extract_page_body({"html": "<p>h</p>", "body": "ignored"}) == ("<p>h</p>", "html")
+    assert extract_page_body({"body": {"atlas_doc_format": {"value": "{}"}}}) == (None, None)
+
+    register_body_extractor("atlas_doc_format", lambda response: response["body"]["atlas_doc_format"]["value"] if isinstance(response.get("body"), dict) and "atlas_doc_format" in response["body"] else None)
+    try:
+        assert extract_page_body({"body": {"atlas_doc_format": {"value": "{}"}}}) == ("{}", "atlas_doc_format")
+    finally:
+        confluence_content_normalizer._BODY_EXTRACTORS.pop()
+        confluence_content_normalizer._extractor_by_shape.clear()
+
+def test_output_formats():
+    html = "Sure, here's the HTML: <h2>Intro</h2><p>Read <a href='https://x.test'>this</a> <strong>now</strong>.</p><ul><li>one</li><li>two</li></ul>"
+    assert normalize_page_body(html, "html").startswith("<h2>")
+    assert normalize_page_body(html, "markdown") == "## Intro\n\nRead [this](https://x.test) **now**.\n\n- one\n- two\n"
+    assert normalize_page_body(html, "text") == "Intro\n\nRead this now.\n\none\ntwo\n"
@@ -0,0 +1,41 @@
+import asyncio
+import gzip
+import json
+import sys
+import tarfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_export_archive import ExportArchiveWriter, read_export_record
+
+def _export(archive_path, export_format, pages):
+    async def run():
+        writer = ExportArchiveWriter(str(archive_path), export_format)
+        entries = [await writer.add_page(page_id, f"Page {page_id}", "ENG", 1, html) for page_id, html in pages]
+        return entries, await writer.close()
+    return asyncio.run(run())
+
+def test_jsonl_gz_export_reads_as_one_stream_and_by_offset(tmp_path):
+    pages = [(str(i), f"<p>page {i}</p>" * (i + 1)) for i in range(20)]
+    entries, summary = _export(tmp_path / "export.jsonl.gz", "jsonl.gz", pages)
+
+    with gzip.open(summary["archive_path"], "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["id"] for record in records] == [page_id for page_id, _ in pages]
+    assert summary["records"] == 20 and summary["complete"]
+
+    index = json.loads(Path(summary["index_path"]).read_text())
+    assert index["records"] == entries
+    assert read_export_record(summary["archive_path"], entries[13], "jsonl.gz")["html"] == pages[13][1]
+
+def test_tar_gz_export_opens_with_tarfile_and_by_offset(tmp_path):
+    pages = [("1", "<h1>One</h1>"), ("2", "<h1>Two</h1>" * 300)]
+    entries, summary = _export(tmp_path / "export.tar.gz", "tar.gz", pages)
+
+    with tarfile.open(summary["archive_path"], "r:gz") as tar:
+        assert tar.getnames() == ["ENG/Page_1_1.html", "ENG/Page_2_2.html"]
+        assert tar.extractfile("ENG/Page_2_2.html").read().decode() == pages[1][1]
+    assert read_export_record(summary["archive_path"], entries[1], "tar.gz") == pages[1][1]
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_blob_store import ContentBlobStore, SAVE_LINKED, SAVE_UNCHANGED
+from utilities.confluence_file_writer import BatchedFileWriter, WRITE_WRITTEN
+
+def test_concurrent_writes_are_batched_and_atomic(tmp_path):
+    async def run():
+        writer = BatchedFileWriter(worker_count=2, queue_size=8, batch_size=16, fsync=True)
+        await writer.start()
+        paths = [str(tmp_path / f"space_{i % 3}" / f"page_{i}.md") for i in range(50)]
+        outcomes = await asyncio.gather(*(writer.write(path, f"page {i}".encode()) for i, path in enumerate(paths)))
+        # The same path twice in quick succession: the later write wins.
+        await asyncio.gather(writer.write(paths[0], b"first"), writer.write(paths[0], b"second"))
+        await writer.close()
+        return writer, paths, outcomes
+    writer, paths, outcomes = asyncio.run(run())
+    assert outcomes == [WRITE_WRITTEN] * 50
+    assert Path(paths[7]).read_bytes() == b"page 7"
+    assert Path(paths[0]).read_bytes() == b"second"
+    assert writer.stats["batches"] < 52
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(".tmp")]
+
+def test_errors_are_reported_per_write_and_content_store_is_used(tmp_path):
+    (tmp_path / "not_a_dir").write_text("x")
+
+    async def run():
+        store = ContentBlobStore(str(tmp_path / "blobs"))
+        writer = BatchedFileWriter(worker_count=1, content_store=store)
+        await writer.start()
+        view = str(tmp_path / "out" / "page_1.md")
+        results = [await writer.write(view, b"same"), await writer.write(view, b"same")]
+        with pytest.raises(OSError):
+            await writer.write(str(tmp_path / "not_a_dir" / "page_2.md"), b"data")
+        await writer.close()
+        return results
+    assert asyncio.run(run()) == [SAVE_LINKED, SAVE_UNCHANGED]
+
+def test_content_store_batches_fsync_blobs_and_directories_once(tmp_path, monkeypatch):
+    store = ContentBlobStore(str(tmp_path / "blobs"), fsync=True)
+    writer = BatchedFileWriter(fsync=True, content_store=store)
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+
+    # Ten views in two directories over three distinct contents.
+    items = [(str(tmp_path / "out" / f"space_{i % 2}" / f"page_{i}.md"), f"content {i % 3}".encode()) for i in range(10)]
+    outcomes = writer._write_batch(items)
+    assert outcomes == [SAVE_LINKED] * 10
+    assert store.stats["blobs_written"] == 3
+    blob_dirs = os.listdir(tmp_path / "blobs")
+    assert len(synced) == 3 + len(blob_dirs) + 2 # Each new blob, then each blob and view directory once
+    assert Path(items[4][0]).read_bytes() == b"content 1"
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(".tmp")]
+
+    synced.clear()
+    assert writer._write_batch(items[:2]) == [SAVE_UNCHANGED] * 2
+    assert synced == []
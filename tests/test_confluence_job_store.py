@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_job_store import JobStore, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED, JOB_SPACE_STATUS_PENDING
+
+def test_job_lifecycle(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create_job("space_content", {"space_name": "ENG", "incremental": True})
+    job = store.get_job(job_id)
+    assert job["status"] == JOB_STATUS_QUEUED
+    assert job["params"] == {"space_name": "ENG", "incremental": True}
+
+    store.mark_running(job_id)
+    store.mark_finished(job_id, JOB_STATUS_COMPLETED)
+    job = store.get_job(job_id)
+    assert job["status"] == JOB_STATUS_COMPLETED
+    assert (job["spaces_total"], job["pages_saved"], job["attempts"]) == (0, 0, 1)
+    assert store.get_job("missing") is None
+    store.close()
+
+def test_unfinished_jobs_and_checkpoints_survive_reopen(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(db_path)
+    running_id = store.create_job("all_content", {})
+    done_id = store.create_job("all_content", {})
+    store.mark_running(running_id)
+    store.add_checkpoints(running_id, ["1", "2", 3])
+    store.add_checkpoints(running_id, ["2"])
+    store.mark_finished(done_id, JOB_STATUS_COMPLETED)
+    store.close()
+
+    reopened = JobStore(db_path)
+    assert reopened.list_resumable_job_ids() == [running_id]
+    assert reopened.get_job(running_id)["status"] == JOB_STATUS_RUNNING
+    assert reopened.get_checkpointed_page_ids(running_id) == {"1", "2", "3"}
+    assert reopened.get_job(running_id)["pages_checkpointed"] == 3
+    reopened.close()
+
+def test_job_spaces_add_up_and_complete_the_job_once(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    worker_a, worker_b = JobStore(db_path), JobStore(db_path)
+    job_id = worker_a.create_job("all_content", {})
+    spaces = [{"id": "1", "name": "Eng", "key": "ENG"}, {"id": "2", "name": "Ops", "key": "OPS"}]
+    assert worker_a.mark_running(job_id)
+    worker_a.add_job_spaces(job_id, spaces)
+    worker_b.add_job_spaces(job_id, spaces) # A second worker joining the job
+    assert [space["space_id"] for space in worker_b.list_job_spaces(job_id, JOB_SPACE_STATUS_PENDING)] == ["1", "2"]
+
+    worker_a.update_space_progress(job_id, "1", pages_saved=4, pages_failed=1)
+    worker_b.update_space_progress(job_id, "2", pages_saved=2, pages_skipped=3)
+    worker_a.mark_space_done(job_id, "1")
+    assert not worker_a.complete_if_all_spaces_done(job_id)
+    worker_b.mark_space_done(job_id, "2", error="listing failed")
+    assert worker_b.complete_if_all_spaces_done(job_id)
+    assert not worker_a.complete_if_all_spaces_done(job_id)
+
+    job = worker_a.get_job(job_id)
+    assert job["status"] == JOB_STATUS_COMPLETED
+    assert (job["spaces_total"], job["spaces_completed"], job["pages_saved"], job["pages_failed"], job["pages_skipped"]) == (2, 2, 6, 1, 3)
+    assert worker_a.get_job_space(job_id, "2")["error"] == "listing failed"
+    assert not worker_a.mark_running(job_id) # Finished jobs are not restarted
+    worker_a.close()
+    worker_b.close()
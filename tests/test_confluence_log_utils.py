@@ -0,0 +1,29 @@
+import logging
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_log_utils import LazyJson, Truncated, truncate_text
+
+class _Exploding:
+    def __repr__(self):
+        raise AssertionError("formatted although the level is disabled")
+
+def test_payloads_are_rendered_lazily_and_truncated():
+    response = {"id": "1", "body": {"storage": {"value": "x" * 100_000}}, "children": list(range(1000))}
+    text = str(Truncated(response, max_chars=300))
+    assert text.startswith("{'body': {'storage': {'value': 'xxx") and len(text) < 400
+    assert str(Truncated("y" * 50, max_chars=10)) == "yyyyyyyyyy... [40 more chars]"
+    assert str(LazyJson({"a": [1, 2]})) == '{"a": [1, 2]}'
+    assert truncate_text("short", 10) == "short"
+
+def test_disabled_levels_never_format_their_arguments(caplog):
+    logger = logging.getLogger("test_confluence_log_utils")
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        logger.debug("payload %s", Truncated(_Exploding()))
+        logger.debug("response: %s", LazyJson(_Exploding()))
+        logger.info("response: %s", Truncated({"id": "1"}))
+    assert [record.getMessage() for record in caplog.records] == ["response: {'id': '1'}"]
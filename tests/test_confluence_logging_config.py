@@ -0,0 +1,67 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_logging_config import JsonLogFormatter, LogSamplingFilter, NonBlockingQueueHandler, log_file_path
+from utilities.confluence_tracing import Tracer
+
+def _record(name: str, level: int = logging.INFO, msg: str = "page %s saved", args=("1",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_sampling_keeps_an_even_fraction_of_info_records_and_all_warnings():
+    sampling_filter = LogSamplingFilter({"services.confluence_mcp_api.pages": 0.25})
+    kept = [sampling_filter.filter(_record("services.confluence_mcp_api.pages")) for _ in range(100)]
+    assert sum(kept) == 25 and kept[:4] == [True, False, False, False]
+    # Children share their sampled ancestor's sequence.
+    assert [sampling_filter.filter(_record("services.confluence_mcp_api.pages.save")) for _ in range(4)] == [True, False, False, False]
+    assert all(sampling_filter.filter(_record("services.confluence_mcp_api.pages", logging.WARNING)) for _ in range(10))
+    assert all(sampling_filter.filter(_record("services.confluence_mcp_api")) for _ in range(10))
+
+    # The same record passing through several handlers is decided once.
+    record = _record("services.confluence_mcp_api.pages")
+    assert len({sampling_filter.filter(record) for _ in range(3)}) == 1
+
+def test_queue_handler_renders_in_caller_and_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    tracer = Tracer()
+    with tracer.span("request", parent=None) as span:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            failing = _record("x", logging.ERROR, exc_info=sys.exc_info())
+        handler.handle(failing)
+    for _ in range(3):
+        handler.handle(_record("x"))
+
+    assert handler.queue.qsize() == 2 and handler.dropped == 2
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "page 1 saved" and queued.args is None and queued.exc_info is None
+    assert "ValueError: boom" in queued.exc_text
+    assert queued.trace_id == span.trace.trace_id and queued.span_id == span.span_id
+
+    entry = json.loads(JsonLogFormatter().format(queued))
+    assert entry["message"] == "page 1 saved" and entry["level"] == "ERROR"
+    assert entry["trace_id"] == span.trace.trace_id and "ValueError: boom" in entry["exception"]
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonLogFormatter().format(_record("services.confluence_mcp_api", page_id="42", duration_ms=12.5)))
+    assert entry["logger"] == "services.confluence_mcp_api"
+    assert entry["page_id"] == "42" and entry["duration_ms"] == 12.5
+    assert "trace_id" not in entry and "_sampling_decision" not in entry
+
+def test_each_worker_process_gets_its_own_log_file():
+    single = log_file_path(worker_count=1)
+    per_worker = log_file_path(worker_count=4)
+    assert per_worker != single
+    assert os.path.dirname(per_worker) == os.path.dirname(single)
+    assert os.path.basename(per_worker) == os.path.basename(single).replace(".log", f".{os.getpid()}.log")
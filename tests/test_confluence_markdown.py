@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_markdown import convert_html_to_markdown
+
+def test_tables_become_pipe_tables():
+    html = "<table><tbody><tr><th>Name</th><th>Value</th></tr><tr><td><p>a|b</p></td><td>1<br/>2</td></tr><tr><td>only</td></tr></tbody></table>"
+    assert convert_html_to_markdown(html) == "| Name | Value |\n| --- | --- |\n| a\\|b | 1<br>2 |\n| only |  |\n"
+
+def test_storage_format_macros():
+    html = (
+        '<ac:structured-macro ac:name="code"><ac:parameter ac:name="language">python</ac:parameter>'
+        '<ac:plain-text-body><![CDATA[if a < b:\n    print("x")]]></ac:plain-text-body></ac:structured-macro>'
+        '<ac:structured-macro ac:name="warning"><ac:rich-text-body><p>Do <em>not</em> deploy.</p></ac:rich-text-body></ac:structured-macro>'
+        '<ac:structured-macro ac:name="toc" />'
+    )
+    assert convert_html_to_markdown(html) == (
+        '```python\nif a < b:\n    print("x")\n```\n\n'
+        '> **Warning:** Do *not* deploy.\n\n'
+        '<!-- confluence macro: toc -->\n'
+    )
+
+def test_attachment_page_and_image_links():
+    html = (
+        '<p>See <ac:link><ri:attachment ri:filename="spec v2.pdf" /><ac:plain-text-link-body><![CDATA[the spec]]></ac:plain-text-link-body></ac:link>, '
+        '<ac:link><ri:page ri:content-title="Runbook" /></ac:link> and <a href="https://x.test/a">this</a>.</p>'
+        '<ac:image><ri:attachment ri:filename="diagram.png" /></ac:image>'
+    )
+    assert convert_html_to_markdown(html) == (
+        "See [the spec](attachments/spec%20v2.pdf), Runbook and [this](https://x.test/a).\n\n"
+        "![diagram.png](attachments/diagram.png)\n"
+    )
@@ -0,0 +1,53 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+import services.confluence_mcp_api as api
+from utilities.confluence_circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN
+from utilities.confluence_tool_client import MCPToolError
+
+class HangingExecutor:
+    """Stands in for the session pool when the bridge accepts calls but never answers."""
+
+    async def call_tool(self, server_name, tool_name, arguments):
+        await asyncio.sleep(3600)
+
+def test_hung_tool_calls_time_out_and_open_the_circuit(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=60)
+    monkeypatch.setattr(api, "use_tool_executor_instance", HangingExecutor())
+    monkeypatch.setattr(api, "circuit_breaker", breaker)
+    monkeypatch.setattr(api, "TOOL_CALL_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await api._call_tool_once("atlassian", "getConfluencePage", {"pageId": "1"})
+
+    asyncio.run(scenario())
+    assert breaker.state == STATE_OPEN
+    assert api._error_class(asyncio.TimeoutError()) == "timeout"
+
+def test_upstream_throttling_does_not_open_the_circuit(monkeypatch):
+    class ThrottledExecutor:
+        async def call_tool(self, server_name, tool_name, arguments):
+            raise MCPToolError(tool_name, "503 Service Unavailable (Retry-After: 1)")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=60)
+    monkeypatch.setattr(api, "use_tool_executor_instance", ThrottledExecutor())
+    monkeypatch.setattr(api, "circuit_breaker", breaker)
+
+    async def scenario():
+        for _ in range(5):
+            with pytest.raises(MCPToolError):
+                await api._call_tool_once("atlassian", "getConfluencePage", {"pageId": "1"})
+
+    asyncio.run(scenario())
+    assert breaker.state == STATE_CLOSED and breaker.consecutive_failures == 0
+    assert api._error_class(MCPToolError("getConfluencePage", "503 Service Unavailable")) == "throttled"
+    assert api._error_class(ConnectionError("Connection refused")) == "connectivity"
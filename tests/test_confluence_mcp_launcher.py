@@ -0,0 +1,33 @@
+import os
+import stat
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_mcp_launcher import find_local_mcp_remote, resolve_mcp_server_config
+
+NPX_CONFIG = {
+    "mcpServers": {
+        "atlassian": {"command": "npx", "args": ["-y", "mcp-remote@0.1.0", "https://mcp.atlassian.com/v1/sse"]},
+        "other": {"command": "python", "args": ["server.py"]},
+    }
+}
+
+def test_npx_mcp_remote_is_replaced_by_local_binary():
+    resolved = resolve_mcp_server_config(NPX_CONFIG, "/opt/bin/mcp-remote")
+    assert resolved["mcpServers"]["atlassian"] == {"command": "/opt/bin/mcp-remote", "args": ["https://mcp.atlassian.com/v1/sse"]}
+    assert resolved["mcpServers"]["other"] == NPX_CONFIG["mcpServers"]["other"]
+    assert NPX_CONFIG["mcpServers"]["atlassian"]["command"] == "npx"
+    assert resolve_mcp_server_config(NPX_CONFIG, None) == NPX_CONFIG
+
+def test_finds_binary_in_project_node_modules(tmp_path):
+    bin_dir = tmp_path / "node_modules" / ".bin"
+    bin_dir.mkdir(parents=True)
+    binary = bin_dir / "mcp-remote"
+    binary.write_text("#!/bin/sh\n")
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    assert find_local_mcp_remote(None, str(tmp_path)) == str(binary)
+    assert find_local_mcp_remote(str(binary), None) == os.path.abspath(binary)
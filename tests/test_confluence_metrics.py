@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_metrics import MetricsRegistry
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("tool_seconds", "Tool latency.", ["tool"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, tool="getConfluencePage")
+    lines = registry.render().splitlines()
+
+    assert "# TYPE tool_seconds histogram" in lines
+    assert 'tool_seconds_bucket{tool="getConfluencePage",le="0.1"} 2' in lines
+    assert 'tool_seconds_bucket{tool="getConfluencePage",le="1"} 3' in lines
+    assert 'tool_seconds_bucket{tool="getConfluencePage",le="+Inf"} 4' in lines
+    assert 'tool_seconds_count{tool="getConfluencePage"} 4' in lines
+    assert 'tool_seconds_sum{tool="getConfluencePage"} 3.65' in lines
+
+def test_counters_gauges_and_collectors_render():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors.", ["error_class"])
+    in_flight = registry.gauge("in_flight", "In flight.")
+    errors.inc(error_class='say "hi"')
+    errors.inc(2, error_class='say "hi"')
+    with in_flight.track_in_progress():
+        assert in_flight.value() == 1
+    registry.register_collector(lambda: [("cache_hit_ratio", "gauge", "Hit ratio.", [({}, 0.75)])])
+    with pytest.raises(ValueError):
+        errors.inc(tool="x")
+
+    text = registry.render()
+    assert 'errors_total{error_class="say \\"hi\\""} 3' in text
+    assert "in_flight 0" in text
+    assert "# TYPE cache_hit_ratio gauge\ncache_hit_ratio 0.75" in text
+
+def test_constant_labels_apply_to_metrics_and_collectors():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests.", ["endpoint"]).inc(endpoint="/ready")
+    registry.histogram("save_seconds", "Saves.", buckets=(1.0,)).observe(0.5)
+    registry.register_collector(lambda: [("pool_members", "gauge", "Members.", [({}, 2)])])
+    registry.set_constant_labels(worker="host-42-abc123")
+    lines = registry.render().splitlines()
+
+    assert 'requests_total{worker="host-42-abc123",endpoint="/ready"} 1' in lines
+    assert 'save_seconds_bucket{worker="host-42-abc123",le="1"} 1' in lines
+    assert 'save_seconds_count{worker="host-42-abc123"} 1' in lines
+    assert 'pool_members{worker="host-42-abc123"} 2' in lines
@@ -0,0 +1,78 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_rate_limiter import (
+    AdaptiveRateLimiter, call_with_retries, classify_tool_error, ERROR_CLASS_THROTTLED, ERROR_CLASS_TRANSIENT
+)
+from utilities.confluence_tool_client import MCPToolError
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class _HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code, headers)
+
+def test_classify_tool_error():
+    assert classify_tool_error(MCPToolError("getConfluencePage", "429 Too Many Requests, Retry-After: 7")) == (ERROR_CLASS_THROTTLED, 7.0)
+    assert classify_tool_error(_HTTPError(503, {"retry-after": "2"})) == (ERROR_CLASS_THROTTLED, 2.0)
+    assert classify_tool_error(_HTTPError(504)) == (ERROR_CLASS_TRANSIENT, None)
+    assert classify_tool_error(asyncio.TimeoutError()) == (ERROR_CLASS_TRANSIENT, None)
+    assert classify_tool_error(MCPToolError("getConfluencePage", "401 Unauthorized")) == (None, None)
+    assert classify_tool_error(MCPToolError("getConfluencePage", "Page not found")) == (None, None)
+
+def test_throttled_calls_are_retried_and_shrink_the_concurrency_limit():
+    async def run():
+        limiter = AdaptiveRateLimiter(rate_per_second=None, initial_concurrency=8)
+        attempts = []
+
+        async def flaky():
+            attempts.append(time.monotonic())
+            if len(attempts) < 3:
+                raise MCPToolError("getConfluencePage", "429 rate limited; retry-after: 0.05")
+            return {"ok": True}
+
+        result = await call_with_retries(flaky, limiter, "test", max_attempts=4, base_delay=0.01)
+        with pytest.raises(MCPToolError):
+            await call_with_retries(lambda: flaky_not_found(), limiter, "test", max_attempts=4)
+        return result, attempts, limiter
+
+    async def flaky_not_found():
+        raise MCPToolError("getConfluencePage", "Page not found")
+
+    result, attempts, limiter = asyncio.run(run())
+    assert result == {"ok": True} and len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.05
+    assert limiter.stats["throttled"] == 2 and limiter.stats["pauses"] >= 1
+    assert limiter.concurrency_limit < 8
+
+def test_concurrency_stays_under_the_adaptive_limit():
+    async def run():
+        limiter = AdaptiveRateLimiter(rate_per_second=1000, burst=1000, initial_concurrency=3, max_concurrency=5)
+        in_flight = []
+        current = 0
+
+        async def call():
+            nonlocal current
+            current += 1
+            in_flight.append(current)
+            await asyncio.sleep(0.005)
+            current -= 1
+
+        await asyncio.gather(*(call_with_retries(call, limiter, "test") for _ in range(60)))
+        return max(in_flight), limiter
+
+    peak, limiter = asyncio.run(run())
+    assert peak <= 5
+    assert 3 < limiter.concurrency_limit <= 5
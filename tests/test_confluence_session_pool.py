@@ -0,0 +1,117 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from mcp.types import CallToolResult, TextContent
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_session_pool import MCPSessionPool
+from utilities.confluence_tool_client import MCPToolError
+
+class FakeConnector:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.calls = 0
+
+    async def call_tool(self, tool_name, arguments):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.broken:
+            raise RuntimeError("ClosedResourceError")
+        if tool_name == "missing":
+            return CallToolResult(content=[TextContent(type="text", text="Page not found")], isError=True)
+        return CallToolResult(content=[TextContent(type="text", text='{"ok": true}')])
+
+class FakeSession:
+    def __init__(self, connector):
+        self.connector = connector
+
+class FakeClient:
+    def __init__(self, broken=False):
+        self.connector = FakeConnector(broken)
+        self.sessions = {}
+        self.closed = False
+
+    def get_session(self, server_name):
+        if server_name not in self.sessions:
+            raise ValueError("not connected")
+        return self.sessions[server_name]
+
+    async def create_session(self, server_name):
+        self.sessions[server_name] = FakeSession(self.connector)
+        return self.sessions[server_name]
+
+    async def close_all_sessions(self):
+        self.closed = True
+
+def make_factory(broken_first=0):
+    created = []
+
+    async def factory():
+        client = FakeClient(broken=len(created) < broken_first)
+        created.append(client)
+        return client
+    return factory, created
+
+def test_concurrent_calls_are_spread_over_members():
+    async def run():
+        factory, created = make_factory()
+        pool = MCPSessionPool(factory, "atlassian", size=3, health_check_interval_seconds=0)
+        await pool.start()
+        results = await asyncio.gather(*(pool.call_tool("atlassian", "tool", {}) for _ in range(9)))
+        await pool.close()
+        return results, created
+    results, created = asyncio.run(run())
+    assert results == [{"ok": True}] * 9
+    assert [client.connector.calls for client in created] == [3, 3, 3]
+    assert all(client.closed for client in created)
+
+def test_member_with_transport_errors_is_replaced():
+    async def run():
+        factory, created = make_factory(broken_first=1)
+        pool = MCPSessionPool(factory, "atlassian", size=1, max_consecutive_failures=2, health_check_interval_seconds=0)
+        await pool.start()
+        errors = []
+        for _ in range(2):
+            with pytest.raises(RuntimeError) as exc_info:
+                await pool.call_tool("atlassian", "tool", {})
+            errors.append(str(exc_info.value))
+        await asyncio.sleep(0.05)
+        third = await pool.call_tool("atlassian", "tool", {})
+        # A tool error is an answer from a working session: raised, but not counted against it.
+        with pytest.raises(MCPToolError):
+            await pool.call_tool("atlassian", "missing", {})
+        stats = pool.stats()
+        await pool.close()
+        return errors, third, stats, created
+    errors, third, stats, created = asyncio.run(run())
+    assert errors == ["ClosedResourceError"] * 2
+    assert third == {"ok": True}
+    assert stats["replacements"] == 1 and len(stats["members"]) == 1
+    assert stats["members"][0]["consecutive_failures"] == 0
+    assert created[0].closed
+
+def test_warm_up_replaces_members_that_fail_to_connect():
+    async def run():
+        factory, created = make_factory()
+        warmed = []
+
+        async def warmup(member):
+            if member.member_id == 0:
+                raise RuntimeError("auth failed")
+            warmed.append(member.member_id)
+
+        pool = MCPSessionPool(factory, "atlassian", size=2, health_check_interval_seconds=0, member_warmup=warmup)
+        await pool.start()
+        ok = await pool.warm_up()
+        member_ids = sorted(m.member_id for m in pool.members)
+        await pool.close()
+        return ok, warmed, member_ids
+    ok, warmed, member_ids = asyncio.run(run())
+    assert ok == 1
+    assert sorted(warmed) == [1, 2]
+    assert member_ids == [1, 2]
@@ -0,0 +1,77 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_shared_state import SharedStateStore, WorkerLeases
+
+def test_leases_are_exclusive_between_owners_until_they_expire(tmp_path):
+    db_path = str(tmp_path / "shared.sqlite3")
+    # Two connections, as two worker processes would have.
+    worker_a, worker_b = SharedStateStore(db_path), SharedStateStore(db_path)
+
+    assert worker_a.try_acquire_lease("space:1", "a", ttl_seconds=0.2)
+    assert worker_a.try_acquire_lease("space:1", "a", ttl_seconds=0.2) # Re-acquiring extends it
+    assert not worker_b.try_acquire_lease("space:1", "b", ttl_seconds=60)
+    assert worker_b.get_lease("space:1")["owner"] == "a"
+    assert worker_b.try_acquire_lease("space:2", "b", ttl_seconds=60)
+    assert [lease["name"] for lease in worker_a.list_leases("space:")] == ["space:1", "space:2"]
+
+    time.sleep(0.25)
+    assert not worker_a.renew_lease("space:1", "b", ttl_seconds=60)
+    assert worker_b.try_acquire_lease("space:1", "b", ttl_seconds=60) # Expired: taken over
+    assert not worker_a.renew_lease("space:1", "a", ttl_seconds=60)
+    worker_a.release_lease("space:1", "a") # Not a's any more: no effect
+    assert worker_a.get_lease("space:1")["owner"] == "b"
+    worker_b.release_lease("space:1", "b")
+    assert worker_a.get_lease("space:1") is None
+    worker_a.close()
+    worker_b.close()
+
+def test_values_expire_and_counters_increment(tmp_path):
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    store.set("directory:cloud_id", "cloud-1", ttl_seconds=0.05)
+    store.set("directory:spaces:cloud-1", [{"id": "1"}])
+    store.set("other", {"kept": True})
+    value, expires_at = store.get_entry("directory:cloud_id")
+    assert value == "cloud-1" and expires_at > time.time()
+    time.sleep(0.06)
+    assert store.get("directory:cloud_id") is None
+    assert store.get_entry("directory:spaces:cloud-1") == ([{"id": "1"}], None)
+
+    assert store.delete_prefix("directory:") == 2
+    assert store.get("other") == {"kept": True}
+    assert [store.increment("generation") for _ in range(3)] == [1, 2, 3]
+    store.close()
+
+def test_worker_leases_are_shared_within_a_worker(tmp_path):
+    async def scenario():
+        store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+        leases_a = WorkerLeases(store, "worker-a", ttl_seconds=0.3)
+        leases_b = WorkerLeases(store, "worker-b", ttl_seconds=0.3)
+        leases_a.start()
+
+        assert await leases_a.try_acquire("space:1")
+        assert await leases_a.try_acquire("space:1") # Second crawl in the same worker
+        assert not await leases_b.try_acquire("space:1")
+        assert (await leases_b.held_elsewhere("space:1"))["owner"] == "worker-a"
+        assert await leases_a.held_elsewhere("space:1") is None
+
+        await asyncio.sleep(0.5) # Past the TTL, but renewed in the background
+        assert not await leases_b.acquire("space:1", timeout_seconds=0.1, poll_interval_seconds=0.05)
+
+        await leases_a.release("space:1")
+        assert not await leases_b.try_acquire("space:1") # Still held by the other crawl
+        waiter = asyncio.create_task(leases_b.acquire("space:1", timeout_seconds=5, poll_interval_seconds=0.05))
+        await leases_a.release("space:1")
+        assert await waiter
+        await leases_a.close()
+        await leases_b.close()
+        assert store.get_lease("space:1") is None
+        store.close()
+
+    asyncio.run(scenario())
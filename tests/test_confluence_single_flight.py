@@ -0,0 +1,78 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_single_flight import SingleFlight
+
+def test_concurrent_identical_calls_share_one_call():
+    async def scenario():
+        flights = SingleFlight("tool_call")
+        calls = []
+
+        async def fetch(page_id):
+            calls.append(page_id)
+            await asyncio.sleep(0.05)
+            return {"id": page_id}
+
+        results = await asyncio.gather(*(flights.do(("getConfluencePage", page_id), lambda page_id=page_id: fetch(page_id)) for page_id in ["1"] * 10 + ["2"]))
+        assert calls == ["1", "2"]
+        assert all(result is results[0] for result in results[:10])
+        assert results[10] == {"id": "2"}
+        assert flights.stats == {"calls": 2, "coalesced": 9}
+        assert flights.in_flight_count() == 0
+
+        # Nothing is cached: a later call runs again.
+        await flights.do(("getConfluencePage", "1"), lambda: fetch("1"))
+        assert calls == ["1", "2", "1"]
+
+    asyncio.run(scenario())
+
+def test_errors_are_shared_and_not_remembered():
+    async def scenario():
+        flights = SingleFlight("tool_call")
+        attempts = 0
+
+        async def failing():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        results = await asyncio.gather(flights.do("key", failing), flights.do("key", failing), return_exceptions=True)
+        assert attempts == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        await asyncio.gather(flights.do("key", failing), return_exceptions=True)
+        assert attempts == 2
+
+    asyncio.run(scenario())
+
+def test_call_is_cancelled_only_when_every_waiter_is():
+    async def scenario():
+        flights = SingleFlight("file_save")
+        finished = asyncio.Event()
+
+        async def slow_save():
+            await asyncio.sleep(0.05)
+            finished.set()
+            return "written"
+
+        first = asyncio.create_task(flights.do("key", slow_save))
+        second = asyncio.create_task(flights.do("key", slow_save))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "written" # The remaining waiter still gets the result
+        assert finished.is_set()
+
+        finished.clear()
+        only = asyncio.create_task(flights.do("key", slow_save))
+        await asyncio.sleep(0.01)
+        only.cancel()
+        await asyncio.sleep(0.08)
+        assert not finished.is_set() # Last waiter gone: the call itself was cancelled
+        assert flights.in_flight_count() == 0
+
+    asyncio.run(scenario())
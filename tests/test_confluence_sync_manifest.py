@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_sync_manifest import SpaceSyncManifest, get_summary_version, get_summary_last_modified
+
+def test_summary_metadata_shapes():
+    v2_summary = {"id": "1", "version": {"number": 7, "createdAt": "2024-05-01T10:00:00.000Z"}}
+    v1_summary = {"id": "2", "version": {"number": "3", "when": "2023-01-01T00:00:00Z"}}
+    history_summary = {"id": "3", "history": {"lastUpdated": {"when": "2022-02-02T00:00:00Z"}}}
+
+    assert get_summary_version(v2_summary) == 7
+    assert get_summary_version(v1_summary) == 3
+    assert get_summary_version(history_summary) is None
+    assert get_summary_last_modified(v2_summary) == "2024-05-01T10:00:00.000Z"
+    assert get_summary_last_modified(v1_summary) == "2023-01-01T00:00:00Z"
+    assert get_summary_last_modified(history_summary) == "2022-02-02T00:00:00Z"
+
+def test_needs_fetch_and_round_trip(tmp_path):
+    saved_file = tmp_path / "page_1.md"
+    saved_file.write_text("<p>hi</p>")
+
+    manifest = SpaceSyncManifest.load(str(tmp_path))
+    assert manifest.needs_fetch({"id": "1", "version": {"number": 2}})
+
+    manifest.record("1", 2, "2024-05-01T10:00:00Z", "abc", str(saved_file))
+    manifest.save()
+
+    reloaded = SpaceSyncManifest.load(str(tmp_path))
+    assert not reloaded.needs_fetch({"id": "1", "version": {"number": 2}})
+    assert reloaded.needs_fetch({"id": "1", "version": {"number": 3}})
+    assert reloaded.needs_fetch({"id": "1"})
+
+    saved_file.unlink()
+    assert reloaded.needs_fetch({"id": "1", "version": {"number": 2}})
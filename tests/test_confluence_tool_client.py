@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+from mcp.types import CallToolResult, TextContent
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_tool_client import MCPToolError, parse_call_tool_result
+
+def test_text_content_is_decoded_as_json():
+    result = CallToolResult(content=[TextContent(type="text", text='{"results": [{"id": "1"}]}')])
+    assert parse_call_tool_result("getConfluenceSpaces", result) == {"results": [{"id": "1"}]}
+
+    plain = CallToolResult(content=[TextContent(type="text", text="not json")])
+    assert parse_call_tool_result("getConfluencePage", plain) == "not json"
+
+    structured = CallToolResult(content=[], structuredContent={"id": "2"})
+    assert parse_call_tool_result("getConfluencePage", structured) == {"id": "2"}
+
+def test_structured_content_is_used_without_parsing_the_text():
+    # Servers send the same value both ways; the text copy must not be decoded again.
+    result = CallToolResult(content=[TextContent(type="text", text="{not valid json")], structuredContent={"id": "3", "title": "Home"})
+    assert parse_call_tool_result("getConfluencePage", result) == {"id": "3", "title": "Home"}
+
+def test_fastmcp_result_wrapper_is_removed():
+    resources = [{"id": "cloud-1", "name": "site"}]
+    wrapped = CallToolResult(content=[TextContent(type="text", text='[{"id": "cloud-1", "name": "site"}]')], structuredContent={"result": resources})
+    assert parse_call_tool_result("getAccessibleAtlassianResources", wrapped) == resources
+
+    # A tool returning a JSON string is wrapped as {"result": "<json>"}
+    wrapped_text = CallToolResult(content=[], structuredContent={"result": '[{"id": "cloud-1", "name": "site"}]'})
+    assert parse_call_tool_result("getAccessibleAtlassianResources", wrapped_text) == resources
+
+def test_error_results_raise_with_server_message():
+    result = CallToolResult(content=[TextContent(type="text", text="401 Unauthorized")], isError=True)
+    with pytest.raises(MCPToolError) as exc_info:
+        parse_call_tool_result("getConfluencePage", result)
+    assert exc_info.value.tool_name == "getConfluencePage"
+    assert exc_info.value.message == "401 Unauthorized"
+    assert "401" in str(exc_info.value)
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utilities.confluence_tracing import JsonFileTraceExporter, Tracer, build_span_tree, trace_to_otlp
+
+def test_spans_in_tasks_nest_under_the_span_that_started_them():
+    tracer = Tracer()
+
+    @tracer.traced("fetch", "page_id", result_attributes=lambda result: {"saved": result})
+    async def fetch(page_id, fail=False):
+        await asyncio.sleep(0)
+        if fail:
+            raise ValueError("boom")
+        return True
+
+    async def crawl():
+        with tracer.span("request", parent=None):
+            space_span = tracer.start_span("crawl_space", space="S")
+            with tracer.activate(space_span):
+                tasks = [asyncio.create_task(fetch(str(n))) for n in range(3)]
+            await asyncio.gather(*tasks)
+            with pytest.raises(ValueError):
+                await fetch("bad", fail=True)
+            tracer.end_span(space_span, pages_saved=3)
+
+    asyncio.run(crawl())
+    [trace] = tracer.recent_traces()
+    assert trace["name"] == "request" and trace["span_count"] == 6
+    [root] = build_span_tree(trace)
+    space_node, failed_node = root["children"]
+    assert space_node["attributes"] == {"space": "S", "pages_saved": 3}
+    assert [child["attributes"] for child in space_node["children"]] == [{"page_id": str(n), "saved": True} for n in range(3)]
+    assert failed_node["error"] == "ValueError: boom"
+
+def test_span_cap_and_slowest_first():
+    tracer = Tracer(buffer_size=2, max_spans_per_trace=3)
+    for name in ("a", "b", "c"):
+        with tracer.span(name, parent=None):
+            for _ in range(5):
+                with tracer.span("child"):
+                    pass
+    traces = tracer.recent_traces(limit=5)
+    assert sorted(trace["name"] for trace in traces) == ["b", "c"] # Oldest trace evicted
+    assert all(trace["span_count"] == 3 and trace["dropped_spans"] == 3 for trace in traces)
+    assert traces[0]["duration_ms"] >= traces[1]["duration_ms"]
+
+    disabled = Tracer(enabled=False)
+    with disabled.span("request", parent=None) as span:
+        assert span is None
+    assert disabled.recent_traces() == []
+
+def test_json_file_export_and_otlp_payload(tmp_path):
+    tracer = Tracer()
+    exporter = JsonFileTraceExporter(str(tmp_path / "traces" / "traces.jsonl"))
+    tracer.exporters.append(exporter)
+    with tracer.span("request", parent=None, route="/space/content"):
+        with tracer.span("save_content_to_file", page_id="1"):
+            pass
+    tracer.shutdown()
+
+    [line] = (tmp_path / "traces" / "traces.jsonl").read_text().splitlines()
+    trace = json.loads(line)
+    assert [span["name"] for span in trace["spans"]] == ["request", "save_content_to_file"]
+    otlp_spans = trace_to_otlp(trace, "test")["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(otlp_spans[0]["traceId"]) == 32 and "parentSpanId" not in otlp_spans[0]
+    assert otlp_spans[1]["parentSpanId"] == otlp_spans[0]["spanId"]
+    assert otlp_spans[0]["attributes"] == [{"key": "route", "value": {"stringValue": "/space/content"}}]
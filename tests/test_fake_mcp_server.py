@@ -0,0 +1,72 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from tests.fake_mcp_server import CLOUD_ID, FakeConfluence
+from utilities.confluence_tool_client import MCPToolError, parse_call_tool_result
+
+def test_listings_paginate_and_descendants_follow_the_page_tree():
+    fake = FakeConfluence(spaces=2, pages_per_space=23, fanout=3, page_kb=4, default_limit=10)
+
+    async def list_all_pages():
+        page_ids, cursor = [], None
+        while True:
+            response = json.loads(await fake.get_pages_in_confluence_space(CLOUD_ID, "2", cursor=cursor))
+            page_ids += [page["id"] for page in response["results"]]
+            if "next" not in response["_links"]:
+                return page_ids
+            cursor = response["_links"]["next"].split("cursor=")[1].split("&")[0]
+
+    page_ids = asyncio.run(list_all_pages())
+    assert len(page_ids) == len(set(page_ids)) == 23 and fake.call_counts["getPagesInConfluenceSpace"] == 3
+
+    children = json.loads(asyncio.run(fake.get_confluence_page_descendants(CLOUD_ID, "2000001", depth=1)))["results"]
+    assert [child["id"] for child in children] == ["2000004", "2000005", "2000006"]
+    assert all(child["parentId"] == "2000001" for child in children)
+    all_descendants = json.loads(asyncio.run(fake.get_confluence_page_descendants(CLOUD_ID, "2000000", limit=100)))["results"]
+    assert len(all_descendants) == 22
+
+    page = json.loads(asyncio.run(fake.get_confluence_page(CLOUD_ID, "2000004")))
+    assert page["title"] == "Page 4 of Space 2" and len(page["body"]["storage"]["value"]) >= 4 * 1024
+    with pytest.raises(ValueError):
+        asyncio.run(fake.get_confluence_page(CLOUD_ID, "9000000"))
+
+def test_error_injection_is_reproducible_for_a_seed():
+    def failures(seed):
+        fake = FakeConfluence(spaces=1, pages_per_space=50, error_rate=0.3, seed=seed)
+        failed = []
+        for index in range(50):
+            try:
+                asyncio.run(fake.get_confluence_page(CLOUD_ID, str(1_000_000 + index)))
+            except RuntimeError:
+                failed.append(index)
+        return failed
+
+    assert failures(7) == failures(7) and 5 < len(failures(7)) < 25
+
+def test_serves_the_tools_over_stdio():
+    mcp_stdio = pytest.importorskip("mcp.client.stdio")
+    from mcp import ClientSession, StdioServerParameters
+
+    async def call_tools():
+        params = StdioServerParameters(command=sys.executable, args=[str(Path(__file__).parent / "fake_mcp_server.py"), "--spaces", "1", "--pages-per-space", "5", "--error-rate", "1"])
+        async with mcp_stdio.stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                tool_names = {tool.name for tool in (await session.list_tools()).tools}
+                resources = parse_call_tool_result("getAccessibleAtlassianResources", await session.call_tool("getAccessibleAtlassianResources", {}))
+                failed_page = await session.call_tool("getConfluencePage", {"cloudId": CLOUD_ID, "pageId": "1000000"})
+                return tool_names, resources, failed_page
+
+    tool_names, resources, failed_page = asyncio.run(call_tools())
+    assert tool_names == {"getAccessibleAtlassianResources", "getConfluenceSpaces", "getPagesInConfluenceSpace", "getConfluencePage", "getConfluencePageDescendants"}
+    assert resources[0]["id"] == CLOUD_ID
+    with pytest.raises(MCPToolError):
+        parse_call_tool_result("getConfluencePage", failed_page)
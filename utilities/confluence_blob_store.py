@@ -0,0 +1,209 @@
+# confluence_blob_store.py
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed store for saved page content. Each distinct content is written once,
+# as <root>/<first two hex chars>/<sha256>, and the per-endpoint output files
+# (spaces_direct_tool/..., pages_direct_tool/..., all_spaces_direct_tool/...) are hardlinks
+# to that blob. Saving content a view already points to is a no-op, and a page mirrored by
+# several endpoints takes the disk space of one copy. On filesystems without hardlinks the
+# views fall back to regular copies, which are still skipped when their content is unchanged.
+# All methods are synchronous; async callers should run them via asyncio.to_thread.
+# Pruning deletes blobs no view links to. It excludes saves in progress (see _SaveGate), since a
+# blob can be unlinked between put() and the link to its view, and leaves alone temp files and
+# blobs younger than its grace period, which may belong to a save in another process.
+
+SAVE_UNCHANGED = "unchanged"
+SAVE_LINKED = "linked"
+SAVE_COPIED = "copied"
+
+def _sha256_file(path: str) -> Optional[str]:
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+class _SaveGate:
+    """Any number of saves at once, or one prune pass alone. A waiting prune holds back new saves."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._saves = 0
+        self._pruning = False
+        self._prunes_waiting = 0
+
+    @contextmanager
+    def saving(self) -> Iterator[None]:
+        with self._condition:
+            while self._pruning or self._prunes_waiting:
+                self._condition.wait()
+            self._saves += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._saves -= 1
+                if self._saves == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def pruning(self) -> Iterator[None]:
+        with self._condition:
+            self._prunes_waiting += 1
+            while self._pruning or self._saves:
+                self._condition.wait()
+            self._prunes_waiting -= 1
+            self._pruning = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._pruning = False
+                self._condition.notify_all()
+
+class ContentBlobStore:
+    """Stores content by sha256 and materializes output paths as hardlinks (or copies) of the blobs."""
+
+    def __init__(self, root_dir: str, fsync: bool = False):
+        self.root_dir = root_dir
+        self.fsync = fsync
+        os.makedirs(root_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._known_blob_dirs = set()
+        self._gate = _SaveGate()
+        self.stats: Dict[str, int] = {"blobs_written": 0, "blobs_reused": 0, "views_unchanged": 0, "views_linked": 0, "views_copied": 0}
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest[:2], digest)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def stage_blob(self, data: bytes, digest: Optional[str] = None, fsync: bool = False) -> Tuple[str, Optional[str]]:
+        """
+        First step of put(): returns (sha256 hex digest, temp file holding data), or (digest, None)
+        if the blob already exists. The temp file becomes the blob with commit_blob(), so a batch of
+        blobs can be written first and fsynced together (see BatchedFileWriter).
+        """
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            self._count("blobs_reused")
+            return digest, None
+        blob_dir = os.path.dirname(path)
+        if blob_dir not in self._known_blob_dirs:
+            os.makedirs(blob_dir, exist_ok=True)
+            self._known_blob_dirs.add(blob_dir)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        return digest, tmp_path
+
+    def commit_blob(self, digest: str, tmp_path: str) -> None:
+        """Renames a temp file from stage_blob() into place as the blob for digest."""
+        os.replace(tmp_path, self.blob_path(digest))
+        self._count("blobs_written")
+
+    def saving(self):
+        """
+        Context manager to hold around the stage_blob/commit_blob/link_view steps of a save, so
+        prune_unreferenced() does not delete a blob before its view links to it. Must not be nested.
+        """
+        return self._gate.saving()
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> str:
+        """Stores data (if not already present) and returns its sha256 hex digest."""
+        with self.saving():
+            return self._put(data, digest)
+
+    def _put(self, data: bytes, digest: Optional[str]) -> str:
+        # A blob is trusted by name from then on, so it must never exist half-written.
+        digest, tmp_path = self.stage_blob(data, digest, fsync=self.fsync)
+        if tmp_path:
+            self.commit_blob(digest, tmp_path)
+        return digest
+
+    def save(self, data: bytes, view_path: str, make_dirs: bool = True, digest: Optional[str] = None) -> str:
+        """
+        Makes view_path hold data. Returns SAVE_UNCHANGED if it already did, SAVE_LINKED if it
+        was (re)linked to the blob, or SAVE_COPIED if hardlinks are unavailable and it was copied.
+        The view is replaced atomically, so readers never see a partial file. Pass make_dirs=False
+        if the caller has already created the view's directory.
+        """
+        with self.saving():
+            return self.link_view(self._put(data, digest), len(data), view_path, make_dirs)
+
+    def link_view(self, digest: str, size: int, view_path: str, make_dirs: bool = True) -> str:
+        """Last step of save(): points view_path at the stored blob for digest (size bytes)."""
+        blob = self.blob_path(digest)
+
+        if os.path.exists(view_path):
+            try:
+                if os.path.samefile(view_path, blob):
+                    self._count("views_unchanged")
+                    return SAVE_UNCHANGED
+            except OSError:
+                pass
+            if os.path.getsize(view_path) == size and _sha256_file(view_path) == digest:
+                self._count("views_unchanged")
+                return SAVE_UNCHANGED
+
+        view_dir = os.path.dirname(view_path)
+        if view_dir and make_dirs:
+            os.makedirs(view_dir, exist_ok=True)
+        tmp_path = f"{view_path}.{uuid.uuid4().hex[:12]}.tmp"
+        try:
+            os.link(blob, tmp_path)
+            outcome = SAVE_LINKED
+        except OSError as e:
+            logger.debug(f"Hardlink from {blob} to {view_path} failed ({e}); copying instead.")
+            shutil.copyfile(blob, tmp_path)
+            outcome = SAVE_COPIED
+        os.replace(tmp_path, view_path)
+        self._count("views_linked" if outcome == SAVE_LINKED else "views_copied")
+        return outcome
+
+    def prune_unreferenced(self, grace_seconds: float = 0.0) -> int:
+        """
+        Deletes blobs no output file links to any more (link count 1), e.g. old versions of pages
+        whose view now points at newer content, and temp files left behind by interrupted saves.
+        Blobs and temp files modified less than grace_seconds ago are kept. Saves in this process
+        wait while a blob directory is being pruned. Returns the number of files removed.
+        """
+        removed = 0
+        cutoff = time.time() - grace_seconds
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            with self._gate.pruning():
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                        if stat.st_mtime > cutoff:
+                            continue
+                        if filename.endswith(".tmp") or stat.st_nlink <= 1:
+                            os.remove(path)
+                            removed += 1
+                    except FileNotFoundError:
+                        continue
+                    except OSError as e:
+                        logger.warning(f"Could not prune blob {path}: {e}")
+        logger.info(f"Pruned {removed} unreferenced blobs from {self.root_dir}")
+        return removed
@@ -0,0 +1,180 @@
+# confluence_cache.py
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from utilities.confluence_shared_state import SharedStateStore
+
+logger = logging.getLogger(__name__)
+
+# In-process cache for Atlassian lookups that almost never change between requests:
+# the cloud ID returned by getAccessibleAtlassianResources and the space list returned
+# by getConfluenceSpaces. Spaces are indexed by lower-cased name and key so resolving a
+# space is a dict lookup instead of a scan over every space.
+# With a shared store attached (several API workers), values are also written there, and a
+# worker that misses locally picks up what another worker fetched, with the same expiry.
+# invalidate() bumps a generation counter in the store that every worker checks at most every
+# generation_check_interval_seconds, so POST /cache/invalidate on any worker clears them all
+# within that interval. Local hits never touch the store, and the store's (blocking SQLite)
+# calls run in a worker thread, so a busy database does not stall the event loop.
+
+_SHARED_KEY_PREFIX = "directory:"
+_SHARED_GENERATION_KEY = "directory_generation"
+
+class ConfluenceDirectoryCache:
+    """TTL cache for the Atlassian cloud ID and the Confluence space directory."""
+
+    def __init__(self, cloud_id_ttl_seconds: float, spaces_ttl_seconds: float, generation_check_interval_seconds: float = 1.0):
+        self.cloud_id_ttl_seconds = cloud_id_ttl_seconds
+        self.spaces_ttl_seconds = spaces_ttl_seconds
+        self.generation_check_interval_seconds = generation_check_interval_seconds
+        self._lock = threading.Lock()
+        self._cloud_id: Optional[str] = None
+        self._cloud_id_expires_at = 0.0
+        self._spaces: Dict[str, List[Dict[str, Any]]] = {}
+        self._space_index: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._spaces_expires_at: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_store: Optional[SharedStateStore] = None
+        self._shared_generation = 0
+        self._next_generation_check = 0.0
+
+    def attach_shared_store(self, shared_store: Optional[SharedStateStore]) -> None:
+        """Backs the cache with shared_store (None detaches it). Local entries are dropped. Call at startup."""
+        with self._lock:
+            self.shared_store = shared_store
+            self._clear_local()
+            self._shared_generation = shared_store.get(_SHARED_GENERATION_KEY, 0) if shared_store else 0
+            self._next_generation_check = time.monotonic() + self.generation_check_interval_seconds
+
+    def _clear_local(self) -> None:
+        self._cloud_id = None
+        self._cloud_id_expires_at = 0.0
+        self._spaces.clear()
+        self._space_index.clear()
+        self._spaces_expires_at.clear()
+
+    async def _check_shared_generation(self) -> None:
+        """Drops local entries if any worker has invalidated the cache since they were loaded (checked at most once per interval)."""
+        store = self.shared_store
+        if store is None or time.monotonic() < self._next_generation_check:
+            return
+        self._next_generation_check = time.monotonic() + self.generation_check_interval_seconds
+        generation = await asyncio.to_thread(store.get, _SHARED_GENERATION_KEY, 0)
+        with self._lock:
+            if generation != self._shared_generation:
+                self._clear_local()
+                self._shared_generation = generation
+
+    @staticmethod
+    def _local_expiry(shared_expires_at: Optional[float], ttl_seconds: float) -> float:
+        """Converts a shared (wall-clock) expiry to the monotonic clock used locally."""
+        if shared_expires_at is None:
+            return time.monotonic() + ttl_seconds
+        return time.monotonic() + max(0.0, shared_expires_at - time.time())
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    async def get_cloud_id(self) -> Optional[str]:
+        """Returns the cached cloud ID, or None if it is missing or expired."""
+        await self._check_shared_generation()
+        with self._lock:
+            if self._cloud_id is not None and time.monotonic() < self._cloud_id_expires_at:
+                self._record(True)
+                return self._cloud_id
+        store = self.shared_store
+        entry = await asyncio.to_thread(store.get_entry, f"{_SHARED_KEY_PREFIX}cloud_id") if store is not None else None
+        with self._lock:
+            if entry is not None:
+                self._cloud_id = entry[0]
+                self._cloud_id_expires_at = self._local_expiry(entry[1], self.cloud_id_ttl_seconds)
+            self._record(entry is not None)
+        return entry[0] if entry is not None else None
+
+    async def set_cloud_id(self, cloud_id: str) -> None:
+        with self._lock:
+            self._cloud_id = cloud_id
+            self._cloud_id_expires_at = time.monotonic() + self.cloud_id_ttl_seconds
+        if self.shared_store is not None:
+            await asyncio.to_thread(self.shared_store.set, f"{_SHARED_KEY_PREFIX}cloud_id", cloud_id, self.cloud_id_ttl_seconds)
+
+    async def get_spaces(self, cloud_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Returns the cached space list for cloud_id, or None if it is missing or expired."""
+        hit = await self._has_fresh_spaces(cloud_id)
+        with self._lock:
+            self._record(hit)
+            return self._spaces.get(cloud_id) if hit else None
+
+    async def _has_fresh_spaces(self, cloud_id: str) -> bool:
+        """True if a fresh space list for cloud_id is held locally, loading it from the shared store if needed."""
+        await self._check_shared_generation()
+        with self._lock:
+            if cloud_id in self._spaces and time.monotonic() < self._spaces_expires_at.get(cloud_id, 0.0):
+                return True
+        store = self.shared_store
+        if store is None:
+            return False
+        entry = await asyncio.to_thread(store.get_entry, f"{_SHARED_KEY_PREFIX}spaces:{cloud_id}")
+        if entry is None:
+            return False
+        with self._lock:
+            self._store_spaces(cloud_id, entry[0], self._local_expiry(entry[1], self.spaces_ttl_seconds))
+        return True
+
+    async def set_spaces(self, cloud_id: str, spaces: List[Dict[str, Any]]) -> None:
+        """Caches the space list for cloud_id and rebuilds its name/key index."""
+        with self._lock:
+            self._store_spaces(cloud_id, spaces, time.monotonic() + self.spaces_ttl_seconds)
+        if self.shared_store is not None:
+            await asyncio.to_thread(self.shared_store.set, f"{_SHARED_KEY_PREFIX}spaces:{cloud_id}", spaces, self.spaces_ttl_seconds)
+
+    def _store_spaces(self, cloud_id: str, spaces: List[Dict[str, Any]], expires_at: float) -> None:
+        """Holds spaces locally until expires_at (monotonic) and builds the name/key index. Caller holds _lock."""
+        index: Dict[str, Dict[str, Any]] = {}
+        for space_obj in spaces:
+            if not isinstance(space_obj, dict) or not space_obj.get("id"):
+                continue
+            # Keys take precedence over names when a name happens to equal another space's key.
+            s_name = space_obj.get("name")
+            if isinstance(s_name, str):
+                index.setdefault(s_name.lower(), space_obj)
+        for space_obj in spaces:
+            if isinstance(space_obj, dict) and space_obj.get("id") and isinstance(space_obj.get("key"), str):
+                index[space_obj["key"].lower()] = space_obj
+
+        self._spaces[cloud_id] = spaces
+        self._space_index[cloud_id] = index
+        self._spaces_expires_at[cloud_id] = expires_at
+        logger.debug(f"Cached {len(spaces)} spaces ({len(index)} index entries) for cloud ID {cloud_id}")
+
+    async def find_space(self, cloud_id: str, space_name_or_key: str) -> Optional[Dict[str, Any]]:
+        """Looks up a space by name or key (case-insensitive) in the cached directory, if still fresh."""
+        hit = await self._has_fresh_spaces(cloud_id)
+        with self._lock:
+            space_obj = self._space_index.get(cloud_id, {}).get(space_name_or_key.lower()) if hit else None
+            self._record(space_obj is not None)
+            return space_obj
+
+    async def has_spaces(self, cloud_id: str) -> bool:
+        """True if a fresh space list is cached for cloud_id. Does not count as a lookup."""
+        return await self._has_fresh_spaces(cloud_id)
+
+    async def invalidate(self) -> None:
+        """Drops every cached value (in every worker, if a shared store is attached)."""
+        with self._lock:
+            self._clear_local()
+        store = self.shared_store
+        if store is not None:
+            await asyncio.to_thread(store.delete_prefix, _SHARED_KEY_PREFIX)
+            generation = await asyncio.to_thread(store.increment, _SHARED_GENERATION_KEY)
+            with self._lock:
+                self._clear_local() # Anything loaded from the store meanwhile
+                self._shared_generation = generation
+        logger.info("Confluence directory cache invalidated.")
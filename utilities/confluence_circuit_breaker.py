@@ -0,0 +1,108 @@
+# confluence_circuit_breaker.py
+
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker for the MCP bridge. While the bridge is down or its auth has expired, every tool
+# call would otherwise wait for its own timeout before failing. The breaker counts consecutive
+# connectivity/auth failures; at failure_threshold it opens and calls fail immediately with
+# CircuitOpenError. After reset_timeout_seconds it goes half-open and lets a single probe call
+# through: success closes the circuit, failure opens it for another reset_timeout_seconds.
+# Which errors count as failures is decided by the caller (record_failure vs record_success).
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit is open."""
+
+    retryable = False # Tells call_with_retries not to retry; the breaker has already given up on the backend.
+
+    def __init__(self, name: str, retry_in_seconds: float, last_error: str):
+        super().__init__(f"{name} circuit breaker is open; calls are rejected for the next {retry_in_seconds:.1f}s. Last failure: {last_error}")
+        self.retry_in_seconds = retry_in_seconds
+        self.last_error = last_error
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    def __init__(self, name: str = "MCP", failure_threshold: int = 5, reset_timeout_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.last_error = ""
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"opened": 0, "rejected": 0, "probes": 0}
+
+    def _retry_in(self) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout_seconds - time.monotonic())
+
+    def before_call(self) -> None:
+        """Admits a call or raises CircuitOpenError. Moves open -> half-open once the reset timeout has passed."""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+            if self.state == STATE_OPEN and self._retry_in() <= 0:
+                self.state = STATE_HALF_OPEN
+                logger.info(f"{self.name} circuit breaker half-open; sending a probe call.")
+            if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self.stats["probes"] += 1
+                return
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(self.name, self._retry_in(), self.last_error)
+
+    def record_success(self) -> None:
+        """The backend answered (including tool-level errors): resets the failure count and closes the circuit."""
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                logger.info(f"{self.name} circuit breaker closed; backend is reachable again.")
+            self.state = STATE_CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        """A connectivity/auth failure: opens the circuit at the threshold, or again if the probe failed."""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error)[:200]
+            if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    self.stats["opened"] += 1
+                    logger.error(f"{self.name} circuit breaker opened after {self.consecutive_failures} consecutive failures; rejecting calls for {self.reset_timeout_seconds}s. Last failure: {self.last_error}")
+                self.state = STATE_OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def record_cancelled(self) -> None:
+        """The call was cancelled before it finished; frees the probe slot without judging the backend."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (open, and the reset timeout has not yet passed)."""
+        with self._lock:
+            return self.state == STATE_OPEN and self._retry_in() > 0
+
+    def retry_in_seconds(self) -> float:
+        with self._lock:
+            return self._retry_in() if self.state == STATE_OPEN else 0.0
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in_seconds": round(self._retry_in(), 1) if self.state == STATE_OPEN else 0.0,
+                "last_error": self.last_error or None,
+                **self.stats,
+            }
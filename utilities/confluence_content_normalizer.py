@@ -0,0 +1,150 @@
+# confluence_content_normalizer.py
+
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utilities.confluence_markdown import convert_html_to_markdown
+
+logger = logging.getLogger(__name__)
+
+# Normalization stage for getConfluencePage responses: pick the page body out of the response,
+# strip conversational prefixes the bridge sometimes puts in front of it, and render it as
+# html (unchanged), markdown (utilities/confluence_markdown.py) or text.
+#
+# - The known prefixes are one anchored pattern, matched once at the start of the body. Only the
+#   match end is used, so the body is sliced at most once and never scanned past the prefix.
+# - Body extractors are registered in priority order. The extractor for a response is picked
+#   once per response shape (which keys are present and their types) and cached, so later
+#   responses of the same shape go straight to their extractor.
+# - Extractors return the body string from the response without copying it.
+
+KNOWN_PREFIX_PATTERNS = [
+    r"Here is the HTML content for the page with ID '[\w\d-]+':",
+    r"Here's the HTML content for the page titled '[^']+'(?: in space '[^']+')?:",
+    r"The HTML content for page ID '[\w\d-]+' is:",
+    r"Okay, here is the content:",
+    r"Sure, here's the HTML:",
+]
+
+_PREFIX_RE = re.compile(r"\s*(?:(?:" + "|".join(KNOWN_PREFIX_PATTERNS) + r")\s*)*", re.IGNORECASE)
+
+def strip_known_prefixes(content: str) -> str:
+    """Strips known conversational prefixes and leading whitespace. Returns content itself if there are none."""
+    offset = _PREFIX_RE.match(content).end()
+    return content[offset:] if offset else content
+
+# --- Body extractors ---
+BodyExtractor = Callable[[Dict[str, Any]], Optional[str]]
+
+_BODY_EXTRACTORS: List[Tuple[str, BodyExtractor]] = []
+_extractor_by_shape: Dict[Tuple, Optional[Tuple[str, BodyExtractor]]] = {}
+
+def register_body_extractor(name: str, extractor: BodyExtractor, first: bool = False) -> None:
+    """
+    Registers a function that returns the page body from a response dict, or None if it does not
+    apply. Extractors are tried in registration order (first=True puts this one in front).
+    """
+    entry = (name, extractor)
+    if first:
+        _BODY_EXTRACTORS.insert(0, entry)
+    else:
+        _BODY_EXTRACTORS.append(entry)
+    _extractor_by_shape.clear()
+
+def _nested_value(container: Any, key: str) -> Optional[str]:
+    value = container.get(key) if isinstance(container, dict) else None
+    if isinstance(value, dict):
+        value = value.get("value")
+    return value if isinstance(value, str) else None
+
+register_body_extractor("html", lambda response: response.get("html") if isinstance(response.get("html"), str) else None)
+register_body_extractor("body", lambda response: response.get("body") if isinstance(response.get("body"), str) else None)
+register_body_extractor("body.view", lambda response: _nested_value(response.get("body"), "view"))
+register_body_extractor("body.storage", lambda response: _nested_value(response.get("body"), "storage"))
+register_body_extractor("body.raw", lambda response: response["body"].get("raw") if isinstance(response.get("body"), dict) and isinstance(response["body"].get("raw"), str) else None)
+
+def _type_name(value: Any) -> str:
+    return type(value).__name__
+
+def _response_shape(response: Dict[str, Any]) -> Tuple:
+    """The key/type layout of the parts of a response the extractors look at."""
+    body = response.get("body")
+    body_shape: Tuple = ()
+    if isinstance(body, dict):
+        body_shape = tuple(sorted(
+            (key, _type_name(value), _type_name(value.get("value")) if isinstance(value, dict) else "")
+            for key, value in body.items()
+        ))
+    return (_type_name(response.get("html")), _type_name(body), body_shape)
+
+def extract_page_body(response: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (body, extractor name) for a page response, or (None, None) if no extractor applies."""
+    shape = _response_shape(response)
+    if shape in _extractor_by_shape:
+        chosen = _extractor_by_shape[shape]
+        return (chosen[1](response), chosen[0]) if chosen else (None, None)
+    for name, extractor in _BODY_EXTRACTORS:
+        body = extractor(response)
+        if body is not None:
+            _extractor_by_shape[shape] = (name, extractor)
+            logger.debug(f"Using body extractor '{name}' for response shape {shape}")
+            return body, name
+    _extractor_by_shape[shape] = None
+    return None, None
+
+# --- Output formats ---
+_BLOCK_TAGS = {"p", "div", "br", "tr", "li", "ul", "ol", "table", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "hr"}
+
+class _HTMLTextRenderer(HTMLParser):
+    """Single-pass HTML walker producing plain text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def _newline(self, count: int = 1) -> None:
+        self.parts.append("\n" * count)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip_depth += 1
+            return
+        if tag in _BLOCK_TAGS:
+            self._newline(2 if tag in ("p", "table", "pre", "blockquote") or tag.startswith("h") else 1)
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if tag in _BLOCK_TAGS and tag not in ("li", "tr"): # Those end where the next one starts
+            self._newline()
+        elif tag in ("td", "th"):
+            self.parts.append("\t")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def render(self, html: str) -> str:
+        self.feed(html)
+        self.close()
+        return re.sub(r"\n{3,}", "\n\n", "".join(self.parts)).strip() + "\n"
+
+def html_to_text(html: str) -> str:
+    return _HTMLTextRenderer().render(html)
+
+OUTPUT_FORMATS: Dict[str, Callable[[str], str]] = {
+    "html": lambda html: html,
+    "markdown": convert_html_to_markdown,
+    "text": html_to_text,
+}
+
+def normalize_page_body(body: str, output_format: str = "html") -> str:
+    """Strips known prefixes from an extracted body and renders it in output_format."""
+    converter = OUTPUT_FORMATS.get(output_format)
+    if converter is None:
+        raise ValueError(f"Unknown output format '{output_format}'. Expected one of: {', '.join(OUTPUT_FORMATS)}")
+    return converter(strip_known_prefixes(body))
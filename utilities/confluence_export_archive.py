@@ -0,0 +1,157 @@
+# confluence_export_archive.py
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import tarfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Optional dependency: tar.zst exports need the 'zstandard' package.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Single-file export containers for the bulk endpoints, as an alternative to one loose file per page.
+#
+#   jsonl.gz  - one JSON record {id, title, space, version, html} per line, gzip-compressed.
+#   tar.gz    - a tar archive with one <space>/<title>_<id>.html member per page, gzip-compressed.
+#   tar.zst   - the same tar archive, zstd-compressed (requires 'zstandard').
+#
+# Every record (jsonl line or tar member) is compressed as its own gzip member / zstd frame and
+# appended to the file. Concatenated members form a valid stream, so the archives open with the
+# usual tools (zcat, tar -xzf, tar --zstd -xf). Because each record starts at a known byte offset,
+# the sidecar index (<archive>.index.json) allows random access: seek to 'offset', read 'length'
+# bytes and decompress that one member (see read_export_record).
+
+EXPORT_FORMATS = ("jsonl.gz", "tar.gz", "tar.zst")
+INDEX_SUFFIX = ".index.json"
+
+def is_export_format_available(export_format: str) -> bool:
+    return export_format in EXPORT_FORMATS and (export_format != "tar.zst" or zstandard is not None)
+
+def _compress(data: bytes, export_format: str) -> bytes:
+    if export_format == "tar.zst":
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def _decompress(data: bytes, export_format: str) -> bytes:
+    if export_format == "tar.zst":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def _safe_name(value: Optional[str], fallback: str) -> str:
+    return "".join(c if c.isalnum() else '_' for c in (value or fallback))
+
+def _tar_member(name: str, data: bytes) -> bytes:
+    """A complete tar member (header, data, padding to 512 bytes) for a regular file."""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    padding = (tarfile.BLOCKSIZE - len(data) % tarfile.BLOCKSIZE) % tarfile.BLOCKSIZE
+    return info.tobuf(format=tarfile.PAX_FORMAT) + data + b"\0" * padding
+
+class ExportArchiveWriter:
+    """Appends page records to one compressed export archive and keeps its offset index."""
+
+    def __init__(self, archive_path: str, export_format: str):
+        if not is_export_format_available(export_format):
+            raise ValueError(f"Export format '{export_format}' is not available.")
+        self.archive_path = archive_path
+        self.export_format = export_format
+        self.index_path = archive_path + INDEX_SUFFIX
+        self.entries: List[Dict[str, Any]] = []
+        self._offset = 0
+        self._uncompressed_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(archive_path) or ".", exist_ok=True)
+        self._file = open(archive_path, "wb")
+        self._closed = False
+
+    def _encode(self, record: Dict[str, Any]) -> bytes:
+        if self.export_format == "jsonl.gz":
+            return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        member_name = f"{_safe_name(record.get('space'), 'no_space')}/{_safe_name(record.get('title'), 'untitled')}_{_safe_name(str(record.get('id')), 'no_id')}.html"
+        return _tar_member(member_name, (record.get("html") or "").encode("utf-8"))
+
+    def _add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        raw = self._encode(record)
+        compressed = _compress(raw, self.export_format)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Export archive {self.archive_path} is already closed.")
+            entry = {
+                "id": record.get("id"),
+                "title": record.get("title"),
+                "space": record.get("space"),
+                "version": record.get("version"),
+                "offset": self._offset,
+                "length": len(compressed),
+            }
+            self._file.write(compressed)
+            self._offset += len(compressed)
+            self._uncompressed_bytes += len(raw)
+            self.entries.append(entry)
+        return entry
+
+    async def add_page(self, page_id: Any, title: Optional[str], space: Optional[str], version: Optional[int], html: str) -> Dict[str, Any]:
+        """Compresses and appends one page record (in a worker thread). Returns its index entry."""
+        record = {"id": page_id, "title": title, "space": space, "version": version, "html": html}
+        return await asyncio.to_thread(self._add, record)
+
+    def _close(self, complete: bool) -> Dict[str, Any]:
+        with self._lock:
+            if self._closed:
+                return self.summary(complete)
+            if self.export_format != "jsonl.gz":
+                # End-of-archive marker: two zero blocks, as its own compressed member.
+                self._file.write(_compress(b"\0" * tarfile.BLOCKSIZE * 2, self.export_format))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._closed = True
+
+        index = {"format": self.export_format, "archive": os.path.basename(self.archive_path), "complete": complete, "records": self.entries}
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        logger.info(f"Export archive {self.archive_path} closed with {len(self.entries)} records ({self._offset} bytes compressed, {self._uncompressed_bytes} uncompressed).")
+        return self.summary(complete)
+
+    async def close(self, complete: bool = True) -> Dict[str, Any]:
+        """Finishes the archive and writes its index. complete=False marks an interrupted export."""
+        return await asyncio.to_thread(self._close, complete)
+
+    def summary(self, complete: bool = True) -> Dict[str, Any]:
+        return {
+            "export_format": self.export_format,
+            "archive_path": self.archive_path,
+            "index_path": self.index_path,
+            "records": len(self.entries),
+            "compressed_bytes": self._offset,
+            "uncompressed_bytes": self._uncompressed_bytes,
+            "complete": complete,
+        }
+
+def read_export_record(archive_path: str, entry: Dict[str, Any], export_format: str) -> Any:
+    """
+    Random access to one record via its index entry. Returns the record dict for jsonl.gz,
+    or the page HTML (str) for tar formats.
+    """
+    with open(archive_path, "rb") as f:
+        f.seek(entry["offset"])
+        raw = _decompress(f.read(entry["length"]), export_format)
+    if export_format == "jsonl.gz":
+        return json.loads(raw)
+    with tarfile.open(fileobj=io.BytesIO(raw + b"\0" * tarfile.BLOCKSIZE * 2)) as tar:
+        member = tar.next()
+        return tar.extractfile(member).read().decode("utf-8")
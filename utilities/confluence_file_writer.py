@@ -0,0 +1,268 @@
+# confluence_file_writer.py
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utilities.confluence_blob_store import ContentBlobStore, SAVE_COPIED, SAVE_LINKED, SAVE_UNCHANGED
+
+logger = logging.getLogger(__name__)
+
+# Write stage for saved page content. Callers hand (path, bytes) to BatchedFileWriter.write(),
+# which puts them on a bounded queue; a few writer tasks take whatever is queued (up to
+# batch_size items) and write the whole batch in one worker-thread hop instead of one hop per
+# makedirs/open/write/close. Each file is written to a temp file and renamed into place, so a
+# crash never leaves a partial file at the target path. With fsync enabled, the temp files of a
+# batch are all written first, then fsynced, renamed, and each distinct directory is fsynced once.
+# When a ContentBlobStore is given, writes go through it instead (hardlinked views, skip-unchanged),
+# batched the same way: the batch's new blobs are written, fsynced together and renamed, then the
+# views are linked to them, with each blob and view directory fsynced once per batch.
+
+WRITE_WRITTEN = "written"
+
+_WriteItem = Tuple[str, bytes, asyncio.Future]
+
+def _fsync_file(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class BatchedFileWriter:
+    """Bounded-queue, batched, atomic file writer served by a small pool of writer tasks."""
+
+    def __init__(
+        self,
+        worker_count: int = 2,
+        queue_size: int = 256,
+        batch_size: int = 32,
+        fsync: bool = True,
+        content_store: Optional[ContentBlobStore] = None,
+    ):
+        self.worker_count = max(1, worker_count)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.fsync = fsync
+        self.content_store = content_store
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._known_dirs: Set[str] = set()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"files_written": 0, "batches": 0, "errors": 0}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(self.worker_count)]
+        logger.info(f"File writer started with {self.worker_count} workers (queue size {self.queue_size}, batch size {self.batch_size}, fsync={self.fsync}).")
+
+    async def write(self, path: str, data: bytes) -> str:
+        """
+        Queues data to be written atomically to path and waits until it is on disk.
+        Returns the write outcome ('written', or the content store's 'linked'/'copied'/'unchanged').
+        Waits for queue space when the writers are behind, which throttles producers.
+        """
+        if self._queue is None:
+            raise RuntimeError("File writer is not started.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((path, data, future))
+        return await future
+
+    async def _worker(self, worker_number: int) -> None:
+        while True:
+            batch: List[_WriteItem] = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                outcomes = await asyncio.to_thread(self._write_batch, [(path, data) for path, data, _ in batch])
+                for (_, _, future), outcome in zip(batch, outcomes):
+                    if future.done():
+                        continue
+                    if isinstance(outcome, BaseException):
+                        future.set_exception(outcome)
+                    else:
+                        future.set_result(outcome)
+            except asyncio.CancelledError:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"File writer {worker_number} failed on a batch of {len(batch)}: {e}", exc_info=True)
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _ensure_dir(self, dir_name: str) -> None:
+        if not dir_name or dir_name in self._known_dirs:
+            return
+        os.makedirs(dir_name, exist_ok=True)
+        with self._lock:
+            self._known_dirs.add(dir_name)
+
+    def _forget_dir(self, dir_name: str) -> None:
+        with self._lock:
+            self._known_dirs.discard(dir_name)
+
+    def _in_dir(self, path: str, action: Callable[[], Any]) -> Any:
+        """Runs action (which writes into path's directory) after making sure the directory exists."""
+        dir_name = os.path.dirname(path)
+        self._ensure_dir(dir_name)
+        try:
+            return action()
+        except FileNotFoundError:
+            # The directory was removed since it was cached; recreate it once.
+            self._forget_dir(dir_name)
+            self._ensure_dir(dir_name)
+            return action()
+
+    def _write_tmp(self, path: str, data: bytes) -> str:
+        tmp_path = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        return tmp_path
+
+    def _sync_dirs(self, dir_names: Set[str]) -> None:
+        if not self.fsync or not hasattr(os, "O_DIRECTORY"):
+            return
+        for dir_name in dir_names:
+            try:
+                fd = os.open(dir_name, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.warning(f"Could not fsync directory {dir_name}: {e}")
+
+    def _write_batch(self, items: List[Tuple[str, bytes]]) -> List[Any]:
+        """Runs in a worker thread. Returns one outcome (or exception) per item, in order."""
+        if self.content_store:
+            with self.content_store.saving(): # Keeps a concurrent prune from deleting blobs the batch links to
+                outcomes = self._write_store_batch(items)
+        else:
+            outcomes = self._write_file_batch(items)
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["errors"] += sum(1 for outcome in outcomes if isinstance(outcome, BaseException))
+            self.stats["files_written"] += sum(1 for outcome in outcomes if outcome in (WRITE_WRITTEN, SAVE_LINKED, SAVE_COPIED))
+        return outcomes
+
+    def _write_file_batch(self, items: List[Tuple[str, bytes]]) -> List[Any]:
+        outcomes: List[Any] = [None] * len(items)
+        staged: List[Tuple[int, str, str]] = []
+        for i, (path, data) in enumerate(items):
+            try:
+                staged.append((i, path, self._in_dir(path, lambda path=path, data=data: self._write_tmp(path, data))))
+            except Exception as e:
+                logger.error(f"Error writing {path}: {e}")
+                outcomes[i] = e
+
+        if self.fsync:
+            for i, path, tmp_path in staged:
+                try:
+                    _fsync_file(tmp_path)
+                except OSError as e:
+                    logger.error(f"Error syncing {path}: {e}")
+                    outcomes[i] = e
+
+        synced_dirs: Set[str] = set()
+        for i, path, tmp_path in staged:
+            if isinstance(outcomes[i], BaseException):
+                _remove_quietly(tmp_path)
+                continue
+            try:
+                os.replace(tmp_path, path)
+                outcomes[i] = WRITE_WRITTEN
+                synced_dirs.add(os.path.dirname(path) or ".")
+            except OSError as e:
+                logger.error(f"Error renaming {tmp_path} to {path}: {e}")
+                outcomes[i] = e
+        self._sync_dirs(synced_dirs)
+        return outcomes
+
+    def _write_store_batch(self, items: List[Tuple[str, bytes]]) -> List[Any]:
+        """
+        Same batching through the content store: the new blobs of the batch are written to temp
+        files, fsynced, renamed into place and their directories fsynced once each; only then are
+        the views linked to them (and the views' directories fsynced once each).
+        """
+        store = self.content_store
+        outcomes: List[Any] = [None] * len(items)
+        digests: List[Optional[str]] = [None] * len(items)
+        staged_blobs: Dict[str, Optional[str]] = {} # digest -> temp file, None if the blob already existed
+        failed_blobs: Dict[str, BaseException] = {}
+        for i, (path, data) in enumerate(items):
+            try:
+                digest = hashlib.sha256(data).hexdigest()
+                digests[i] = digest
+                if digest not in staged_blobs:
+                    staged_blobs[digest] = store.stage_blob(data, digest)[1]
+            except Exception as e:
+                logger.error(f"Error writing {path}: {e}")
+                outcomes[i] = e
+
+        if self.fsync:
+            for digest, tmp_path in staged_blobs.items():
+                if tmp_path:
+                    try:
+                        _fsync_file(tmp_path)
+                    except OSError as e:
+                        logger.error(f"Error syncing blob {digest}: {e}")
+                        failed_blobs[digest] = e
+
+        blob_dirs: Set[str] = set()
+        for digest, tmp_path in staged_blobs.items():
+            if not tmp_path:
+                continue
+            if digest in failed_blobs:
+                _remove_quietly(tmp_path)
+                continue
+            try:
+                store.commit_blob(digest, tmp_path)
+                blob_dirs.add(os.path.dirname(store.blob_path(digest)))
+            except OSError as e:
+                logger.error(f"Error storing blob {digest}: {e}")
+                failed_blobs[digest] = e
+        self._sync_dirs(blob_dirs)
+
+        view_dirs: Set[str] = set()
+        for i, (path, data) in enumerate(items):
+            digest = digests[i]
+            if isinstance(outcomes[i], BaseException):
+                continue
+            if digest in failed_blobs:
+                outcomes[i] = failed_blobs[digest]
+                continue
+            try:
+                outcomes[i] = self._in_dir(path, lambda path=path, digest=digest, size=len(data): store.link_view(digest, size, path, make_dirs=False))
+                if outcomes[i] != SAVE_UNCHANGED:
+                    view_dirs.add(os.path.dirname(path) or ".")
+            except Exception as e:
+                logger.error(f"Error writing {path}: {e}")
+                outcomes[i] = e
+        self._sync_dirs(view_dirs)
+        return outcomes
+
+    async def close(self) -> None:
+        """Waits for queued writes to finish, then stops the writer tasks."""
+        if self._queue is not None:
+            await self._queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"File writer stopped: {self.stats}")
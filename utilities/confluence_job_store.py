@@ -0,0 +1,252 @@
+# confluence_job_store.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# SQLite-backed store for background crawl jobs. Besides the job rows themselves it keeps a
+# checkpoint table of page ids each job has already saved, so a job interrupted by a dropped
+# connection or a process restart can resume without refetching those pages, and a table of
+# the spaces each job covers. Spaces are the unit of work: with several API workers, each
+# worker takes the pending spaces it can lease (see utilities/confluence_shared_state.py), and
+# the job's counters are the sums over its spaces.
+# All methods are synchronous; async callers should run them via asyncio.to_thread.
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+
+JOB_SPACE_STATUS_PENDING = "pending"
+JOB_SPACE_STATUS_DONE = "done"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    spaces_total INTEGER NOT NULL DEFAULT 0,
+    spaces_completed INTEGER NOT NULL DEFAULT 0,
+    pages_saved INTEGER NOT NULL DEFAULT 0,
+    pages_failed INTEGER NOT NULL DEFAULT 0,
+    pages_skipped INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    job_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    PRIMARY KEY (job_id, page_id)
+);
+CREATE TABLE IF NOT EXISTS job_spaces (
+    job_id TEXT NOT NULL,
+    space_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    space_name TEXT,
+    space_key TEXT,
+    status TEXT NOT NULL,
+    pages_saved INTEGER NOT NULL DEFAULT 0,
+    pages_failed INTEGER NOT NULL DEFAULT 0,
+    pages_skipped INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job_id, space_id)
+);
+"""
+
+_SPACE_PROGRESS_COLUMNS = ("pages_saved", "pages_failed", "pages_skipped")
+
+class JobStore:
+    """Persists background jobs and their completed-page checkpoints in a local SQLite database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Several worker processes may share the database; wait for each other's write locks.
+        self._conn = sqlite3.connect(db_path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        logger.info(f"Job store ready at {db_path}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def create_job(self, job_type: str, params: Dict[str, Any]) -> str:
+        """Inserts a new queued job and returns its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, job_type, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, job_type, json.dumps(params), JOB_STATUS_QUEUED, now, now)
+            )
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the job row (with decoded params and checkpoint count), or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            checkpointed = self._conn.execute("SELECT COUNT(*) FROM job_checkpoints WHERE job_id = ?", (job_id,)).fetchone()[0]
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["pages_checkpointed"] = checkpointed
+        return job
+
+    def list_resumable_job_ids(self) -> List[str]:
+        """Ids of jobs that were queued or running when the process last stopped, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def mark_running(self, job_id: str) -> bool:
+        """Marks a queued or running job as running (one more attempt); False if it has already finished."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?), updated_at = ?, attempts = attempts + 1, error = NULL "
+                "WHERE id = ? AND status IN (?, ?)",
+                (JOB_STATUS_RUNNING, now, now, job_id, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def mark_finished(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, updated_at = ?, error = ? WHERE id = ?",
+                (status, now, now, error, job_id)
+            )
+
+    def add_checkpoints(self, job_id: str, page_ids: Iterable[str]) -> None:
+        """Records page ids the job has finished with, in a single transaction."""
+        rows = [(job_id, str(page_id)) for page_id in page_ids]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR IGNORE INTO job_checkpoints (job_id, page_id) VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_checkpointed_page_ids(self, job_id: str) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT page_id FROM job_checkpoints WHERE job_id = ?", (job_id,)).fetchall()
+        return {row["page_id"] for row in rows}
+
+    @contextmanager
+    def _transaction(self):
+        """Runs the block in one write transaction (BEGIN IMMEDIATE, so other processes wait rather than conflict). Caller holds _lock."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _refresh_job_totals(self, job_id: str) -> None:
+        """Recomputes the job's counters from its spaces. Caller holds _lock, inside a transaction."""
+        self._conn.execute(
+            """UPDATE jobs SET
+                   spaces_total = (SELECT COUNT(*) FROM job_spaces WHERE job_id = :id),
+                   spaces_completed = (SELECT COUNT(*) FROM job_spaces WHERE job_id = :id AND status = :done),
+                   pages_saved = (SELECT COALESCE(SUM(pages_saved), 0) FROM job_spaces WHERE job_id = :id),
+                   pages_failed = (SELECT COALESCE(SUM(pages_failed), 0) FROM job_spaces WHERE job_id = :id),
+                   pages_skipped = (SELECT COALESCE(SUM(pages_skipped), 0) FROM job_spaces WHERE job_id = :id),
+                   updated_at = :now
+               WHERE id = :id""",
+            {"id": job_id, "done": JOB_SPACE_STATUS_DONE, "now": time.time()}
+        )
+
+    def add_job_spaces(self, job_id: str, spaces: Iterable[Dict[str, Any]]) -> None:
+        """
+        Registers the spaces a job covers (dicts with id, name, key), in crawl order. Spaces already
+        registered, e.g. by another worker that started the same job, are left as they are.
+        """
+        rows = [
+            (job_id, str(space["id"]), position, space.get("name"), space.get("key"), JOB_SPACE_STATUS_PENDING)
+            for position, space in enumerate(spaces) if space.get("id")
+        ]
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO job_spaces (job_id, space_id, position, space_name, space_key, status) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._refresh_job_totals(job_id)
+
+    def list_job_spaces(self, job_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The job's spaces in crawl order, optionally only those with the given status."""
+        query = "SELECT * FROM job_spaces WHERE job_id = ?"
+        params: List[Any] = [job_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY position", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_job_space(self, job_id: str, space_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM job_spaces WHERE job_id = ? AND space_id = ?", (job_id, str(space_id))).fetchone()
+        return dict(row) if row else None
+
+    def update_space_progress(self, job_id: str, space_id: str, **counters: int) -> None:
+        """Overwrites a space's counters (pages_saved, pages_failed, pages_skipped) and updates the job's totals."""
+        columns = [name for name in counters if name in _SPACE_PROGRESS_COLUMNS]
+        if not columns:
+            return
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with self._lock, self._transaction():
+            self._conn.execute(
+                f"UPDATE job_spaces SET {assignments} WHERE job_id = ? AND space_id = ?",
+                (*[counters[name] for name in columns], job_id, str(space_id))
+            )
+            self._refresh_job_totals(job_id)
+
+    def mark_space_done(self, job_id: str, space_id: str, error: Optional[str] = None) -> None:
+        with self._lock, self._transaction():
+            self._conn.execute(
+                "UPDATE job_spaces SET status = ?, error = ? WHERE job_id = ? AND space_id = ?",
+                (JOB_SPACE_STATUS_DONE, error, job_id, str(space_id))
+            )
+            self._refresh_job_totals(job_id)
+
+    def complete_if_all_spaces_done(self, job_id: str) -> bool:
+        """
+        Marks a running job completed once none of its spaces is pending. True only for the call
+        that completed it, so exactly one worker reports the completion.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, updated_at = ? WHERE id = ? AND status = ? "
+                "AND NOT EXISTS (SELECT 1 FROM job_spaces WHERE job_id = ? AND status = ?)",
+                (JOB_STATUS_COMPLETED, now, now, job_id, JOB_STATUS_RUNNING, job_id, JOB_SPACE_STATUS_PENDING)
+            )
+        return cursor.rowcount == 1
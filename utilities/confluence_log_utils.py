@@ -0,0 +1,59 @@
+# confluence_log_utils.py
+
+import json
+import reprlib
+from typing import Any, Optional
+from configs.confluence_config import LOG_PAYLOAD_MAX_CHARS
+
+# Keeping log calls cheap on hot paths (per page, per tool call):
+#   - Pass values as %-style arguments (logger.info("Saved %s", path)) instead of f-strings. The
+#     message is then only built if a handler actually emits the record: not when the level is
+#     disabled, nor when the record is sampled away (see LOG_SAMPLING_RATES).
+#   - Wrap payloads (tool responses, parameter dicts) in Truncated or LazyJson. They are turned
+#     into text only when the message is built, and cut to LOG_PAYLOAD_MAX_CHARS; Truncated uses
+#     reprlib, so even the cost of rendering a huge response is bounded.
+#   - Guard arguments that are expensive to compute before the call (e.g. a list built only for
+#     the message) with logger.isEnabledFor(...).
+
+_payload_repr = reprlib.Repr()
+_payload_repr.maxlevel = 4
+_payload_repr.maxdict = 20
+_payload_repr.maxlist = 20
+_payload_repr.maxstring = 200
+_payload_repr.maxother = 200
+
+def truncate_text(text: str, max_chars: Optional[int] = None) -> str:
+    """text cut to max_chars (default LOG_PAYLOAD_MAX_CHARS), noting how much was left out."""
+    max_chars = LOG_PAYLOAD_MAX_CHARS if max_chars is None else max_chars
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+class Truncated:
+    """Log argument rendering value (bounded repr, or the string itself) cut to max_chars, only when formatted."""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: Optional[int] = None):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else _payload_repr.repr(self.value)
+        return truncate_text(text, self.max_chars)
+
+    __repr__ = __str__
+
+class LazyJson:
+    """Log argument serializing value as JSON, only when formatted, cut to max_chars."""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: Optional[int] = None):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        return truncate_text(json.dumps(self.value, default=str), self.max_chars)
+
+    __repr__ = __str__
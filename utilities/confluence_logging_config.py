@@ -1,18 +1,157 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
-from configs.confluence_config import LOG_LEVEL, LOG_OUTPUT_DIR, LOG_FILE_NAME
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from configs.confluence_config import (
+    LOG_LEVEL, LOG_OUTPUT_DIR, LOG_FILE_NAME, LOG_FORMAT, LOG_QUEUE_ENABLED, LOG_QUEUE_SIZE,
+    LOG_FILE_MAX_BYTES, LOG_FILE_BACKUP_COUNT, LOG_SAMPLING_RATES, API_WORKERS
+)
+from utilities.confluence_tracing import current_span
 
 # To prevent multiple handlers being added if setup_app_logging is called multiple times
 _logging_configured = False
+# Writes queued records to the console and file handlers on its own thread (LOG_QUEUE_ENABLED).
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+TEXT_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(module)s.%(funcName)s:%(lineno)d] - %(message)s'
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is emitted as a JSON field.
+_STANDARD_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "trace_id", "span_id"}
+
+class JsonLogFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line, with `extra=` fields and the trace/span ids."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        # Queued records carry the ids from the logging thread; otherwise this is the logging thread.
+        span = current_span()
+        trace_id = getattr(record, "trace_id", None) or (span.trace.trace_id if span else None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+            entry["span_id"] = getattr(record, "span_id", None) or span.span_id
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class LogSamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records below WARNING from the configured loggers (and their
+    children): {"services.confluence_mcp_api.pages": 0.1} keeps every tenth per-page message.
+    Sampling is deterministic (evenly spaced), and warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {name: max(0.0, min(1.0, rate)) for name, rate in rates.items()}
+        self._credit: Dict[str, float] = {}
+        self.dropped = 0
+
+    def _rate_for(self, logger_name: str) -> Optional[str]:
+        name = logger_name
+        while name:
+            if name in self.rates:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Without the queue the filter sits on several handlers; decide once per record.
+        decision = getattr(record, "_sampling_decision", None)
+        if decision is None:
+            decision = record._sampling_decision = self._keep(record)
+        return decision
+
+    def _keep(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        sampled_logger = self._rate_for(record.name)
+        if sampled_logger is None:
+            return True
+        credit = self._credit.get(sampled_logger, 1.0 - self.rates[sampled_logger]) + self.rates[sampled_logger]
+        if credit >= 1.0:
+            self._credit[sampled_logger] = credit - 1.0
+            return True
+        self._credit[sampled_logger] = credit
+        self.dropped += 1
+        return False
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a QueueListener thread without ever blocking the caller: when the queue is
+    full the record is dropped and counted. The message and traceback are rendered here, in the
+    calling thread, and the current trace/span ids are attached, since the listener thread has
+    neither the arguments' state nor the caller's context.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace.trace_id
+            record.span_id = span.span_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _stop_queue_listener() -> None:
+    global _queue_listener
+    if _queue_listener:
+        _queue_listener.stop() # Writes out what is still queued
+        _queue_listener = None
+
+def log_file_path(worker_count: int = API_WORKERS) -> str:
+    """
+    The log file of this process. With several API workers every process (workers and their
+    supervisor) writes and rotates its own file, named with its pid, e.g. confluence_mcp_app.4242.log:
+    size-based rollover of one file shared by several processes loses or mangles records.
+    """
+    if worker_count > 1:
+        stem, extension = os.path.splitext(LOG_FILE_NAME)
+        return os.path.join(LOG_OUTPUT_DIR, f"{stem}.{os.getpid()}{extension}")
+    return os.path.join(LOG_OUTPUT_DIR, LOG_FILE_NAME)
 
 def setup_app_logging():
     """
     Configures application-wide logging.
     Reads configuration from configs.confluence_config.py.
-    Sets up a StreamHandler for console output and a FileHandler for file output.
+    Sets up a StreamHandler for console output and a size-rotated file handler (one file per
+    process with several API workers, see log_file_path), formatted as
+    text or JSON (LOG_FORMAT). With LOG_QUEUE_ENABLED, loggers only put records on a queue and
+    both handlers run on a QueueListener thread, so logging does no I/O on the event loop.
+    Records from loggers in LOG_SAMPLING_RATES are sampled before they are queued.
     """
-    global _logging_configured
+    global _logging_configured, _queue_listener
     if _logging_configured:
         return
 
@@ -21,12 +160,12 @@ def setup_app_logging():
         if not os.path.exists(LOG_OUTPUT_DIR):
             os.makedirs(LOG_OUTPUT_DIR)
             # Use print here as logger might not be configured yet if this is the first time
-            print(f"Created log directory: {LOG_OUTPUT_DIR}") 
+            print(f"Created log directory: {LOG_OUTPUT_DIR}")
+
+        file_path = log_file_path()
 
-        log_file_path = os.path.join(LOG_OUTPUT_DIR, LOG_FILE_NAME)
+        app_logger = logging.getLogger()
 
-        app_logger = logging.getLogger() 
-        
         numeric_level = getattr(logging, LOG_LEVEL.upper(), None)
         if not isinstance(numeric_level, int):
             # Fallback or error if LOG_LEVEL is invalid
@@ -34,9 +173,7 @@ def setup_app_logging():
             numeric_level = logging.INFO
         app_logger.setLevel(numeric_level)
 
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - [%(module)s.%(funcName)s:%(lineno)d] - %(message)s'
-        )
+        formatter = JsonLogFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_LOG_FORMAT)
 
         # Clear existing handlers from the root logger to prevent duplicates if this function
         # is called multiple times or if other libraries (like Uvicorn) also add handlers.
@@ -46,16 +183,30 @@ def setup_app_logging():
 
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        app_logger.addHandler(console_handler)
 
-        file_handler = logging.FileHandler(log_file_path, mode='a', encoding='utf-8')
+        # maxBytes=0 never rolls over, i.e. a plain append-only file.
+        file_handler = logging.handlers.RotatingFileHandler(
+            file_path, mode='a', maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT, encoding='utf-8'
+        )
         file_handler.setFormatter(formatter)
-        app_logger.addHandler(file_handler)
-        
-        app_logger.info(f"Logging configured: Level={LOG_LEVEL.upper()}, File={log_file_path}")
+
+        sampling_filter = LogSamplingFilter(LOG_SAMPLING_RATES or {})
+        if LOG_QUEUE_ENABLED:
+            queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+            queue_handler.addFilter(sampling_filter)
+            app_logger.addHandler(queue_handler)
+            _queue_listener = logging.handlers.QueueListener(queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+            _queue_listener.start()
+            atexit.register(_stop_queue_listener)
+        else:
+            for handler in (console_handler, file_handler):
+                handler.addFilter(sampling_filter)
+                app_logger.addHandler(handler)
+
+        app_logger.info(f"Logging configured: Level={LOG_LEVEL.upper()}, File={file_path}, Format={LOG_FORMAT}, Queued={LOG_QUEUE_ENABLED}")
         _logging_configured = True
 
     except Exception as e:
         print(f"CRITICAL ERROR during logging setup: {e}. Further logging may be affected.", file=sys.stderr)
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-        logging.error(f"Logging setup failed: {e}", exc_info=True) 
\ No newline at end of file
+        logging.error(f"Logging setup failed: {e}", exc_info=True)
@@ -0,0 +1,304 @@
+# confluence_markdown.py
+
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+# Converts Confluence page HTML (storage or view format) to Markdown.
+#
+# Handles headings, paragraphs, emphasis, inline code and <pre> blocks, nested lists, tables
+# (as pipe tables), links and images, plus the Confluence storage elements:
+#   - ac:structured-macro: code/noformat -> fenced code block, info/note/tip/warning/panel -> quote
+#     with a label, expand/section/column and other macros with a body -> their body, macros
+#     without a body (toc, children, jira, ...) -> an HTML comment naming the macro.
+#   - ac:link / ac:image with ri:attachment -> links to attachments/<filename>, ri:page -> the page
+#     title, ri:url -> the url.
+#
+# The converter is pure Python, CPU-bound and free of module state, so it can run in a worker
+# process (see the conversion pool in services/confluence_mcp_api.py).
+
+ATTACHMENTS_DIR = "attachments"
+
+_PANEL_MACROS = {"info": "Info", "note": "Note", "tip": "Tip", "warning": "Warning", "panel": "", "expand": ""}
+_CODE_MACROS = {"code", "noformat"}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_SKIP_TAGS = {"script", "style", "ac:emoticon", "ac:placeholder"}
+_WHITESPACE_RE = re.compile(r"\s+")
+_BRUSH_RE = re.compile(r"brush:\s*([\w+#-]+)")
+
+def _cell_text(text: str) -> str:
+    return re.sub(r"\n+", "<br>", text.strip()).replace("|", "\\|")
+
+class _MarkdownConverter(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._buffers: List[List[str]] = [[]]
+        self._lists: List[Dict[str, Any]] = []
+        self._tables: List[Dict[str, Any]] = []
+        self._links: List[Dict[str, Any]] = []
+        self._macros: List[Dict[str, Any]] = []
+        self._pre_depth = 0
+        self._skip_depth = 0
+
+    # --- Output buffers ---
+    def _emit(self, text: str) -> None:
+        self._buffers[-1].append(text)
+
+    def _push(self) -> None:
+        self._buffers.append([])
+
+    def _pop(self) -> str:
+        return "".join(self._buffers.pop())
+
+    def _last_char(self) -> str:
+        for part in reversed(self._buffers[-1]):
+            if part:
+                return part[-1]
+        return "\n"
+
+    def _block_break(self) -> None:
+        if self._lists or self._tables and self._tables[-1]["cell_open"]:
+            self._emit("\n")
+        else:
+            self._emit("\n\n")
+
+    # --- Parser callbacks ---
+    def handle_starttag(self, tag: str, attrs: List[tuple]) -> None:
+        attributes = dict(attrs)
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _HEADINGS:
+            self._block_break()
+            self._emit("#" * _HEADINGS[tag] + " ")
+        elif tag in ("p", "div"):
+            if self._last_char() != "\n":
+                self._block_break()
+        elif tag == "br":
+            self._emit("\n" if self._tables and self._tables[-1]["cell_open"] else "  \n")
+        elif tag == "hr":
+            self._block_break()
+            self._emit("---")
+            self._block_break()
+        elif tag in ("strong", "b"):
+            self._emit("**")
+        elif tag in ("em", "i"):
+            self._emit("*")
+        elif tag in ("del", "s"):
+            self._emit("~~")
+        elif tag == "code" and not self._pre_depth:
+            self._emit("`")
+        elif tag == "pre":
+            self._pre_depth += 1
+            if self._pre_depth == 1:
+                language = ""
+                class_match = re.search(r"language-([\w+#-]+)", attributes.get("class") or "")
+                brush_match = _BRUSH_RE.search(attributes.get("data-syntaxhighlighter-params") or "")
+                if class_match or brush_match:
+                    language = (class_match or brush_match).group(1)
+                self._push()
+                self._macros.append({"name": "pre", "language": language})
+        elif tag in ("ul", "ol"):
+            self._lists.append({"ordered": tag == "ol", "count": 0})
+        elif tag == "li":
+            indent = "  " * (len(self._lists) - 1)
+            current = self._lists[-1] if self._lists else {"ordered": False, "count": 0}
+            current["count"] += 1
+            marker = f"{current['count']}." if current["ordered"] else "-"
+            self._emit(f"\n{indent}{marker} ")
+        elif tag == "blockquote":
+            self._push()
+        elif tag == "table":
+            self._tables.append({"rows": [], "cell_open": False})
+        elif tag == "tr" and self._tables:
+            self._tables[-1]["rows"].append([])
+        elif tag in ("td", "th") and self._tables:
+            self._tables[-1]["cell_open"] = True
+            self._push()
+        elif tag == "a":
+            self._links.append({"kind": "a", "href": attributes.get("href")})
+            self._push()
+        elif tag == "img":
+            self._emit(f"![{attributes.get('alt') or ''}]({attributes.get('src') or ''})")
+        elif tag in ("ac:link", "ac:image"):
+            self._links.append({"kind": tag, "href": None, "label": None})
+            self._push()
+        elif tag == "ri:attachment" and self._links:
+            filename = attributes.get("ri:filename") or ""
+            self._links[-1].update(href=f"{ATTACHMENTS_DIR}/{filename.replace(' ', '%20')}", label=filename)
+        elif tag == "ri:page" and self._links:
+            self._links[-1].update(label=attributes.get("ri:content-title"))
+        elif tag == "ri:url" and self._links:
+            self._links[-1].update(href=attributes.get("ri:value"))
+        elif tag == "ac:structured-macro":
+            self._macros.append({"name": attributes.get("ac:name") or "macro", "params": {}, "has_body": False})
+            self._push()
+        elif tag == "ac:parameter" and self._macros:
+            self._macros[-1].setdefault("params", {})
+            self._macros[-1]["param_name"] = attributes.get("ac:name") or ""
+            self._push()
+        elif tag in ("ac:rich-text-body", "ac:plain-text-body") and self._macros:
+            self._macros[-1]["has_body"] = True
+
+    def handle_startendtag(self, tag: str, attrs: List[tuple]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in ("br", "hr", "img"):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _HEADINGS or tag in ("p", "div"):
+            self._block_break()
+        elif tag in ("strong", "b"):
+            self._emit("**")
+        elif tag in ("em", "i"):
+            self._emit("*")
+        elif tag in ("del", "s"):
+            self._emit("~~")
+        elif tag == "code" and not self._pre_depth:
+            self._emit("`")
+        elif tag == "pre" and self._pre_depth:
+            self._pre_depth -= 1
+            if self._pre_depth == 0:
+                frame = self._macros.pop()
+                self._emit_code_block(self._pop(), frame["language"])
+        elif tag in ("ul", "ol") and self._lists:
+            self._lists.pop()
+            if not self._lists:
+                self._emit("\n\n")
+        elif tag == "blockquote" and len(self._buffers) > 1:
+            self._emit_quote(self._pop())
+        elif tag in ("td", "th") and self._tables and self._tables[-1]["cell_open"]:
+            table = self._tables[-1]
+            if not table["rows"]:
+                table["rows"].append([])
+            table["rows"][-1].append(_cell_text(self._pop()))
+            table["cell_open"] = False
+        elif tag == "table" and self._tables:
+            self._emit_table(self._tables.pop()["rows"])
+        elif tag == "a" and self._links and self._links[-1]["kind"] == "a":
+            link = self._links.pop()
+            text = self._pop().strip()
+            self._emit(f"[{text or link['href'] or ''}]({link['href']})" if link["href"] else text)
+        elif tag in ("ac:link", "ac:image") and self._links and self._links[-1]["kind"] == tag:
+            link = self._links.pop()
+            text = self._pop().strip() or link["label"] or link["href"] or ""
+            if tag == "ac:image":
+                self._emit(f"![{link['label'] or ''}]({link['href'] or ''})")
+            elif link["href"]:
+                self._emit(f"[{text}]({link['href']})")
+            else:
+                self._emit(text)
+        elif tag == "ac:parameter" and self._macros and "param_name" in self._macros[-1]:
+            macro = self._macros[-1]
+            macro["params"][macro.pop("param_name")] = self._pop().strip()
+        elif tag == "ac:structured-macro" and self._macros:
+            self._emit_macro(self._macros.pop(), self._pop())
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        if self._pre_depth:
+            self._emit(data)
+            return
+        text = _WHITESPACE_RE.sub(" ", data)
+        if self._last_char() in "\n ":
+            text = text.lstrip(" ")
+        if text:
+            self._emit(text)
+
+    def unknown_decl(self, data: str) -> None:
+        if data.startswith("CDATA[") and not self._skip_depth:
+            self._emit(data[len("CDATA["):])
+
+    # --- Block renderers ---
+    def _emit_code_block(self, code: str, language: str) -> None:
+        code = code.strip("\n")
+        fence = "````" if "```" in code else "```"
+        self._block_break()
+        self._emit(f"{fence}{language}\n{code}\n{fence}")
+        self._block_break()
+
+    def _emit_quote(self, content: str) -> None:
+        lines = content.strip().splitlines() or [""]
+        self._block_break()
+        self._emit("\n".join(f"> {line}".rstrip() for line in lines))
+        self._block_break()
+
+    def _emit_table(self, rows: List[List[str]]) -> None:
+        rows = [row for row in rows if row]
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        lines = []
+        for i, row in enumerate(rows):
+            cells = row + [""] * (width - len(row))
+            lines.append("| " + " | ".join(cells) + " |")
+            if i == 0:
+                lines.append("|" + " --- |" * width)
+        if self._tables and self._tables[-1]["cell_open"]:
+            # A table nested in a cell cannot be a pipe table; keep its rows as lines of the cell.
+            self._emit("\n".join(" / ".join(row) for row in rows))
+            return
+        self._block_break()
+        self._emit("\n".join(lines))
+        self._block_break()
+
+    def _emit_macro(self, macro: Dict[str, Any], content: str) -> None:
+        name = macro["name"]
+        params = macro.get("params", {})
+        if name in _CODE_MACROS:
+            self._emit_code_block(content, params.get("language", ""))
+        elif name in _PANEL_MACROS:
+            label = params.get("title") or _PANEL_MACROS[name]
+            self._emit_quote((f"**{label}:** " if label else "") + content.strip())
+        elif macro.get("has_body"):
+            self._emit(content)
+        else:
+            described = ", ".join(f"{key}={value}" for key, value in params.items() if value)
+            self._emit(f"<!-- confluence macro: {name}{' (' + described + ')' if described else ''} -->")
+
+    def result(self) -> str:
+        while len(self._buffers) > 1:
+            # Unclosed elements in malformed input: keep their content.
+            content = self._pop()
+            self._emit(content)
+        return "".join(self._buffers[0])
+
+def _tidy(markdown: str) -> str:
+    """Trims trailing whitespace (except in code blocks and hard breaks) and collapses blank lines."""
+    lines: List[str] = []
+    in_fence: Optional[str] = None
+    for line in markdown.split("\n"):
+        fence_match = re.match(r"(`{3,})", line)
+        if in_fence:
+            lines.append(line)
+            if line == in_fence:
+                in_fence = None
+            continue
+        if fence_match:
+            in_fence = fence_match.group(1)
+            lines.append(line)
+            continue
+        stripped = line.rstrip()
+        if line.endswith("  ") and stripped:
+            stripped += "  "
+        if not stripped and lines and not lines[-1]:
+            continue
+        lines.append(stripped)
+    return "\n".join(lines).strip("\n") + "\n"
+
+def convert_html_to_markdown(html: str) -> str:
+    """Converts Confluence storage or view HTML to Markdown."""
+    converter = _MarkdownConverter()
+    converter.feed(html)
+    converter.close()
+    return _tidy(converter.result())
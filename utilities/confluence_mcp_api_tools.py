@@ -1,7 +1,10 @@
 # confluence_mcp_api_tools.py
 
 import logging
-from typing import Optional
+from datetime import datetime, time, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from utilities.confluence_sync_manifest import get_summary_last_modified
 
 logger = logging.getLogger(__name__)
 
@@ -68,4 +71,54 @@ def get_pages_in_all_spaces_query(start_date: Optional[str], end_date: Optional[
     date_suffix = format_date_query_suffix(start_date, end_date)
     query = f"Get HTML content for all pages from all accessible spaces{date_suffix}."
     logger.debug(f"Generated query for MCPAgent: {query}")
-    return query 
\ No newline at end of file
+    return query
+
+# The direct-tool endpoints apply start_date/end_date themselves by filtering page
+# summaries on their last-modified metadata before any getConfluencePage call.
+
+DateWindow = Tuple[Optional[datetime], Optional[datetime]]
+
+def _parse_timestamp(value: str, end_of_day: bool = False) -> datetime:
+    """Parses 'YYYY-MM-DD' or an ISO 8601 timestamp into an aware UTC datetime."""
+    value = value.strip()
+    if len(value) == 10:
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+        return datetime.combine(day, time.max if end_of_day else time.min, tzinfo=timezone.utc)
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def parse_date_window(start_date: Optional[str], end_date: Optional[str]) -> Optional[DateWindow]:
+    """
+    Converts the optional start_date/end_date request fields into a (start, end) window.
+    Both bounds are inclusive; a bare end date covers the whole day. Returns None if neither is set.
+    Raises ValueError for unparseable dates or an empty window.
+    """
+    if not start_date and not end_date:
+        return None
+    start = _parse_timestamp(start_date) if start_date else None
+    end = _parse_timestamp(end_date, end_of_day=True) if end_date else None
+    if start and end and start > end:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+    return start, end
+
+def is_page_in_date_window(page_summary: Dict[str, Any], date_window: Optional[DateWindow]) -> bool:
+    """
+    True if the page's last-modified time falls within date_window.
+    Pages without usable last-modified metadata are kept, since they cannot be ruled out.
+    """
+    if not date_window:
+        return True
+    last_modified = get_summary_last_modified(page_summary)
+    if not last_modified:
+        return True
+    try:
+        modified_at = _parse_timestamp(last_modified)
+    except ValueError:
+        logger.debug(f"Unparseable last-modified value '{last_modified}' for page {page_summary.get('id')}; keeping it.")
+        return True
+    start, end = date_window
+    return (start is None or modified_at >= start) and (end is None or modified_at <= end)
@@ -0,0 +1,61 @@
+# confluence_mcp_launcher.py
+
+import copy
+import logging
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# The default server config launches the bridge with `npx -y mcp-remote <url>`, which makes npx
+# resolve (and possibly download) the package on every start. When a local mcp-remote binary is
+# available, the config is rewritten to run it directly instead, which removes that cold start
+# and pins the bridge to whatever version is installed locally.
+
+MCP_REMOTE_PACKAGE_NAME = "mcp-remote"
+
+def find_local_mcp_remote(explicit_path: Optional[str] = None, project_root: Optional[str] = None) -> Optional[str]:
+    """
+    Locates a local mcp-remote executable. Checks, in order: explicit_path, the project's
+    node_modules/.bin, then PATH. Returns None if none is found.
+    """
+    candidates: List[str] = []
+    if explicit_path:
+        candidates.append(explicit_path)
+    if project_root:
+        candidates.append(os.path.join(project_root, "node_modules", ".bin", MCP_REMOTE_PACKAGE_NAME))
+    for candidate in candidates:
+        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return os.path.abspath(candidate)
+    if explicit_path:
+        logger.warning(f"Configured mcp-remote binary not found or not executable: {explicit_path}")
+    return shutil.which(MCP_REMOTE_PACKAGE_NAME)
+
+def _npx_package_index(args: List[str]) -> Optional[int]:
+    """Index of the mcp-remote package argument in an npx argument list (handles 'mcp-remote@x.y.z')."""
+    for i, arg in enumerate(args):
+        if arg == MCP_REMOTE_PACKAGE_NAME or arg.startswith(f"{MCP_REMOTE_PACKAGE_NAME}@"):
+            return i
+    return None
+
+def resolve_mcp_server_config(server_config: Dict[str, Any], mcp_remote_binary: Optional[str]) -> Dict[str, Any]:
+    """
+    Returns a copy of an MCPClient server config in which every `npx ... mcp-remote <args>` server
+    runs mcp_remote_binary with <args> directly. The config is returned unchanged (as a copy) when
+    no binary is given or no server uses npx to launch mcp-remote.
+    """
+    resolved = copy.deepcopy(server_config)
+    if not mcp_remote_binary:
+        return resolved
+    for server_name, server in resolved.get("mcpServers", {}).items():
+        if os.path.basename(str(server.get("command", ""))) not in ("npx", "npx.cmd"):
+            continue
+        args = list(server.get("args", []))
+        package_index = _npx_package_index(args)
+        if package_index is None:
+            continue
+        server["command"] = mcp_remote_binary
+        server["args"] = args[package_index + 1:]
+        logger.info(f"MCP server '{server_name}' will run local mcp-remote binary {mcp_remote_binary} instead of npx.")
+    return resolved
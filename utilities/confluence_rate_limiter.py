@@ -0,0 +1,205 @@
+# confluence_rate_limiter.py
+
+import asyncio
+import logging
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Client-side flow control for MCP tool calls, shared by every caller in the process.
+#
+# - Token bucket: at most `rate` calls per second on average, with bursts of up to `burst`.
+# - AIMD concurrency: the number of calls in flight is capped by an adaptive limit. Every
+#   successful call raises it by 1/limit (about +1 per window of calls). A throttled call (429/503)
+#   halves it, once per window: throttles from calls started before the last decrease are not
+#   counted again.
+# - Retry-After: a throttled response that says how long to wait pauses all new calls until then.
+# - Retries: throttled and transient failures are retried with full-jitter exponential backoff
+#   (or after Retry-After, when given). Auth errors and tool errors such as "not found" are not retried.
+
+ERROR_CLASS_THROTTLED = "throttled"
+ERROR_CLASS_TRANSIENT = "transient"
+
+_THROTTLE_MARKERS = ("429", "too many requests", "rate limit", "ratelimit", "throttl", "503", "service unavailable")
+_TRANSIENT_MARKERS = ("502", "bad gateway", "504", "gateway timeout", "timed out", "timeout", "connection reset", "temporarily unavailable")
+_RETRY_AFTER_RE = re.compile(r"retry[-_ ]after[\"']?\s*[:=]?\s*[\"']?(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+def _retry_after_from_headers(headers: Any) -> Optional[float]:
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def classify_tool_error(error: BaseException) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Returns (error class, retry_after seconds) for a failed tool call. The class is
+    ERROR_CLASS_THROTTLED, ERROR_CLASS_TRANSIENT, or None if the call should not be retried.
+    HTTP errors carrying a response (status code and headers) are classified from those,
+    anything else from its message, which is how the bridge reports upstream failures.
+    Exceptions with a `retryable = False` attribute are never retried.
+    """
+    if getattr(error, "retryable", None) is False:
+        return None, None
+    if isinstance(error, asyncio.TimeoutError):
+        return ERROR_CLASS_TRANSIENT, None
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if isinstance(status_code, int):
+        retry_after = _retry_after_from_headers(getattr(response, "headers", None))
+        if status_code in (429, 503):
+            return ERROR_CLASS_THROTTLED, retry_after
+        if status_code in (502, 504):
+            return ERROR_CLASS_TRANSIENT, retry_after
+        return None, None
+
+    message = str(error).lower()
+    if "401" in message or "unauthorized" in message or "forbidden" in message:
+        return None, None
+    retry_after_match = _RETRY_AFTER_RE.search(message)
+    retry_after = float(retry_after_match.group(1)) if retry_after_match else None
+    if any(marker in message for marker in _THROTTLE_MARKERS):
+        return ERROR_CLASS_THROTTLED, retry_after
+    if any(marker in message for marker in _TRANSIENT_MARKERS):
+        return ERROR_CLASS_TRANSIENT, retry_after
+    return None, None
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)]."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class AdaptiveRateLimiter:
+    """Token bucket plus AIMD concurrency limit, with a shared Retry-After pause."""
+
+    def __init__(
+        self,
+        rate_per_second: Optional[float] = 10.0,
+        burst: int = 20,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        decrease_factor: float = 0.5,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency_limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease_at = 0.0
+        self._bucket_lock = asyncio.Lock()
+        self._slots = asyncio.Condition()
+        self.stats: Dict[str, int] = {"calls": 0, "throttled": 0, "decreases": 0, "pauses": 0}
+
+    async def _wait_for_pause(self) -> None:
+        while True:
+            remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def _take_token(self) -> None:
+        if not self.rate_per_second:
+            return
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_second)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+
+    async def acquire(self) -> float:
+        """Waits for any Retry-After pause, a token and a concurrency slot. Returns the call's start time."""
+        await self._wait_for_pause()
+        await self._take_token()
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < int(self.concurrency_limit))
+            self.in_flight += 1
+        self.stats["calls"] += 1
+        return time.monotonic()
+
+    async def release(self, started_at: float, error_class: Optional[str] = None, retry_after: Optional[float] = None) -> None:
+        """Returns the slot and adapts the limit: additive increase on success, multiplicative decrease on throttling."""
+        async with self._slots:
+            self.in_flight -= 1
+            if error_class == ERROR_CLASS_THROTTLED:
+                self.stats["throttled"] += 1
+                if started_at >= self._last_decrease_at:
+                    self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * self.decrease_factor)
+                    self._last_decrease_at = time.monotonic()
+                    self.stats["decreases"] += 1
+                    logger.warning(f"Upstream throttling; concurrency limit lowered to {int(self.concurrency_limit)}.")
+                if retry_after:
+                    paused_until = time.monotonic() + retry_after
+                    if paused_until > self._paused_until:
+                        self._paused_until = paused_until
+                        self.stats["pauses"] += 1
+                        logger.warning(f"Honoring Retry-After: pausing tool calls for {retry_after:.1f}s.")
+            elif error_class is None:
+                self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+            self._slots.notify_all()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": int(self.concurrency_limit),
+            "in_flight": self.in_flight,
+            "rate_per_second": self.rate_per_second,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            **self.stats,
+        }
+
+async def call_with_retries(
+    call: Callable[[], Awaitable[Any]],
+    limiter: Optional[AdaptiveRateLimiter],
+    description: str,
+    max_attempts: int = 4,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+    max_retry_after: float = 120.0,
+) -> Any:
+    """
+    Runs call() under the limiter, retrying throttled/transient failures up to max_attempts in total.
+    The last error (or any non-retryable one) is raised unchanged.
+    """
+    attempt = 0
+    while True:
+        started_at = await limiter.acquire() if limiter else 0.0
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            if limiter:
+                await asyncio.shield(limiter.release(started_at, "cancelled"))
+            raise
+        except Exception as e:
+            error_class, retry_after = classify_tool_error(e)
+            if retry_after is not None:
+                retry_after = min(retry_after, max_retry_after)
+            if limiter:
+                await limiter.release(started_at, error_class or "error", retry_after)
+            attempt += 1
+            if error_class is None or attempt >= max_attempts:
+                raise
+            delay = retry_after if retry_after is not None else backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(f"{description} failed ({error_class}: {str(e)[:200]}); retry {attempt}/{max_attempts - 1} in {delay:.2f}s.")
+            await asyncio.sleep(delay)
+            continue
+        if limiter:
+            await limiter.release(started_at)
+        return result
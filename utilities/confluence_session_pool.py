@@ -0,0 +1,277 @@
+# confluence_session_pool.py
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utilities.confluence_tool_client import parse_call_tool_result
+
+logger = logging.getLogger(__name__)
+
+# A pool of independent MCP sessions to the same server config. Each member owns its own
+# MCPClient (and therefore its own `npx mcp-remote` child process), so tool calls from
+# concurrent requests are spread over several bridge processes instead of queueing behind one.
+# `call_tool()` is the entry point: it calls the tool directly on the member's MCP session
+# and returns the decoded result.
+
+# Substrings of exception messages that mean the session itself is broken
+# (as opposed to the tool reporting an error for a particular input).
+_TRANSPORT_ERROR_MARKERS = (
+    "Failed to connect to server",
+    "ClosedResourceError",
+    "BrokenResourceError",
+    "EndOfStream",
+    "Connection closed",
+    "MCP client is not connected",
+)
+
+MemberFactory = Callable[[], Awaitable[Any]]
+MemberWarmup = Callable[["PooledSession"], Awaitable[None]]
+
+def is_transport_error(message: str) -> bool:
+    """True if an exception message indicates a dead or disconnected session."""
+    return any(marker in message for marker in _TRANSPORT_ERROR_MARKERS)
+
+class PooledSession:
+    """One pool member: an MCPClient plus dispatch bookkeeping."""
+
+    def __init__(self, member_id: int, client: Any):
+        self.member_id = member_id
+        self.client = client
+        self.in_flight = 0
+        self.calls_total = 0
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.created_at = time.monotonic()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "member_id": self.member_id,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "calls_total": self.calls_total,
+            "consecutive_failures": self.consecutive_failures,
+            "age_seconds": round(time.monotonic() - self.created_at, 1),
+        }
+
+class MCPSessionPool:
+    """Least-busy dispatch of tool calls over N MCP sessions, with health checks and replacement of dead sessions."""
+
+    def __init__(
+        self,
+        member_factory: MemberFactory,
+        server_name: str,
+        size: int,
+        max_consecutive_failures: int = 2,
+        health_check_interval_seconds: float = 60.0,
+        health_check_timeout_seconds: float = 10.0,
+        member_warmup: Optional[MemberWarmup] = None,
+    ):
+        self.member_factory = member_factory
+        self.server_name = server_name
+        self.size = max(1, size)
+        self.max_consecutive_failures = max(1, max_consecutive_failures)
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self.health_check_timeout_seconds = health_check_timeout_seconds
+        self.member_warmup = member_warmup
+        self.warmed_up = False
+        self.members: List[PooledSession] = []
+        self.replacements = 0
+        self._next_member_id = 0
+        self._replace_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._background_tasks: set = set()
+
+    async def _create_member(self) -> PooledSession:
+        client = await self.member_factory()
+        member = PooledSession(self._next_member_id, client)
+        self._next_member_id += 1
+        return member
+
+    async def start(self) -> None:
+        """Creates the pool members and starts the periodic health check. Raises if no member could be created."""
+        results = await asyncio.gather(*(self._create_member() for _ in range(self.size)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to create MCP session pool member: {result}")
+            else:
+                self.members.append(result)
+        if not self.members:
+            raise RuntimeError("Could not create any MCP session pool member.")
+        logger.info(f"MCP session pool started with {len(self.members)}/{self.size} members for server '{self.server_name}'.")
+        if self.health_check_interval_seconds and self.health_check_interval_seconds > 0:
+            self._health_task = asyncio.create_task(self._health_check_loop())
+
+    async def _warm_member(self, member: PooledSession) -> bool:
+        try:
+            await self.member_warmup(member)
+            return True
+        except Exception as e:
+            logger.error(f"Warm-up failed for MCP session pool member {member.member_id}: {e}")
+            return False
+
+    async def warm_up(self) -> int:
+        """
+        Runs member_warmup (e.g. connect the session and list its tools) on every member concurrently.
+        Members whose warm-up fails are replaced. Replacements created afterwards are warmed as well.
+        Returns the number of members warmed successfully.
+        """
+        if not self.member_warmup:
+            return 0
+        results = await asyncio.gather(*(self._warm_member(m) for m in self.members))
+        for member, ok in zip(list(self.members), results):
+            if not ok:
+                member.healthy = False
+        self.warmed_up = True
+        if not all(results):
+            await self.replace_unhealthy_members()
+        warmed = sum(1 for ok in results if ok)
+        logger.info(f"MCP session pool warm-up finished: {warmed}/{len(results)} members ready.")
+        return warmed
+
+    def healthy_member_count(self) -> int:
+        return sum(1 for m in self.members if m.healthy)
+
+    def _pick_member(self) -> Optional[PooledSession]:
+        candidates = [m for m in self.members if m.healthy]
+        if not candidates:
+            return None
+        # Least in-flight calls first; among equally busy members prefer the least used one.
+        return min(candidates, key=lambda m: (m.in_flight, m.calls_total))
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """
+        Calls the tool on the least busy healthy member's MCP session and returns the decoded result
+        (see parse_call_tool_result). Raises MCPToolError for tool errors; transport failures
+        propagate as the underlying exception and count towards replacing the member.
+        """
+        member = self._pick_member()
+        if member is None:
+            await self.replace_unhealthy_members()
+            member = self._pick_member()
+            if member is None:
+                raise ConnectionError(f"Failed to connect to server '{server_name}': no healthy MCP sessions in pool.")
+
+        member.in_flight += 1
+        member.calls_total += 1
+        try:
+            try:
+                session = member.client.get_session(server_name)
+            except ValueError:
+                session = await member.client.create_session(server_name)
+            result = await session.connector.call_tool(tool_name, arguments)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record_failure(member, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            member.in_flight -= 1
+
+        member.consecutive_failures = 0
+        return parse_call_tool_result(tool_name, result)
+
+    def _record_failure(self, member: PooledSession, message: str) -> None:
+        if not is_transport_error(message):
+            return
+        member.consecutive_failures += 1
+        logger.warning(f"MCP session pool member {member.member_id} transport failure ({member.consecutive_failures}/{self.max_consecutive_failures}): {message[:200]}")
+        if member.consecutive_failures >= self.max_consecutive_failures and member.healthy:
+            member.healthy = False
+            self._spawn(self.replace_unhealthy_members())
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _ping(self, member: PooledSession) -> bool:
+        """Pings the member's session. Members that have not connected yet are treated as healthy."""
+        try:
+            session = member.client.get_session(self.server_name)
+        except (ValueError, KeyError):
+            return True
+        connector = getattr(session, "connector", None)
+        client_session = getattr(connector, "client", None)
+        if client_session is None:
+            return False
+        try:
+            await asyncio.wait_for(client_session.send_ping(), timeout=self.health_check_timeout_seconds)
+            return True
+        except Exception as e:
+            logger.warning(f"Health check failed for MCP session pool member {member.member_id}: {e}")
+            return False
+
+    async def check_health(self) -> None:
+        """Pings idle members, marks unresponsive ones unhealthy and replaces them."""
+        for member in list(self.members):
+            if member.healthy and member.in_flight == 0 and not await self._ping(member):
+                member.healthy = False
+        await self.replace_unhealthy_members()
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval_seconds)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"MCP session pool health check error: {e}", exc_info=True)
+
+    async def replace_unhealthy_members(self) -> None:
+        """Retires unhealthy members and tops the pool back up to its configured size."""
+        async with self._replace_lock:
+            retired = [m for m in self.members if not m.healthy]
+            self.members = [m for m in self.members if m.healthy]
+            for member in retired:
+                logger.info(f"Retiring MCP session pool member {member.member_id}.")
+                self._spawn(self._close_member(member))
+
+            while len(self.members) < self.size:
+                try:
+                    new_member = await self._create_member()
+                except Exception as e:
+                    logger.error(f"Failed to create replacement MCP session pool member: {e}")
+                    break
+                if self.warmed_up and self.member_warmup and not await self._warm_member(new_member):
+                    self._spawn(self._close_member(new_member))
+                    break
+                self.members.append(new_member)
+                self.replacements += 1
+                logger.info(f"Added MCP session pool member {new_member.member_id} ({len(self.members)}/{self.size}).")
+
+    async def _close_member(self, member: PooledSession) -> None:
+        # Let calls already running on the retired member finish before tearing it down.
+        while member.in_flight > 0:
+            await asyncio.sleep(0.1)
+        try:
+            await member.client.close_all_sessions()
+        except Exception as e:
+            logger.error(f"Error closing MCP session pool member {member.member_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "members": [m.describe() for m in self.members],
+            "replacements": self.replacements,
+        }
+
+    async def close(self) -> None:
+        """Stops the health check and closes every member's sessions."""
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        if self._background_tasks:
+            # Give pending replacements/retirements a moment to finish so retired sessions are closed too.
+            _, pending = await asyncio.wait(list(self._background_tasks), timeout=self.health_check_timeout_seconds)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        members, self.members = self.members, []
+        for member in members:
+            try:
+                await member.client.close_all_sessions()
+            except Exception as e:
+                logger.error(f"Error closing MCP session pool member {member.member_id}: {e}")
+        logger.info("MCP session pool closed.")
@@ -0,0 +1,216 @@
+# confluence_shared_state.py
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# State shared by the API worker processes of one deployment (API_WORKERS > 1), kept in a local
+# SQLite database next to the job store:
+#   - values with an optional expiry (the cloud ID and space directory, see ConfluenceDirectoryCache);
+#   - named leases with an owner and an expiry, e.g. "space:<space_id>" while a worker crawls that
+#     space. A lease whose owner stops renewing it (crashed worker) can be taken over once it expires.
+# Expiry times are wall-clock (time.time()), so every process reads them the same way.
+# SharedStateStore methods are synchronous; WorkerLeases wraps the lease calls for async code.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_values (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    acquired_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+class SharedStateStore:
+    """Expiring values and named leases in a SQLite database shared by several processes."""
+
+    def __init__(self, db_path: str, busy_timeout_seconds: float = 10.0):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout_seconds, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        logger.info(f"Shared state store ready at {db_path}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- Values ---
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """(value, expires_at) for key, or None if it is missing or expired. expires_at is None for values without expiry."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM shared_values WHERE key = ?", (key,)).fetchone()
+        if row is None or (row["expires_at"] is not None and row["expires_at"] <= time.time()):
+            return None
+        return json.loads(row["value"]), row["expires_at"]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Stores a JSON-serializable value, expiring after ttl_seconds (never if None)."""
+        expires_at = time.time() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO shared_values (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, json.dumps(value), expires_at)
+            )
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Deletes every value whose key starts with prefix; returns how many were deleted."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM shared_values WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        return cursor.rowcount
+
+    def increment(self, key: str) -> int:
+        """Atomically adds one to an integer value (missing counts as 0) and returns the new value."""
+        with self._lock:
+            row = self._conn.execute(
+                "INSERT INTO shared_values (key, value, expires_at) VALUES (?, '1', NULL) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 RETURNING value",
+                (key,)
+            ).fetchone()
+        return int(row["value"])
+
+    # --- Leases ---
+    def try_acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Takes the lease if it is free, expired, or already held by owner (whose hold is extended).
+        Returns False if another owner holds it.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases (name, owner, acquired_at, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at, "
+                "acquired_at = CASE WHEN leases.owner = excluded.owner THEN leases.acquired_at ELSE excluded.acquired_at END "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (name, owner, now, now + ttl_seconds, now)
+            )
+        return cursor.rowcount == 1
+
+    def renew_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Extends owner's lease; False if owner no longer holds it."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                (time.time() + ttl_seconds, name, owner)
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def get_lease(self, name: str) -> Optional[Dict[str, Any]]:
+        """The unexpired lease on name (name, owner, acquired_at, expires_at), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM leases WHERE name = ? AND expires_at > ?", (name, time.time())).fetchone()
+        return dict(row) if row else None
+
+    def list_leases(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """Unexpired leases whose name starts with prefix, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM leases WHERE substr(name, 1, ?) = ? AND expires_at > ? ORDER BY acquired_at",
+                (len(prefix), prefix, time.time())
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+class WorkerLeases:
+    """
+    One worker process's leases in a SharedStateStore. Re-entrant within the process: concurrent
+    holders in the same worker share the lease, which is taken by the first and released by the
+    last. Held leases are renewed in the background every third of ttl_seconds.
+    """
+
+    def __init__(self, store: SharedStateStore, owner: str, ttl_seconds: float):
+        self.store = store
+        self.owner = owner
+        self.ttl_seconds = ttl_seconds
+        self._holds: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._renew_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._renew_task is None:
+            self._renew_task = asyncio.create_task(self._renew_loop())
+
+    async def close(self) -> None:
+        """Stops renewing and releases every lease this worker still holds."""
+        if self._renew_task:
+            self._renew_task.cancel()
+            await asyncio.gather(self._renew_task, return_exceptions=True)
+            self._renew_task = None
+        for name in list(self._holds):
+            await asyncio.to_thread(self.store.release_lease, name, self.owner)
+        self._holds.clear()
+
+    def holds(self, name: str) -> bool:
+        return name in self._holds
+
+    async def try_acquire(self, name: str) -> bool:
+        """Takes (or joins this worker's hold on) the lease; False if another worker holds it."""
+        async with self._lock:
+            if name not in self._holds:
+                if not await asyncio.to_thread(self.store.try_acquire_lease, name, self.owner, self.ttl_seconds):
+                    return False
+            self._holds[name] = self._holds.get(name, 0) + 1
+            return True
+
+    async def acquire(self, name: str, timeout_seconds: float, poll_interval_seconds: float = 1.0) -> bool:
+        """Waits up to timeout_seconds for the lease; False if another worker still holds it then."""
+        deadline = time.monotonic() + timeout_seconds
+        while not await self.try_acquire(name):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(poll_interval_seconds, remaining))
+        return True
+
+    async def release(self, name: str) -> None:
+        async with self._lock:
+            count = self._holds.get(name, 0) - 1
+            if count > 0:
+                self._holds[name] = count
+                return
+            self._holds.pop(name, None)
+            await asyncio.to_thread(self.store.release_lease, name, self.owner)
+
+    async def held_elsewhere(self, name: str) -> Optional[Dict[str, Any]]:
+        """The lease on name if another worker holds it, else None."""
+        lease = await asyncio.to_thread(self.store.get_lease, name)
+        return lease if lease and lease["owner"] != self.owner else None
+
+    async def _renew_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            for name in list(self._holds):
+                try:
+                    renewed = await asyncio.to_thread(self.store.renew_lease, name, self.owner, self.ttl_seconds)
+                except Exception as e:
+                    logger.error(f"Failed to renew lease '{name}': {e}")
+                    continue
+                if not renewed and name in self._holds:
+                    # Only possible after a stall longer than the TTL, once another worker has taken it over.
+                    logger.error(f"Lease '{name}' was lost by worker {self.owner}; another worker may now be working on it too.")
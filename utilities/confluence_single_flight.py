@@ -0,0 +1,59 @@
+# confluence_single_flight.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Request coalescing ("single flight"). While a call for a key is in flight, identical calls with the
+# same key do not start their own: they wait for the one already running and get its result (or its
+# exception). Nothing is kept once the call finishes; the next call for the key runs again.
+# The shared call runs as its own task, so a waiter that is cancelled (client gone, job cancelled)
+# does not cancel it for the others; it is only cancelled when its last waiter is.
+# Results are shared between callers as the same object, so callers must not mutate them.
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Deduplicates concurrent calls with the same key into one in-flight call."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats: Dict[str, int] = {"calls": 0, "coalesced": 0}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def in_flight_count(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the result of fn(), or of the identical call already in flight for key."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task, key=key, flight=flight: self._forget(key, flight))
+            self.stats["calls"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller has been cancelled: nobody wants the result any more.
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "in_flight": len(self._flights), **self.stats}
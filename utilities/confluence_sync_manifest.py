@@ -0,0 +1,113 @@
+# confluence_sync_manifest.py
+
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# A sync manifest is a small JSON file kept next to the saved pages of one space.
+# It records, per page id, the version number and last-modified time seen in the
+# page summary when the page was last saved, plus a hash of the saved content.
+# Incremental runs compare each fresh page summary against it and only fetch pages
+# that are new, have a newer version, or whose saved file has gone missing.
+
+MANIFEST_FILE_NAME = ".sync_manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+
+def get_summary_version(page_summary: Dict[str, Any]) -> Optional[int]:
+    """Extracts the page version number from a page summary or page response, if present."""
+    version = page_summary.get("version")
+    if isinstance(version, dict):
+        version = version.get("number")
+    if isinstance(version, bool):
+        return None
+    if isinstance(version, int):
+        return version
+    if isinstance(version, str) and version.isdigit():
+        return int(version)
+    return None
+
+def get_summary_last_modified(page_summary: Dict[str, Any]) -> Optional[str]:
+    """
+    Extracts the last-modified timestamp (ISO 8601 string) from a page summary or page response.
+    Handles the v2 API shape (version.createdAt) as well as older v1 shapes.
+    """
+    version = page_summary.get("version")
+    if isinstance(version, dict):
+        for key in ("createdAt", "when"):
+            if isinstance(version.get(key), str):
+                return version[key]
+    for key in ("lastModified", "lastModifiedAt", "updatedAt"):
+        if isinstance(page_summary.get(key), str):
+            return page_summary[key]
+    history = page_summary.get("history")
+    if isinstance(history, dict):
+        last_updated = history.get("lastUpdated")
+        if isinstance(last_updated, dict) and isinstance(last_updated.get("when"), str):
+            return last_updated["when"]
+    return None
+
+class SpaceSyncManifest:
+    """Per-space record of which page versions have already been saved locally."""
+
+    def __init__(self, manifest_path: str, pages: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.manifest_path = manifest_path
+        self.pages: Dict[str, Dict[str, Any]] = pages or {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, base_save_dir: str) -> "SpaceSyncManifest":
+        """Loads the manifest stored in base_save_dir, or returns an empty one if there is none."""
+        manifest_path = os.path.join(base_save_dir, MANIFEST_FILE_NAME)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            pages = data.get("pages") if isinstance(data, dict) else None
+            if isinstance(pages, dict):
+                return cls(manifest_path, pages)
+            logger.warning(f"Ignoring sync manifest with unexpected structure: {manifest_path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read sync manifest {manifest_path}, starting a fresh one: {e}")
+        return cls(manifest_path)
+
+    def needs_fetch(self, page_summary: Dict[str, Any]) -> bool:
+        """
+        True if the page described by page_summary must be (re)fetched: it is not in the manifest,
+        the summary shows a newer version, no version is available to compare, or the saved file is gone.
+        """
+        entry = self.pages.get(str(page_summary.get("id")))
+        if not entry:
+            return True
+        summary_version = get_summary_version(page_summary)
+        if summary_version is None or entry.get("version") is None:
+            return True
+        if summary_version > entry["version"]:
+            return True
+        file_path = entry.get("file_path")
+        return bool(file_path) and not os.path.exists(file_path)
+
+    def record(self, page_id: str, version: Optional[int], last_modified: Optional[str], content_hash: Optional[str], file_path: Optional[str]) -> None:
+        """Records a successfully saved page."""
+        self.pages[str(page_id)] = {
+            "version": version,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "file_path": file_path,
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        """Writes the manifest atomically (temp file + rename) if anything changed."""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format_version": MANIFEST_FORMAT_VERSION, "pages": self.pages}, f)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+        logger.info(f"Saved sync manifest with {len(self.pages)} pages to {self.manifest_path}")
@@ -0,0 +1,57 @@
+# confluence_tool_client.py
+
+import json
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Helpers for calling MCP tools directly on a session's connector (connector.call_tool)
+# instead of through UseToolFromServerTool._arun. The LangChain tool path flattens every
+# result into a string, including errors, which then has to be re-parsed and sniffed
+# for error messages. Here the CallToolResult is decoded once: its structuredContent is
+# used as-is when the server sends one, otherwise the text content is parsed as JSON, and
+# results flagged isError are raised as MCPToolError. Servers built on FastMCP wrap any
+# result that is not an object as structuredContent {"result": ...}; that wrapper is
+# removed, and a wrapped string is decoded like text content.
+
+class MCPToolError(Exception):
+    """Raised when the MCP server reports a tool call as failed (CallToolResult.isError)."""
+
+    def __init__(self, tool_name: str, message: str):
+        super().__init__(f"{tool_name} failed: {message}")
+        self.tool_name = tool_name
+        self.message = message
+
+def _result_text(result: Any) -> str:
+    parts = []
+    for item in getattr(result, "content", None) or []:
+        text = getattr(item, "text", None)
+        if isinstance(text, str):
+            parts.append(text)
+    return "\n".join(parts)
+
+def _decode_text(text: str) -> Any:
+    if text:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    return text
+
+def parse_call_tool_result(tool_name: str, result: Any) -> Any:
+    """
+    Decodes a CallToolResult. Returns its structuredContent if present (unwrapping a lone
+    "result" key), else the JSON value of its text content, else the raw text.
+    Raises MCPToolError if the result is an error.
+    """
+    if getattr(result, "isError", False):
+        raise MCPToolError(tool_name, _result_text(result) or "tool reported an error without details")
+    structured = getattr(result, "structuredContent", None)
+    if isinstance(structured, dict) and list(structured) == ["result"]:
+        structured = structured["result"]
+        if isinstance(structured, str):
+            return _decode_text(structured)
+    if structured is not None:
+        return structured
+    return _decode_text(_result_text(result))
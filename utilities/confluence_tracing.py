@@ -0,0 +1,322 @@
+# confluence_tracing.py
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lightweight request tracing. Each API request (or background job) is a trace: a tree of spans
+# for the work it caused (cloud ID lookup, space crawl, page listing, page fetches, file saves,
+# MCP tool calls). The current span is kept in a contextvar, so spans opened in tasks started
+# from a span (asyncio copies the context into new tasks) become its children without passing
+# anything around.
+#
+# Async generators must not keep a span current across a yield (the consumer would inherit it);
+# they use start_span()/end_span() and activate() around the awaits that belong to the span.
+#
+# Finished traces are kept in a bounded in-memory buffer (GET /debug/traces shows the slowest)
+# and handed to exporters: one JSON line per trace in a local file, and/or OTLP/JSON over HTTP to
+# a collector. Exporters run on a background thread so a slow disk or collector never blocks
+# the event loop; if their queue is full, traces are dropped.
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("confluence_current_span", default=None)
+_USE_CURRENT = object()
+
+def current_span() -> Optional["Span"]:
+    """The span current in this context (e.g. for attaching trace ids to log records), or None."""
+    return _current_span.get()
+
+class Trace:
+    def __init__(self, trace_id: str, max_spans: int):
+        self.trace_id = trace_id
+        self.max_spans = max_spans
+        self.spans: List["Span"] = []
+        self.dropped_spans = 0
+        self.root: Optional["Span"] = None
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_time_ns", "_start_perf", "duration_seconds", "error")
+
+    def __init__(self, trace: Trace, parent_id: Optional[str], name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_time_ns = time.time_ns()
+        self._start_perf = time.perf_counter()
+        self.duration_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self, root_start_ns: int) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_offset_ms": round((self.start_time_ns - root_start_ns) / 1e6, 3),
+            "duration_ms": round(self.duration_seconds * 1000, 3) if self.duration_seconds is not None else None,
+            "attributes": dict(self.attributes),
+            "error": self.error,
+        }
+
+def trace_to_dict(trace: Trace) -> Dict[str, Any]:
+    root = trace.root
+    return {
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "start_time": root.start_time_ns / 1e9,
+        "duration_ms": round((root.duration_seconds or 0) * 1000, 3),
+        "error": root.error,
+        "span_count": len(trace.spans),
+        "dropped_spans": trace.dropped_spans,
+        "spans": [span.to_dict(root.start_time_ns) for span in trace.spans],
+    }
+
+def build_span_tree(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Nests a trace dict's flat span list by parent_id (spans whose parent was dropped become roots)."""
+    nodes = {span["span_id"]: {**span, "children": []} for span in trace["spans"]}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_id"]) if node["parent_id"] else None
+        (parent["children"] if parent else roots).append(node)
+    return roots
+
+class _BackgroundExporter(ABC):
+    """Exports finished traces from a daemon thread through a bounded queue."""
+
+    def __init__(self, queue_size: int = 1000):
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        self.dropped = 0
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            try:
+                self._export(trace)
+            except Exception as e:
+                logger.warning(f"{type(self).__name__} failed to export trace {trace.get('trace_id')}: {e}")
+
+    @abstractmethod
+    def _export(self, trace: Dict[str, Any]) -> None:
+        """Sends one finished trace; runs on the exporter thread."""
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Exports what is still queued (up to timeout seconds), then stops the thread."""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+class JsonFileTraceExporter(_BackgroundExporter):
+    """Appends one JSON object per finished trace to a local file."""
+
+    def __init__(self, path: str, queue_size: int = 1000):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(queue_size)
+
+    def _export(self, trace: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace, default=str) + "\n")
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def trace_to_otlp(trace: Dict[str, Any], service_name: str) -> Dict[str, Any]:
+    """An OTLP/JSON ExportTraceServiceRequest for one trace dict."""
+    trace_id = trace["trace_id"].ljust(32, "0")
+    start_ns = int(trace["start_time"] * 1e9)
+    spans = []
+    for span in trace["spans"]:
+        span_start_ns = start_ns + int(span["start_offset_ms"] * 1e6)
+        otlp_span = {
+            "traceId": trace_id,
+            "spanId": span["span_id"],
+            "name": span["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(span_start_ns),
+            "endTimeUnixNano": str(span_start_ns + int((span["duration_ms"] or 0) * 1e6)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span["attributes"].items()],
+            "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+        }
+        if span["parent_id"]:
+            otlp_span["parentSpanId"] = span["parent_id"]
+        spans.append(otlp_span)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{"scope": {"name": "confluence_tracing"}, "spans": spans}],
+    }]}
+
+class OTLPHttpTraceExporter(_BackgroundExporter):
+    """POSTs finished traces as OTLP/JSON to a collector endpoint (e.g. http://localhost:4318/v1/traces)."""
+
+    def __init__(self, endpoint: str, service_name: str = "confluence-mcp-api", timeout_seconds: float = 5.0, queue_size: int = 1000):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout_seconds = timeout_seconds
+        super().__init__(queue_size)
+
+    def _export(self, trace: Dict[str, Any]) -> None:
+        body = json.dumps(trace_to_otlp(trace, self.service_name), default=str).encode("utf-8")
+        request = urllib.request.Request(self.endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
+            response.read()
+
+class Tracer:
+    """Creates spans, groups them into traces and keeps the most recent finished traces."""
+
+    def __init__(self, enabled: bool = True, buffer_size: int = 200, max_spans_per_trace: int = 2000):
+        self.enabled = enabled
+        self.max_spans_per_trace = max_spans_per_trace
+        self.exporters: List[_BackgroundExporter] = []
+        self._finished: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(self, name: str, parent: Any = _USE_CURRENT, **attributes: Any) -> Optional[Span]:
+        """
+        Starts a span without making it current. Its parent is the current span unless given
+        (parent=None starts a new trace). Returns None when tracing is disabled or the trace is full.
+        """
+        if not self.enabled:
+            return None
+        if parent is _USE_CURRENT:
+            parent = _current_span.get()
+        if parent is None:
+            trace = Trace(uuid.uuid4().hex, self.max_spans_per_trace)
+        else:
+            trace = parent.trace
+            if len(trace.spans) >= trace.max_spans:
+                trace.dropped_spans += 1
+                return None
+        span = Span(trace, parent.span_id if parent else None, name, attributes)
+        trace.spans.append(span)
+        if parent is None:
+            trace.root = span
+        return span
+
+    def end_span(self, span: Optional[Span], error: Optional[BaseException] = None, **attributes: Any) -> None:
+        if span is None or span.duration_seconds is not None:
+            return
+        span.duration_seconds = time.perf_counter() - span._start_perf
+        if attributes:
+            span.attributes.update(attributes)
+        if error is not None:
+            span.error = f"{type(error).__name__}: {str(error)[:200]}"
+        if span.trace.root is span:
+            self._finish_trace(span.trace)
+
+    def _finish_trace(self, trace: Trace) -> None:
+        finished = trace_to_dict(trace)
+        with self._lock:
+            self._finished.append(finished)
+        for exporter in self.exporters:
+            exporter.export(finished)
+
+    @contextmanager
+    def activate(self, span: Optional[Span]) -> Iterator[None]:
+        """Makes span the current span inside the block (no-op for None)."""
+        if span is None:
+            yield
+            return
+        token = _current_span.set(span)
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+
+    @contextmanager
+    def span(self, name: str, parent: Any = _USE_CURRENT, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Starts a span, makes it current for the block and ends it (recording any exception)."""
+        span = self.start_span(name, parent, **attributes)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, error=e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def set_attributes(self, **attributes: Any) -> None:
+        """Adds attributes to the current span, if any."""
+        span = _current_span.get()
+        if span is not None:
+            span.attributes.update(attributes)
+
+    def traced(self, name: str, *attribute_args: str, result_attributes: Optional[Callable[[Any], Dict[str, Any]]] = None) -> Callable:
+        """
+        Decorator running an async function in a span named name. The arguments listed in
+        attribute_args (by parameter name) are recorded as span attributes, and so is whatever
+        result_attributes(return value) returns, if given.
+        """
+        def decorator(func: Callable) -> Callable:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                attributes = {}
+                if attribute_args:
+                    bound = signature.bind_partial(*args, **kwargs).arguments
+                    attributes = {arg: bound[arg] for arg in attribute_args if bound.get(arg) is not None}
+                with self.span(name, **attributes) as span:
+                    result = await func(*args, **kwargs)
+                    if span is not None and result_attributes:
+                        span.set_attributes(**result_attributes(result))
+                    return result
+            return wrapper
+        return decorator
+
+    def recent_traces(self, limit: int = 10, name_contains: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The slowest of the buffered finished traces, slowest first."""
+        with self._lock:
+            traces = list(self._finished)
+        if name_contains:
+            traces = [trace for trace in traces if name_contains in trace["name"]]
+        return sorted(traces, key=lambda trace: trace["duration_ms"], reverse=True)[:limit]
+
+    def shutdown(self) -> None:
+        for exporter in self.exporters:
+            exporter.shutdown()
+        self.exporters = []